@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-frame task dispatch vs batched dispatch
+
+Embeds sequences of small proxy-resolution frames, where the per-task IPC cost
+is large relative to the EXR work. The per-frame variant reproduces the old
+loop: one imap_unordered task per frame, each pickling the processor and the
+sequence's matte folders, and two progress messages per result. The batched
+variant is process_sequences_from_cache, which sends sequence contexts once
+per worker and frames in batches.
+"""
+
+import sys
+import os
+import time
+import queue
+import shutil
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.processing.exr_processor import EXRProcessor
+from benchmarks.synthetic import make_sequence
+
+
+def run_per_frame(processor, pairs, compression, num_processes):
+    """Old dispatch: one task per frame and two progress messages per result"""
+    options = processor.resolve_options(None)
+    tasks = [
+        (pair['base_folder'], pair['matte_folders'], base_file,
+         {channel: files[i] for channel, files in pair['matte_files'].items()},
+         compression, 'matte', options)
+        for pair in pairs
+        for i, base_file in enumerate(pair['base_files'])
+    ]
+    progress_queue = queue.Queue()
+    processed = 0
+    start_time = time.time()
+    with multiprocessing.Pool(processes=num_processes) as pool:
+        for base_folder, _, base_file, error, _ in pool.imap_unordered(processor.process_exr_file_wrapper, tasks):
+            if error:
+                raise RuntimeError(f"{base_file}: {error}")
+            processed += 1
+            progress_queue.put({
+                'progress': processed / len(tasks) * 100,
+                'status1': f"Processing: {os.path.basename(base_folder)}",
+                'status2': f"Progress: {processed}/{len(tasks)} files",
+                'processed': processed
+            })
+            elapsed = time.time() - start_time
+            progress_queue.put({'timing': f"Elapsed: {elapsed:.2f}s, Avg: {elapsed / processed:.2f}s/file"})
+    return progress_queue.qsize()
+
+
+def run_batched(processor, pairs, compression, num_processes):
+    """Current dispatch through process_sequences_from_cache"""
+    scan_results = {'pairs': pairs, 'warnings': []}
+    progress_queue = queue.Queue()
+    result_queue = queue.Queue()
+    processor.process_sequences_from_cache(scan_results, compression, 'matte', num_processes,
+                                           progress_queue, result_queue, threading.Event())
+    result = result_queue.get_nowait()
+    if not result.get('success'):
+        raise RuntimeError(result.get('error_message'))
+    return progress_queue.qsize()
+
+
+def remove_outputs(pairs, processor):
+    for pair in pairs:
+        shutil.rmtree(processor.get_output_folder(pair['base_folder']), ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=128)
+    parser.add_argument('--height', type=int, default=72)
+    parser.add_argument('--shots', type=int, default=4)
+    parser.add_argument('--frames', type=int, default=250, help='Frames per shot')
+    parser.add_argument('--processes', type=int, default=max(multiprocessing.cpu_count() // 2, 2))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--compression', default='zips', choices=EXRProcessor.COMPRESSION_OPTIONS)
+    args = parser.parse_args()
+
+    processor = EXRProcessor()
+    temp_dir = tempfile.mkdtemp(prefix='exr_bench_')
+    try:
+        for shot in range(args.shots):
+            make_sequence(temp_dir, f'shot{shot:02d}', args.frames, args.width, args.height,
+                          mattes=('', 'Hero', 'Crowd'), compression=args.compression, seed=shot)
+        pairs, _ = processor.find_matching_pairs(temp_dir)
+        total = sum(len(pair['base_files']) for pair in pairs)
+
+        print(f"{total} frames at {args.width}x{args.height} in {len(pairs)} sequences, "
+              f"{args.processes} processes, {args.compression} compression")
+        for label, run in [('per-frame dispatch', run_per_frame), ('batched dispatch', run_batched)]:
+            best = None
+            for _ in range(args.repeat):
+                remove_outputs(pairs, processor)
+                start = time.perf_counter()
+                messages = run(processor, pairs, args.compression, args.processes)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"  {label:<20} {best:7.2f}s  {total / best:8.1f} files/s  {messages:6d} progress messages")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: process, thread and hybrid execution engines
+
+Embeds a synthetic sequence with each engine for every compression type and
+resolution, and reports which engine is fastest on this machine. Thread pools
+avoid process startup and pickling but depend on OpenEXR releasing the GIL,
+so the winner varies with compression cost and frame size.
+"""
+
+import sys
+import os
+import time
+import queue
+import shutil
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.processing.exr_processor import EXRProcessor
+from src.processing.executors import ENGINES, DEFAULT_HYBRID_THREADS
+from benchmarks.synthetic import make_sequence
+
+
+def parse_resolution(value):
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def run_engine(processor, pairs, compression, engine, num_workers, threads):
+    """Embed every pair with one engine, returning the elapsed seconds"""
+    for pair in pairs:
+        shutil.rmtree(processor.get_output_folder(pair['base_folder']), ignore_errors=True)
+    result_queue = queue.Queue()
+    start = time.perf_counter()
+    processor.process_sequences_from_cache(
+        {'pairs': pairs, 'warnings': []}, compression, 'matte', num_workers,
+        queue.Queue(), result_queue, threading.Event(),
+        options={'engine': engine, 'threads_per_process': threads}
+    )
+    elapsed = time.perf_counter() - start
+    result = result_queue.get_nowait()
+    if not result.get('success'):
+        raise RuntimeError(result.get('error_message'))
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--compressions', nargs='+', default=['none', 'zips', 'zip', 'piz', 'dwaa'],
+                        choices=EXRProcessor.COMPRESSION_OPTIONS)
+    parser.add_argument('--resolutions', nargs='+', type=parse_resolution, default=[(480, 270), (1920, 1080)],
+                        metavar='WIDTHxHEIGHT')
+    parser.add_argument('--frames', type=int, default=8)
+    parser.add_argument('--processes', type=int, default=max(multiprocessing.cpu_count() // 2, 1),
+                        help='Workers per engine (processes, or threads for the thread engine)')
+    parser.add_argument('--threads', type=int, default=DEFAULT_HYBRID_THREADS, help='Threads per hybrid process')
+    parser.add_argument('--repeat', type=int, default=2)
+    args = parser.parse_args()
+
+    processor = EXRProcessor()
+    print(f"{args.frames} frames per run, {args.processes} workers, {args.threads} threads per hybrid process")
+    print(f"  {'compression':<12} {'resolution':<11} " + ''.join(f"{engine:>10}" for engine in ENGINES) + "  winner")
+
+    for width, height in args.resolutions:
+        for compression in args.compressions:
+            temp_dir = tempfile.mkdtemp(prefix='exr_bench_')
+            try:
+                make_sequence(temp_dir, 'shot', args.frames, width, height, compression=compression)
+                pairs, _ = processor.find_matching_pairs(temp_dir)
+                times = {}
+                for engine in ENGINES:
+                    times[engine] = min(
+                        run_engine(processor, pairs, compression, engine, args.processes, args.threads)
+                        for _ in range(args.repeat)
+                    )
+            finally:
+                shutil.rmtree(temp_dir)
+
+            winner = min(times, key=times.get)
+            print(f"  {compression:<12} {f'{width}x{height}':<11} "
+                  + ''.join(f"{times[engine]:9.2f}s" for engine in ENGINES) + f"  {winner}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark: prefetch and write-behind pipeline on high-latency storage
+
+Embeds a synthetic sequence with and without --pipeline while every input file
+opened and every output file written pays an artificial delay, which stands in
+for the per-file latency of network storage. Without the pipeline a worker waits
+out each delay in turn; with it the delays of upcoming and finished frames
+overlap with the encode of the current one.
+"""
+
+import sys
+import os
+import time
+import queue
+import shutil
+import argparse
+import tempfile
+import threading
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.processing.exr_processor import EXRProcessor
+from src.processing.executors import ENGINES, DEFAULT_ENGINE
+from src.processing.pipeline import DEFAULT_PREFETCH_DEPTH, DEFAULT_WRITE_BEHIND_DEPTH
+from benchmarks.synthetic import make_sequence
+
+
+class SlowStorageProcessor(EXRProcessor):
+    """EXRProcessor whose file reads and writes each wait latency seconds"""
+
+    def __init__(self, latency=0.0):
+        super().__init__()
+        self.latency = latency
+
+    def read_input(self, path):
+        time.sleep(self.latency)
+        return super().read_input(path)
+
+    def open_input(self, path, inputs=None, key='base'):
+        if inputs is None:
+            time.sleep(self.latency)
+        return super().open_input(path, inputs, key)
+
+    def process_exr_file(self, *args, output_path=None, **kwargs):
+        super().process_exr_file(*args, output_path=output_path, **kwargs)
+        if output_path is None:
+            time.sleep(self.latency)
+
+    def store_frame(self, output_dir, encoded):
+        time.sleep(self.latency)
+        return super().store_frame(output_dir, encoded)
+
+
+def parse_resolution(value):
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def run(processor, pairs, compression, num_workers, options):
+    """Embed every pair, returning the elapsed seconds"""
+    for pair in pairs:
+        shutil.rmtree(processor.get_output_folder(pair['base_folder']), ignore_errors=True)
+    result_queue = queue.Queue()
+    start = time.perf_counter()
+    processor.process_sequences_from_cache(
+        {'pairs': pairs, 'warnings': []}, compression, 'matte', num_workers,
+        queue.Queue(), result_queue, threading.Event(), options=options
+    )
+    elapsed = time.perf_counter() - start
+    result = result_queue.get_nowait()
+    if not result.get('success'):
+        raise RuntimeError(result.get('error_message'))
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latencies', nargs='+', type=float, default=[0.0, 0.01, 0.05],
+                        help='Seconds added to every file read and write')
+    parser.add_argument('--compression', default='piz', choices=EXRProcessor.COMPRESSION_OPTIONS)
+    parser.add_argument('--resolution', type=parse_resolution, default=(960, 540), metavar='WIDTHxHEIGHT')
+    parser.add_argument('--frames', type=int, default=16)
+    parser.add_argument('--mattes', type=int, default=2, help='Matte folders per sequence')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE)
+    parser.add_argument('--prefetch', type=int, default=DEFAULT_PREFETCH_DEPTH)
+    parser.add_argument('--write-behind', type=int, default=DEFAULT_WRITE_BEHIND_DEPTH)
+    parser.add_argument('--repeat', type=int, default=2)
+    args = parser.parse_args()
+
+    width, height = args.resolution
+    print(f"{args.frames} frames of {width}x{height} {args.compression} with {args.mattes} mattes, "
+          f"{args.processes} {args.engine} workers, prefetch {args.prefetch}, write-behind {args.write_behind}")
+    print(f"  {'latency':>9} {'direct':>9} {'pipeline':>9} {'speedup':>8}")
+
+    temp_dir = tempfile.mkdtemp(prefix='exr_bench_')
+    try:
+        mattes = [''] + [f'Layer{i}' for i in range(1, args.mattes)]
+        make_sequence(temp_dir, 'shot', args.frames, width, height, mattes=mattes, compression=args.compression)
+        for latency in args.latencies:
+            processor = SlowStorageProcessor(latency)
+            pairs, _ = processor.find_matching_pairs(temp_dir)
+            times = {}
+            for pipeline in [False, True]:
+                options = {
+                    'engine': args.engine,
+                    'pipeline': pipeline,
+                    'prefetch_depth': args.prefetch,
+                    'write_behind_depth': args.write_behind
+                }
+                times[pipeline] = min(
+                    run(processor, pairs, args.compression, args.processes, options)
+                    for _ in range(args.repeat)
+                )
+            print(f"  {latency * 1000:7.0f}ms {times[False]:8.2f}s {times[True]:8.2f}s "
+                  f"{times[False] / times[True]:7.2f}x")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: native pixel types vs forcing every channel through HALF
+
+Reads synthetic frames with HALF beauty, FLOAT depth/motion and a UINT id pass
+and compares the old read-as-HALF round trip (one channel() call, and so one
+decode, per channel) against reading all channels in their header types in a
+single pass. The one-pass HALF row isolates the type conversion itself.
+"""
+
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+import Imath
+import OpenEXR
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.processing.exr_processor import EXRProcessor
+from benchmarks.synthetic import make_sequence
+
+HALF = Imath.PixelType(Imath.PixelType.HALF)
+
+
+def read_forced_half(path):
+    """Old behaviour: every channel decoded and converted to HALF, one channel at a time"""
+    exr = OpenEXR.InputFile(path)
+    data = {channel: exr.channel(channel, HALF) for channel in exr.header()['channels']}
+    exr.close()
+    return data
+
+
+def read_half_one_pass(path):
+    """Every channel converted to HALF, but decoded in a single pass"""
+    exr = OpenEXR.InputFile(path)
+    channels = list(exr.header()['channels'])
+    data = dict(zip(channels, exr.channels(channels, HALF)))
+    exr.close()
+    return data
+
+
+def read_native(path):
+    """Every channel decoded in its header type in a single pass, no conversion"""
+    exr = OpenEXR.InputFile(path)
+    channels = list(exr.header()['channels'])
+    data = dict(zip(channels, exr.channels(channels)))
+    exr.close()
+    return data
+
+
+def embed_forced_half(base_folder, matte_folder, base_file, matte_file, output_dir):
+    """Old behaviour end to end: HALF reads and a header with every channel declared HALF"""
+    exr = OpenEXR.InputFile(os.path.join(base_folder, base_file))
+    header = exr.header()
+    data = {channel: exr.channel(channel, HALF) for channel in header['channels']}
+    header['channels'] = {channel: Imath.Channel(HALF) for channel in header['channels']}
+    exr.close()
+
+    exr_matte = OpenEXR.InputFile(os.path.join(matte_folder, matte_file))
+    data['matte'] = exr_matte.channel('R', HALF)
+    header['channels']['matte'] = Imath.Channel(HALF)
+    exr_matte.close()
+
+    exr_out = OpenEXR.OutputFile(os.path.join(output_dir, base_file), header)
+    exr_out.writePixels(data)
+    exr_out.close()
+
+
+def time_per_frame(function, frames):
+    start = time.perf_counter()
+    for args in frames:
+        function(*args)
+    return (time.perf_counter() - start) / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--frames', type=int, default=5)
+    parser.add_argument('--compression', default='piz', choices=EXRProcessor.COMPRESSION_OPTIONS)
+    args = parser.parse_args()
+
+    processor = EXRProcessor()
+    temp_dir = tempfile.mkdtemp(prefix='exr_bench_')
+    try:
+        base_folder = make_sequence(temp_dir, 'shot', args.frames, args.width, args.height,
+                                    compression=args.compression)
+        matte_folder = base_folder + '_matte'
+        output_dir = base_folder + '_embedded'
+        os.makedirs(output_dir, exist_ok=True)
+        base_files = sorted(os.listdir(base_folder))
+        matte_files = sorted(os.listdir(matte_folder))
+        paths = [(os.path.join(base_folder, f),) for f in base_files]
+
+        # Warm the page cache so both variants measure decode work, not disk
+        time_per_frame(read_native, paths)
+
+        results = [
+            ('read, forced HALF', time_per_frame(read_forced_half, paths)),
+            ('read, HALF one pass', time_per_frame(read_half_one_pass, paths)),
+            ('read, native types', time_per_frame(read_native, paths)),
+            ('embed, forced HALF', time_per_frame(
+                embed_forced_half,
+                [(base_folder, matte_folder, b, m, output_dir) for b, m in zip(base_files, matte_files)]
+            )),
+            ('embed, native types', time_per_frame(
+                lambda b, m: processor.process_exr_file(base_folder, {'base': matte_folder}, b,
+                                                        {'base': m}, args.compression, 'matte'),
+                list(zip(base_files, matte_files))
+            ))
+        ]
+
+        print(f"{args.frames} frames at {args.width}x{args.height}, {args.compression} compression")
+        for label, seconds in results:
+            print(f"  {label:<22} {seconds * 1000:8.1f} ms/frame")
+        print(f"  HALF minus native      {(results[1][1] - results[2][1]) * 1000:8.1f} ms/frame")
+        print(f"  total removed on read  {(results[0][1] - results[2][1]) * 1000:8.1f} ms/frame")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main()
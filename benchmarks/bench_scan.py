@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: directory scanning on a synthetic tree
+
+Builds a tree of empty .exr files laid out like a render volume (per-shot base,
+_matte* and _embedded folders plus unrelated render passes) and times the old
+os.walk listing against the parallel, pruned scanner. --latency-ms adds a delay
+to every directory listing to stand in for a high-latency network filesystem.
+"""
+
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.processing.exr_processor import EXRProcessor
+from src.processing.scanner import DirectoryScanner, list_directory, DEFAULT_PRUNE_PATTERNS
+from src.utils.scan_index import ScanIndex
+
+
+def make_tree(root, shots, frames, passes):
+    """Create shots with base, two matte, an _embedded and unrelated pass folders"""
+    file_count = 0
+    for shot in range(shots):
+        shot_dir = os.path.join(root, f'seq{shot // 20:02d}', f'shot{shot:04d}')
+        folders = ['comp', 'comp_matte', 'comp_matteHero', 'comp_embedded']
+        folders += [os.path.join('renders', f'pass{p:02d}') for p in range(passes)]
+        for folder in folders:
+            folder_path = os.path.join(shot_dir, folder)
+            os.makedirs(folder_path)
+            name = os.path.basename(folder)
+            for frame in range(1001, 1001 + frames):
+                open(os.path.join(folder_path, f'{name}.{frame}.exr'), 'wb').close()
+                file_count += 1
+    return file_count
+
+
+def old_walk(top):
+    """The previous scan: os.walk over everything, then listdir of each matched folder"""
+    for root, dirs, files in os.walk(top):
+        if '_matte' in os.path.basename(root):
+            sorted([f for f in os.listdir(root) if f.endswith('.exr')])
+
+
+def delayed(list_dir, latency):
+    def list_with_latency(path):
+        time.sleep(latency)
+        return list_dir(path)
+    return list_with_latency
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shots', type=int, default=200)
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--passes', type=int, default=2, help='Unrelated render pass folders per shot')
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='Simulated delay per directory listing')
+    args = parser.parse_args()
+
+    processor = EXRProcessor()
+    temp_dir = tempfile.mkdtemp(prefix='exr_scan_bench_')
+    config_dir = tempfile.mkdtemp(prefix='exr_scan_bench_config_')
+    try:
+        file_count = make_tree(temp_dir, args.shots, args.frames, args.passes)
+        dir_count = sum(1 for _ in os.walk(temp_dir))
+        print(f"Tree: {file_count} files in {dir_count} folders")
+
+        # Warm the dentry cache so every variant sees the same filesystem state
+        old_walk(temp_dir)
+
+        print("\nLocal filesystem:")
+        print(f"  os.walk (previous scan)        {timed(old_walk, temp_dir):8.3f}s")
+        print(f"  scanner, 1 thread, no pruning  "
+              f"{timed(DirectoryScanner(max_workers=1, prune_patterns=[]).walk, temp_dir):8.3f}s")
+        print(f"  scanner, 8 threads, pruned     {timed(DirectoryScanner(max_workers=8).walk, temp_dir):8.3f}s")
+        print(f"  find_matching_pairs            {timed(processor.find_matching_pairs, temp_dir):8.3f}s")
+
+        # Age the tree so the index trusts its listings on the second scan
+        past = time.time() - 60
+        for path, _, _ in os.walk(temp_dir):
+            os.utime(path, (past, past))
+        for label in ['find_matching_pairs, cold index', 'find_matching_pairs, warm index']:
+            scan_index = ScanIndex(temp_dir, config_dir, processor.extract_frame_numbers).load()
+            elapsed = timed(processor.find_matching_pairs, temp_dir, scan_index)
+            scan_index.save()
+            print(f"  {label:<30} {elapsed:8.3f}s")
+
+        latency = args.latency_ms / 1000.0
+        print(f"\nWith {args.latency_ms:g}ms per listing:")
+        for threads, prune in [(1, []), (1, DEFAULT_PRUNE_PATTERNS), (8, DEFAULT_PRUNE_PATTERNS),
+                               (32, DEFAULT_PRUNE_PATTERNS)]:
+            scanner = DirectoryScanner(delayed(list_directory, latency), threads, prune)
+            label = f"scanner, {threads} thread{'s' if threads > 1 else ''}, {'pruned' if prune else 'no pruning'}"
+            print(f"  {label:<30} {timed(scanner.walk, temp_dir):8.3f}s")
+    finally:
+        shutil.rmtree(temp_dir)
+        shutil.rmtree(config_dir)
+
+
+if __name__ == '__main__':
+    main()
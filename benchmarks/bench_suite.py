@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the scan and embed pipeline
+
+Generates synthetic base and _matte* sequences across resolutions, channel
+counts, pixel types, matte counts and compression types, then times
+find_matching_pairs and process_sequences_from_cache on each. Results are
+files/s, MB/s of input and peak RSS, written as JSON with --output.
+
+The first value of each axis is the baseline case. The other values are varied
+one axis at a time, or combined with every other axis with --full-matrix. Each
+case runs in a fresh interpreter so peak RSS is measured per case.
+
+Compare two runs with --compare previous.json; the exit code is 1 when any
+case's files/s dropped by more than --tolerance.
+"""
+
+import sys
+import os
+import json
+import time
+import queue
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import itertools
+import subprocess
+import multiprocessing
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import OpenEXR
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from version import get_version
+from src.processing.exr_processor import EXRProcessor
+from src.processing.executors import ENGINES, DEFAULT_ENGINE
+from benchmarks.synthetic import make_sequence, make_channels, folder_size
+
+PIXEL_TYPE_CHOICES = ['mixed', 'half', 'float', 'uint']
+DEFAULT_COMPRESSIONS = ['piz'] + [c for c in EXRProcessor.COMPRESSION_OPTIONS if c != 'piz']
+DEFAULTS = {
+    'resolutions': ['1920x1080', '640x360', '3840x2160'],
+    'channels': [8, 4, 16],
+    'pixel_types': ['mixed', 'half', 'float'],
+    'mattes': [1, 3, 6],
+    'frames': 10
+}
+QUICK_DEFAULTS = {
+    'resolutions': ['480x270', '240x135', '960x540'],
+    'channels': [8, 4, 16],
+    'pixel_types': ['mixed', 'half', 'float'],
+    'mattes': [1, 3],
+    'frames': 4
+}
+MB = 1024 * 1024
+
+
+def parse_resolution(value):
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def peak_rss_mb(who):
+    """Peak resident set size in MB, or None where resource is unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / MB if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def case_id(case):
+    return (f"{case['resolution']}-{case['channels']}ch-{case['pixel_type']}-"
+            f"{case['mattes']}m-{case['compression']}")
+
+
+def build_cases(axes, full_matrix):
+    """Cases from the axis values, baseline first"""
+    names = ['resolution', 'channels', 'pixel_type', 'mattes', 'compression']
+    if full_matrix:
+        combinations = itertools.product(*(axes[name] for name in names))
+    else:
+        baseline = [axes[name][0] for name in names]
+        combinations = [baseline]
+        for i, name in enumerate(names):
+            for value in axes[name][1:]:
+                combinations.append(baseline[:i] + [value] + baseline[i + 1:])
+    return [dict(zip(names, values)) for values in combinations]
+
+
+def generate_case(root, case, frames):
+    """Write the synthetic sequences for a case, returning the input size in bytes"""
+    width, height = parse_resolution(case['resolution'])
+    mattes = [''] + [f'Layer{i}' for i in range(1, case['mattes'])]
+    base_folder = make_sequence(root, 'shot', frames, width, height,
+                                channels=make_channels(case['channels'], case['pixel_type']),
+                                mattes=mattes, compression=case['compression'])
+    return folder_size(base_folder) + sum(
+        folder_size(os.path.join(root, f'shot_matte{suffix}')) for suffix in mattes
+    )
+
+
+def run_case(settings):
+    """Scan and embed one generated case in this process, returning its measurements"""
+    processor = EXRProcessor()
+    root = settings['root']
+
+    start = time.perf_counter()
+    pairs, warnings = processor.find_matching_pairs(root)
+    scan_seconds = time.perf_counter() - start
+
+    scan_results = {
+        'pairs': pairs,
+        'warnings': warnings,
+        'total_sequences': len(pairs),
+        'total_files': sum(len(pair['base_files']) for pair in pairs)
+    }
+    result_queue = queue.Queue()
+    start = time.perf_counter()
+    processor.process_sequences_from_cache(
+        scan_results, settings['compression'], 'matte', settings['processes'],
+        queue.Queue(), result_queue, threading.Event(), options={'engine': settings['engine']}
+    )
+    process_seconds = time.perf_counter() - start
+
+    result = result_queue.get_nowait()
+    if not result.get('success'):
+        raise RuntimeError(result.get('error_message', 'processing failed'))
+
+    output_bytes = sum(folder_size(processor.get_output_folder(pair['base_folder'])) for pair in pairs)
+    return {
+        'frames': scan_results['total_files'],
+        'scan_seconds': round(scan_seconds, 4),
+        'process_seconds': round(process_seconds, 4),
+        'output_bytes': output_bytes,
+        'peak_rss_mb': peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+        'peak_worker_rss_mb': peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None
+    }
+
+
+def measure_case(case, args):
+    """Generate a case, run it in a fresh interpreter and compute its rates"""
+    temp_dir = tempfile.mkdtemp(prefix='exr_bench_')
+    try:
+        input_bytes = generate_case(temp_dir, case, args.frames)
+        settings = {
+            'root': temp_dir,
+            'compression': case['compression'],
+            'processes': args.processes,
+            'engine': args.engine
+        }
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--run-case', json.dumps(settings)],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            return {'id': case_id(case), **case, 'error': completed.stderr.strip().splitlines()[-1:]}
+        measured = json.loads(completed.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(temp_dir)
+
+    seconds = max(measured['process_seconds'], 1e-9)
+    return {
+        'id': case_id(case),
+        **case,
+        **measured,
+        'input_bytes': input_bytes,
+        'files_per_second': round(measured['frames'] / seconds, 2),
+        'mb_per_second': round(input_bytes / MB / seconds, 2)
+    }
+
+
+def compare(results, previous_path, tolerance):
+    """Print files/s against a previous run, returning the number of regressions"""
+    with open(previous_path, 'r') as f:
+        previous = {result['id']: result for result in json.load(f)['results'] if 'error' not in result}
+
+    regressions = 0
+    print(f"\nCompared with {previous_path}:")
+    for result in results:
+        before = previous.get(result['id'])
+        if before is None or 'error' in result:
+            continue
+        ratio = result['files_per_second'] / before['files_per_second']
+        regressed = ratio < 1 - tolerance
+        regressions += regressed
+        print(f"  {result['id']:<40} {before['files_per_second']:9.2f} -> {result['files_per_second']:9.2f} "
+              f"files/s ({ratio - 1:+.1%}){'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--resolutions', nargs='+', metavar='WIDTHxHEIGHT')
+    parser.add_argument('--channels', nargs='+', type=int, help='Base channel counts')
+    parser.add_argument('--pixel-types', nargs='+', choices=PIXEL_TYPE_CHOICES)
+    parser.add_argument('--mattes', nargs='+', type=int, help='Matte folders per sequence')
+    parser.add_argument('--compressions', nargs='+', choices=EXRProcessor.COMPRESSION_OPTIONS,
+                        default=DEFAULT_COMPRESSIONS)
+    parser.add_argument('--frames', type=int, help='Frames per sequence')
+    parser.add_argument('--quick', action='store_true', help='Smaller frames and fewer of them')
+    parser.add_argument('--full-matrix', action='store_true', help='Run every combination of the axes')
+    parser.add_argument('--processes', type=int, default=max(multiprocessing.cpu_count() // 2, 1))
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--compare', metavar='PREVIOUS_JSON', help='Compare files/s with a previous --output')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Allowed files/s drop before --compare reports a regression (default: 0.10)')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(json.loads(args.run_case))))
+        return 0
+
+    defaults = QUICK_DEFAULTS if args.quick else DEFAULTS
+    axes = {
+        'resolution': args.resolutions or defaults['resolutions'],
+        'channels': args.channels or defaults['channels'],
+        'pixel_type': args.pixel_types or defaults['pixel_types'],
+        'mattes': args.mattes or defaults['mattes'],
+        'compression': args.compressions
+    }
+    args.frames = args.frames or defaults['frames']
+    cases = build_cases(axes, args.full_matrix)
+
+    print(f"{len(cases)} cases, {args.frames} frames each, {args.processes} {args.engine} workers")
+    print(f"  {'case':<40} {'files/s':>9} {'MB/s':>9} {'scan s':>8} {'peak MB':>8} {'workers MB':>10}")
+    results = []
+    for case in cases:
+        result = measure_case(case, args)
+        results.append(result)
+        if 'error' in result:
+            print(f"  {result['id']:<40} failed: {' '.join(result['error'])}")
+            continue
+        print(f"  {result['id']:<40} {result['files_per_second']:9.2f} {result['mb_per_second']:9.2f} "
+              f"{result['scan_seconds']:8.3f} {result['peak_rss_mb'] or 0:8.1f} {result['peak_worker_rss_mb'] or 0:10.1f}")
+
+    report = {
+        'version': get_version(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'openexr': getattr(OpenEXR, '__version__', None),
+            'cpu_count': multiprocessing.cpu_count()
+        },
+        'settings': {
+            'frames': args.frames,
+            'processes': args.processes,
+            'engine': args.engine,
+            'full_matrix': args.full_matrix
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Synthetic EXR sequence generation for benchmarks
+Creates base folders with a configurable channel layout and matching _matte* folders
+"""
+import os
+
+import numpy as np
+import OpenEXR
+
+PIXEL_DTYPES = {
+    'half': np.float16,
+    'float': np.float32,
+    'uint': np.uint32
+}
+
+COMPRESSION_TYPES = {
+    'none': OpenEXR.NO_COMPRESSION,
+    'rle': OpenEXR.RLE_COMPRESSION,
+    'zips': OpenEXR.ZIPS_COMPRESSION,
+    'zip': OpenEXR.ZIP_COMPRESSION,
+    'piz': OpenEXR.PIZ_COMPRESSION,
+    'pxr24': OpenEXR.PXR24_COMPRESSION,
+    'b44': OpenEXR.B44_COMPRESSION,
+    'b44a': OpenEXR.B44A_COMPRESSION,
+    'dwaa': OpenEXR.DWAA_COMPRESSION
+}
+
+# A render-like layout: beauty in HALF, utility passes in FLOAT and UINT
+DEFAULT_CHANNELS = {
+    'R': 'half', 'G': 'half', 'B': 'half', 'A': 'half',
+    'Z': 'float',
+    'motion.x': 'float', 'motion.y': 'float',
+    'id': 'uint'
+}
+
+# Names used when a benchmark asks for more channels than the default layout
+EXTRA_CHANNEL_NAMES = ['N.x', 'N.y', 'N.z', 'P.x', 'P.y', 'P.z', 'spec.R', 'spec.G', 'spec.B']
+
+
+def make_channels(count, pixel_type='mixed'):
+    """Layout of count channels, all of pixel_type, or following the DEFAULT_CHANNELS types for 'mixed'"""
+    names = list(DEFAULT_CHANNELS) + EXTRA_CHANNEL_NAMES
+    names += [f'extra{i}' for i in range(max(count - len(names), 0))]
+    mixed_types = list(DEFAULT_CHANNELS.values())
+    return {
+        name: mixed_types[i % len(mixed_types)] if pixel_type == 'mixed' else pixel_type
+        for i, name in enumerate(names[:count])
+    }
+
+
+def make_pixels(rng, width, height, pixel_type):
+    """Smooth gradient plus noise, so codecs see something render-like"""
+    gradient = np.linspace(0.0, 1.0, width, dtype=np.float32)[np.newaxis, :]
+    values = gradient + rng.random((height, width), dtype=np.float32) * 0.1
+    if pixel_type == 'uint':
+        return (values * 1000).astype(np.uint32)
+    return values.astype(PIXEL_DTYPES[pixel_type])
+
+
+def make_matte(rng, width, height, coverage=0.25):
+    """A rectangular matte covering roughly `coverage` of the frame, zero elsewhere"""
+    matte = np.zeros((height, width), dtype=np.float16)
+    side = max(coverage, 0.0) ** 0.5
+    matte_w, matte_h = max(int(width * side), 1), max(int(height * side), 1)
+    x0 = int(rng.integers(0, width - matte_w + 1))
+    y0 = int(rng.integers(0, height - matte_h + 1))
+    matte[y0:y0 + matte_h, x0:x0 + matte_w] = 1.0
+    return matte
+
+
+def write_exr(path, channels, compression='piz'):
+    """Write numpy channels to a single-part scanline EXR"""
+    header = {
+        'compression': COMPRESSION_TYPES[compression],
+        'type': OpenEXR.scanlineimage
+    }
+    with OpenEXR.File(header, channels) as exr:
+        exr.write(path)
+
+
+def make_sequence(root, name, frames=10, width=1920, height=1080, channels=None,
+                  mattes=('',), compression='piz', matte_coverage=0.25, start_frame=1001, seed=0):
+    """Create root/name plus one root/name_matte<suffix> folder per entry in mattes"""
+    rng = np.random.default_rng(seed)
+    channels = channels or DEFAULT_CHANNELS
+    base_folder = os.path.join(root, name)
+    os.makedirs(base_folder, exist_ok=True)
+    for suffix in mattes:
+        os.makedirs(os.path.join(root, f'{name}_matte{suffix}'), exist_ok=True)
+
+    for frame in range(start_frame, start_frame + frames):
+        write_exr(os.path.join(base_folder, f'{name}.{frame:04d}.exr'), {
+            channel: make_pixels(rng, width, height, pixel_type)
+            for channel, pixel_type in channels.items()
+        }, compression)
+        for suffix in mattes:
+            matte_path = os.path.join(root, f'{name}_matte{suffix}', f'{name}_matte{suffix}.{frame:04d}.exr')
+            write_exr(matte_path, {'R': make_matte(rng, width, height, matte_coverage)}, compression)
+
+    return base_folder
+
+
+def folder_size(folder):
+    """Total size in bytes of the files directly inside folder"""
+    return sum(entry.stat().st_size for entry in os.scandir(folder) if entry.is_file())
@@ -8,7 +8,22 @@ import argparse
 import threading
 import queue
 import time
+import contextlib
 from ..processing.exr_processor import EXRProcessor
+from ..processing.executors import ENGINES, DEFAULT_ENGINE, DEFAULT_HYBRID_THREADS
+from ..processing.report import write_report, format_stage_summary
+from ..processing.pipeline import DEFAULT_PREFETCH_DEPTH, DEFAULT_WRITE_BEHIND_DEPTH
+from ..processing.scanner import DEFAULT_PRUNE_PATTERNS, DEFAULT_SCAN_THREADS
+from ..processing.sharding import parse_frame_ranges, parse_shard, save_plan, load_plan
+from ..processing.work_queue import DEFAULT_LEASE_TTL, default_node_id
+from ..processing.watcher import DEFAULT_SETTLE_SECONDS
+from ..processing.manifest import FINGERPRINTS, DEFAULT_FINGERPRINT
+from ..processing.events import (EventStream, JsonLinesSink, ScanStarted, ScanFinished, EVENT_FORMATS,
+                                 DEFAULT_EVENT_INTERVAL)
+from ..processing.compression_choice import (AUTO_COMPRESSION, OBJECTIVES, DEFAULT_OBJECTIVE, DEFAULT_CANDIDATES,
+                                             DEFAULT_SAMPLE_FRAMES)
+from ..utils.config import Config
+from ..utils.scan_index import ScanIndex
 from version import get_version
 
 
@@ -21,10 +36,11 @@ class CLIProgress:
         self.start_time = time.time()
         self.last_update = 0
         
-    def update(self, processed=None, status1="", status2=""):
+    def update(self, processed=None, status1="", status2="", workers=None):
         """Update progress and print status"""
         if processed is not None:
             self.processed_files = processed
+        worker_text = f" | Workers: {workers}" if workers else ""
             
         current_time = time.time()
         
@@ -44,9 +60,10 @@ class CLIProgress:
                 est_remaining = avg_time * remaining_files
                 
                 print(f"\rProgress: {self.processed_files}/{self.total_files} ({progress_pct:.1f}%) | "
-                      f"Elapsed: {elapsed:.1f}s | Est. remaining: {est_remaining:.1f}s", end="")
+                      f"Elapsed: {elapsed:.1f}s | Est. remaining: {est_remaining:.1f}s{worker_text}", end="")
             else:
-                print(f"\rProgress: {self.processed_files}/{self.total_files} ({progress_pct:.1f}%)", end="")
+                print(f"\rProgress: {self.processed_files}/{self.total_files} ({progress_pct:.1f}%){worker_text}",
+                      end="")
         else:
             print(f"\r{status1} {status2}", end="")
             
@@ -55,11 +72,67 @@ class CLIProgress:
             print()  # Final newline
 
 
+def processes_argument(value):
+    """--processes value: a process count or 'auto'"""
+    if value == 'auto':
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number or 'auto', got '{value}'")
+
+
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def size_argument(value):
+    """Byte size with an optional K, M, G or T suffix, such as 24G"""
+    number = value.strip().upper().rstrip('B')
+    unit = number[-1:] if number[-1:] in SIZE_UNITS else ''
+    try:
+        size = int(float(number[:len(number) - len(unit)]) * SIZE_UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a size such as 512M or 24G, got '{value}'")
+    if size <= 0:
+        raise argparse.ArgumentTypeError("size must be greater than 0")
+    return size
+
+
+def candidates_argument(value):
+    """--auto-candidates value: compressions separated by commas"""
+    candidates = [name.strip().lower() for name in value.split(',') if name.strip()]
+    unknown = [name for name in candidates if name not in EXRProcessor.COMPRESSION_OPTIONS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown compression {', '.join(unknown)}, expected "
+                                         f"{', '.join(EXRProcessor.COMPRESSION_OPTIONS)}")
+    if not candidates:
+        raise argparse.ArgumentTypeError("no compressions given")
+    return candidates
+
+
+def frames_argument(value):
+    """--frames value: frames and first-last ranges separated by commas"""
+    try:
+        return parse_frame_ranges(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def shard_argument(value):
+    """--shard value: i/n with shards numbered from 1"""
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
 class CLIProcessor:
     """Command-line interface for EXR processing"""
     
     def __init__(self):
         self.processor = EXRProcessor()
+        # Events of the run, dropped unless --events is given
+        self.events = EventStream()
         
     def create_parser(self):
         """Create argument parser for CLI"""
@@ -70,21 +143,69 @@ class CLIProcessor:
 Examples:
   %(prog)s /path/to/sequences
   %(prog)s /path/to/sequences --compression zip --matte-channel alpha
+  %(prog)s /path/to/sequences --compression auto --objective smallest --auto-candidates piz,zip,dwaa
   %(prog)s /path/to/sequences --processes 8 --replace-originals
+  %(prog)s /path/to/sequences --verify --replace-originals
+  %(prog)s /path/to/sequences --processes auto
+  %(prog)s /path/to/sequences --processes 16 --max-memory 24G
+  %(prog)s /path/to/sequences --output-root /mnt/scratch/embedded
+  %(prog)s /path/to/sequences --streaming --block-lines 128
+  %(prog)s /path/to/sequences --engine hybrid --processes 4 --threads 2
+  %(prog)s /path/to/sequences --pipeline --prefetch 4 --write-behind 2
+  %(prog)s /path/to/sequences --layout multipart --matte-compression zips --crop-mattes
+  %(prog)s /path/to/sequences --resume
+  %(prog)s /path/to/sequences --resume --fingerprint header
+  %(prog)s /path/to/sequences --report run.json
+  %(prog)s /path/to/sequences --events jsonl --events-file run.events.jsonl
+  %(prog)s /path/to/sequences --profile run.pstats --profile-collapsed run.collapsed
   %(prog)s /path/to/sequences --scan-only
+  %(prog)s /path/to/sequences --scan-only --rescan
+  %(prog)s /path/to/sequences --scan-threads 32 --prune 'cache*' --prune 'old_*'
+  %(prog)s /path/to/sequences --frame-policy intersection
+  %(prog)s /path/to/sequences --frames 1001-1100,1200
+  %(prog)s /path/to/sequences --scan-only --save-plan shot.plan
+  %(prog)s --plan shot.plan --shard 3/16
+  %(prog)s /path/to/sequences --work-queue /mnt/shared/queue --node-id render07
+  %(prog)s /path/to/sequences --watch --resume --settle 5
             """
         )
         
         parser.add_argument(
             'folder_path',
-            help='Path to folder containing EXR sequences and their matte folders'
+            nargs='?',
+            help='Path to folder containing EXR sequences and their matte folders (not needed with --plan)'
         )
         
         parser.add_argument(
             '--compression', '-c',
-            choices=self.processor.COMPRESSION_OPTIONS,
+            choices=self.processor.COMPRESSION_OPTIONS + [AUTO_COMPRESSION],
             default='piz',
-            help='Compression type for output EXR files (default: piz)'
+            help='Compression type for output EXR files, or auto to choose one per sequence by encoding '
+                 'sample frames with each --auto-candidates compression (default: piz)'
+        )
+        
+        parser.add_argument(
+            '--objective',
+            choices=OBJECTIVES,
+            default=DEFAULT_OBJECTIVE,
+            help='With --compression auto, choose the fastest to encode, the smallest output, or balanced, '
+                 f'the lowest product of encode time and size (default: {DEFAULT_OBJECTIVE})'
+        )
+        
+        parser.add_argument(
+            '--auto-candidates',
+            type=candidates_argument,
+            metavar='LIST',
+            help=f'Compressions --compression auto chooses from, separated by commas '
+                 f'(default: {",".join(DEFAULT_CANDIDATES)}, the lossless ones)'
+        )
+        
+        parser.add_argument(
+            '--auto-samples',
+            type=int,
+            default=DEFAULT_SAMPLE_FRAMES,
+            help=f'Frames per sequence encoded with each candidate by --compression auto '
+                 f'(default: {DEFAULT_SAMPLE_FRAMES})'
         )
         
         parser.add_argument(
@@ -93,11 +214,42 @@ Examples:
             help='Name for the matte channel in output files (default: matte)'
         )
         
+        parser.add_argument(
+            '--matte-pixel-type',
+            choices=self.processor.MATTE_PIXEL_TYPES,
+            default='half',
+            help='Pixel type for embedded matte channels, native keeps the matte file type (default: half)'
+        )
+        
         parser.add_argument(
             '--processes', '-p',
-            type=int,
+            type=processes_argument,
             default=max(os.cpu_count() // 2, 1),
-            help=f'Number of parallel processes (default: {max(os.cpu_count() // 2, 1)})'
+            help=f'Number of parallel processes, or auto to adjust the number of busy workers to the measured '
+                 f'throughput, up to one per core (default: {max(os.cpu_count() // 2, 1)})'
+        )
+        
+        parser.add_argument(
+            '--max-memory',
+            type=size_argument,
+            metavar='SIZE',
+            help='Only run frames at once while their estimated pixel data fits in SIZE (such as 24G); '
+                 'larger frames wait for others to finish'
+        )
+        
+        parser.add_argument(
+            '--engine',
+            choices=ENGINES,
+            default=DEFAULT_ENGINE,
+            help='Execution backend: process pool, thread pool, or processes running several threads '
+                 f'each (default: {DEFAULT_ENGINE})'
+        )
+        
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=DEFAULT_HYBRID_THREADS,
+            help=f'Threads per process with --engine hybrid (default: {DEFAULT_HYBRID_THREADS})'
         )
         
         parser.add_argument(
@@ -106,12 +258,246 @@ Examples:
             help='Replace original folders (move to trash and rename embedded folders)'
         )
         
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Read every output back after writing and compare it with checksums taken during the write; '
+                 'originals of sequences that fail are not replaced'
+        )
+        
+        parser.add_argument(
+            '--output-root',
+            metavar='PATH',
+            help='Write the _embedded folders under PATH, keeping their paths relative to the scanned folder, '
+                 'instead of next to each sequence'
+        )
+        
+        parser.add_argument(
+            '--layout',
+            choices=self.processor.OUTPUT_LAYOUTS,
+            default='single',
+            help='Output layout: single re-encodes one part, multipart copies the original '
+                 'compressed chunks into part 0 and adds the mattes as part 1 (default: single)'
+        )
+        
+        parser.add_argument(
+            '--matte-compression',
+            choices=self.processor.COMPRESSION_OPTIONS,
+            help='Compression for the matte part in multipart layout (default: same as --compression)'
+        )
+        
+        parser.add_argument(
+            '--crop-mattes',
+            action='store_true',
+            help='Crop the matte part dataWindow to the non-zero pixels of each frame (multipart layout only)'
+        )
+        
+        parser.add_argument(
+            '--streaming',
+            action='store_true',
+            help='Embed in blocks of scanlines to keep memory per process roughly constant'
+        )
+        
+        parser.add_argument(
+            '--block-lines',
+            type=int,
+            default=64,
+            help='Scanlines per block in streaming mode, rounded up to the compression chunk size (default: 64)'
+        )
+        
+        parser.add_argument(
+            '--pipeline',
+            action='store_true',
+            help='Read upcoming frames and move finished outputs into place in the background of each worker, '
+                 'overlapping storage latency with encoding'
+        )
+        
+        parser.add_argument(
+            '--prefetch',
+            type=int,
+            default=DEFAULT_PREFETCH_DEPTH,
+            help=f'Frames each worker reads ahead with --pipeline (default: {DEFAULT_PREFETCH_DEPTH})'
+        )
+        
+        parser.add_argument(
+            '--write-behind',
+            type=int,
+            default=DEFAULT_WRITE_BEHIND_DEPTH,
+            help=f'Encoded frames each worker may have waiting to be written with --pipeline '
+                 f'(default: {DEFAULT_WRITE_BEHIND_DEPTH})'
+        )
+        
+        parser.add_argument(
+            '--staging-dir',
+            metavar='PATH',
+            help='Local folder frames are encoded into before the write-behind stage moves them '
+                 '(default: the system temp folder)'
+        )
+        
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Skip frames whose output is complete and up to date, using a manifest in each _embedded folder, '
+                 'including base frames already embedded in place by --replace-originals'
+        )
+        
+        parser.add_argument(
+            '--fingerprint',
+            choices=FINGERPRINTS,
+            help=f'Implies --resume. How inputs whose modification time changed are compared with the ones an output '
+                 f'was written from: stat treats them as changed, header compares their header and chunk offset '
+                 f'table, content hashes them (xxhash when installed) (default: {DEFAULT_FINGERPRINT})'
+        )
+        
+        parser.add_argument(
+            '--resume-hash',
+            action='store_true',
+            help='Same as --resume --fingerprint content'
+        )
+        
         parser.add_argument(
             '--scan-only', '-s',
             action='store_true',
             help='Only scan and report sequences, do not process'
         )
         
+        parser.add_argument(
+            '--rescan',
+            action='store_true',
+            help='Ignore the cached scan index and re-list every folder'
+        )
+        
+        parser.add_argument(
+            '--scan-threads',
+            type=int,
+            default=DEFAULT_SCAN_THREADS,
+            help=f'Number of threads listing folders while scanning (default: {DEFAULT_SCAN_THREADS})'
+        )
+        
+        parser.add_argument(
+            '--prune',
+            action='append',
+            default=[],
+            metavar='PATTERN',
+            help='Folder name pattern to skip while scanning, can be repeated '
+                 f'(always skipped: {", ".join(DEFAULT_PRUNE_PATTERNS)})'
+        )
+        
+        parser.add_argument(
+            '--frame-policy',
+            choices=EXRProcessor.FRAME_POLICIES,
+            default='strict',
+            help='strict skips sequences whose channels have different frames, intersection '
+                 'processes the frames present in every channel (default: strict)'
+        )
+        
+        parser.add_argument(
+            '--frames',
+            type=frames_argument,
+            metavar='RANGES',
+            help='Only process frames in these ranges, such as 1001-1100,1200'
+        )
+        
+        parser.add_argument(
+            '--shard',
+            type=shard_argument,
+            metavar='I/N',
+            help='Only process part I of N of the frames of all sequences, split by estimated bytes, '
+                 'so N nodes given the same scan process every frame once'
+        )
+        
+        parser.add_argument(
+            '--save-plan',
+            metavar='PATH',
+            help='Write the scan results as a plan that --plan loads instead of scanning'
+        )
+        
+        parser.add_argument(
+            '--plan',
+            metavar='PATH',
+            help='Load the sequences from a plan written by --save-plan instead of scanning'
+        )
+        
+        parser.add_argument(
+            '--work-queue',
+            metavar='PATH',
+            help='Share the frames with other nodes through lease files in PATH on a shared filesystem; '
+                 'every node run with the same folder and PATH claims frames until none are left'
+        )
+        
+        parser.add_argument(
+            '--node-id',
+            help='Name of this node in --work-queue lease files (default: hostname:pid)'
+        )
+        
+        parser.add_argument(
+            '--lease-ttl',
+            type=float,
+            default=DEFAULT_LEASE_TTL,
+            help=f'Seconds after which frames leased by a node that stopped renewing them are taken over '
+                 f'(default: {DEFAULT_LEASE_TTL:.0f})'
+        )
+        
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='After processing, keep running and embed frames as they are written or changed, '
+                 'until interrupted with Ctrl+C'
+        )
+        
+        parser.add_argument(
+            '--settle',
+            type=float,
+            default=DEFAULT_SETTLE_SECONDS,
+            metavar='SECONDS',
+            help=f'With --watch, seconds a file must stay unchanged before it is processed '
+                 f'(default: {DEFAULT_SETTLE_SECONDS:g})'
+        )
+        
+        parser.add_argument(
+            '--poll',
+            action='store_true',
+            help='With --watch, find changes by listing the folder every few seconds instead of using inotify'
+        )
+        
+        parser.add_argument(
+            '--report',
+            metavar='PATH',
+            help='Write per-stage timings per sequence and for the run (CSV when PATH ends in .csv, JSON otherwise)'
+        )
+        
+        parser.add_argument(
+            '--events',
+            choices=EVENT_FORMATS,
+            help='Write structured events of the scan and run (frames done and failed, sequences done, progress '
+                 'and a run summary) for monitoring'
+        )
+        
+        parser.add_argument(
+            '--events-file',
+            metavar='PATH',
+            help='File --events are appended to (default: standard output, with all other output on standard error)'
+        )
+        
+        parser.add_argument(
+            '--events-interval',
+            type=float,
+            default=DEFAULT_EVENT_INTERVAL,
+            help=f'Seconds between deliveries of frame and progress events (default: {DEFAULT_EVENT_INTERVAL:g})'
+        )
+        
+        parser.add_argument(
+            '--profile',
+            metavar='PATH',
+            help='Profile frame processing in every worker and write the merged stats as a pstats file'
+        )
+        
+        parser.add_argument(
+            '--profile-collapsed',
+            metavar='PATH',
+            help='Write the merged worker profile as collapsed stacks for flame graph tools'
+        )
+        
         parser.add_argument(
             '--quiet', '-q',
             action='store_true',
@@ -137,19 +523,94 @@ Examples:
         errors = []
         
         # Check folder exists
-        if not os.path.exists(args.folder_path):
+        if args.plan:
+            if not os.path.isfile(args.plan):
+                errors.append(f"Plan does not exist: {args.plan}")
+            if args.folder_path:
+                errors.append("Cannot use both a folder and --plan")
+            if args.save_plan:
+                errors.append("Cannot use both --plan and --save-plan")
+        elif not args.folder_path:
+            errors.append("A folder or --plan is required")
+        elif not os.path.exists(args.folder_path):
             errors.append(f"Folder does not exist: {args.folder_path}")
         elif not os.path.isdir(args.folder_path):
             errors.append(f"Path is not a directory: {args.folder_path}")
             
-        # Check process count
+        # Check process count (the thread engine may run more threads than cores)
         max_processes = os.cpu_count()
-        if args.processes < 1:
+        if args.processes == 'auto':
+            pass
+        elif args.processes < 1:
             errors.append("Number of processes must be at least 1")
-        elif args.processes > max_processes:
+        elif args.processes > max_processes and args.engine != 'thread':
             errors.append(f"Number of processes cannot exceed {max_processes}")
             
+        if args.threads < 1:
+            errors.append("Number of threads must be at least 1")
+            
+        if args.scan_threads < 1:
+            errors.append("Number of scan threads must be at least 1")
+            
+        if args.crop_mattes and args.layout != 'multipart':
+            errors.append("--crop-mattes requires --layout multipart")
+            
+        if args.resume_hash and args.fingerprint not in (None, 'content'):
+            errors.append("--resume-hash cannot be used with another --fingerprint")
+            
+        if args.compression == AUTO_COMPRESSION and (args.shard or args.work_queue):
+            errors.append("--compression auto cannot be used with --shard or --work-queue, "
+                          "where each node would sample and could choose another compression")
+            
+        if args.compression == AUTO_COMPRESSION and args.layout == 'multipart' and args.matte_compression:
+            errors.append("--compression auto cannot be used with --layout multipart and --matte-compression, "
+                          "which copies the base chunks and compresses the mattes with --matte-compression")
+            
+        if args.auto_samples < 1:
+            errors.append("Auto compression samples must be at least 1")
+            
+        if args.block_lines < 1:
+            errors.append("Block lines must be at least 1")
+            
+        if args.prefetch < 1 or args.write_behind < 1:
+            errors.append("Prefetch and write-behind depths must be at least 1")
+            
+        if args.output_root and os.path.exists(args.output_root) and not os.path.isdir(args.output_root):
+            errors.append(f"Output root is not a directory: {args.output_root}")
+            
+        if args.staging_dir and not os.path.isdir(args.staging_dir):
+            errors.append(f"Staging folder does not exist: {args.staging_dir}")
+            
         # Check conflicting options
+        if args.lease_ttl <= 0:
+            errors.append("Lease TTL must be greater than 0")
+            
+        if args.work_queue and (args.resume or args.resume_hash or args.fingerprint):
+            errors.append("--resume, --resume-hash and --fingerprint cannot be used with --work-queue, whose nodes "
+                          "would overwrite each other's manifests; the queue already skips frames done before")
+            
+        if args.replace_originals and args.work_queue:
+            errors.append("--replace-originals cannot be used with --work-queue, which shares each sequence "
+                          "between nodes")
+            
+        if args.watch and (args.plan or args.replace_originals or args.work_queue or args.frames or args.shard
+                           or args.verify):
+            errors.append("--watch cannot be used with --plan, --replace-originals, --work-queue, "
+                          "--frames, --shard or --verify")
+            
+        if args.events_file and not args.events:
+            errors.append("--events-file requires --events")
+            
+        if args.events_interval < 0:
+            errors.append("Events interval cannot be negative")
+            
+        if args.settle < 0:
+            errors.append("Settle time cannot be negative")
+            
+        if args.replace_originals and (args.frames or args.shard):
+            errors.append("--replace-originals cannot be used with --frames or --shard, "
+                          "which only embed part of each sequence")
+            
         if args.quiet and args.verbose:
             errors.append("Cannot use both --quiet and --verbose options")
             
@@ -203,32 +664,124 @@ Examples:
                 print(f"  ⚠ {warning}")
             print()
     
-    def run_scan(self, folder_path, quiet=False):
+    def run_scan(self, folder_path, quiet=False, rescan=False, scan_threads=DEFAULT_SCAN_THREADS,
+                 prune_patterns=None, frame_policy='strict'):
         """Run scan and return results"""
         if not quiet:
             print(f"Scanning folder: {folder_path}")
+        self.events.emit(ScanStarted(folder_path))
             
-        pairs, warnings = self.processor.find_matching_pairs(folder_path)
+        scan_index = ScanIndex(folder_path, Config().config_dir,
+                               frame_parser=self.processor.extract_frame_numbers,
+                               force_rescan=rescan).load()
+        pairs, warnings = self.processor.find_matching_pairs(
+            folder_path, scan_index, scan_threads,
+            DEFAULT_PRUNE_PATTERNS + (prune_patterns or []), frame_policy
+        )
+        scan_index.save()
         
         scan_results = {
             'pairs': pairs,
             'warnings': warnings,
             'total_sequences': len(pairs),
-            'total_files': sum(len(pair['base_files']) for pair in pairs)
+            'total_files': sum(len(pair['base_files']) for pair in pairs),
+            'scan_stats': scan_index.get_stats()
         }
+        self.events.emit(ScanFinished(len(pairs), scan_results['total_files'], warnings))
         
         return scan_results
     
+    def select_frames(self, scan_results, frame_ranges, shard, quiet=False):
+        """Reduce scan results to the frames in frame_ranges and shard"""
+        pairs = self.processor.select_frames(scan_results['pairs'], frame_ranges, shard)
+        scan_results['pairs'] = pairs
+        scan_results['total_sequences'] = len(pairs)
+        scan_results['total_files'] = sum(len(pair['base_files']) for pair in pairs)
+        if not quiet and shard:
+            index, count = shard
+            print(f"Shard {index}/{count}: {scan_results['total_files']} file(s) "
+                  f"in {len(pairs)} sequence(s)")
+    
+    def get_fingerprint(self, args):
+        """Fingerprint mode of resumed runs, content for --resume-hash"""
+        if args.fingerprint:
+            return args.fingerprint
+        return 'content' if args.resume_hash else DEFAULT_FINGERPRINT
+    
+    def get_processing_options(self, args):
+        """Build the processor options dict from command line arguments"""
+        return {
+            'streaming': args.streaming,
+            'block_lines': args.block_lines,
+            'matte_pixel_type': args.matte_pixel_type,
+            'output_layout': args.layout,
+            'matte_compression': args.matte_compression,
+            'crop_mattes': args.crop_mattes,
+            'resume': args.resume or args.resume_hash or args.fingerprint is not None,
+            'fingerprint': self.get_fingerprint(args),
+            'engine': args.engine,
+            'threads_per_process': args.threads,
+            'profile': args.profile,
+            'profile_collapsed': args.profile_collapsed,
+            'pipeline': args.pipeline,
+            'prefetch_depth': args.prefetch,
+            'write_behind_depth': args.write_behind,
+            'staging_dir': args.staging_dir,
+            'output_root': args.output_root,
+            'autoscale': args.processes == 'auto',
+            'max_memory': args.max_memory,
+            'work_queue': args.work_queue,
+            'node_id': args.node_id or default_node_id(),
+            'lease_ttl': args.lease_ttl,
+            'compression_objective': args.objective,
+            'auto_candidates': args.auto_candidates,
+            'auto_samples': args.auto_samples,
+            'verify': args.verify
+        }
+    
     def run_processing(self, args, scan_results):
         """Run the processing with progress tracking"""
         if scan_results['total_sequences'] == 0:
             print("No sequences found to process.")
             return True
             
+        num_processes = args.processes
+        if num_processes == 'auto':
+            num_processes = os.cpu_count()
+        options = self.get_processing_options(args)
         if not args.quiet:
-            print(f"\nStarting processing with {args.processes} processes...")
-            print(f"Compression: {args.compression}")
-            print(f"Matte channel: {args.matte_channel}")
+            workers = f"up to {num_processes} (auto)" if args.processes == 'auto' else num_processes
+            if args.engine == 'thread':
+                print(f"\nStarting processing with {workers} threads...")
+            elif args.engine == 'hybrid':
+                print(f"\nStarting processing with {workers} processes of {args.threads} threads...")
+            else:
+                print(f"\nStarting processing with {workers} processes...")
+            if args.compression == AUTO_COMPRESSION:
+                candidates = ', '.join(args.auto_candidates or DEFAULT_CANDIDATES)
+                print(f"Compression: auto ({args.objective} of {candidates}, {args.auto_samples} sample frame(s) "
+                      f"per sequence)")
+            else:
+                print(f"Compression: {args.compression}")
+            if args.layout == 'multipart':
+                print(f"Layout: multipart (matte part compression: {args.matte_compression or args.compression})")
+                if args.crop_mattes:
+                    print("Crop mattes: YES (matte part cropped to non-zero pixels)")
+            print(f"Matte channel: {args.matte_channel} ({args.matte_pixel_type})")
+            if args.streaming:
+                print(f"Streaming: YES ({args.block_lines} scanlines per block)")
+            if args.pipeline:
+                print(f"Pipeline: YES (prefetch {args.prefetch}, write-behind {args.write_behind} frames per worker)")
+            if options['resume']:
+                print(f"Resume: YES ({options['fingerprint']} fingerprints)")
+            if args.max_memory:
+                print(f"Memory budget: {args.max_memory / 1024 ** 2:.0f} MB")
+            if args.output_root:
+                print(f"Output root: {args.output_root}")
+            if args.verify:
+                print("Verify: YES (outputs compared with write checksums)")
+            if args.work_queue:
+                print(f"Work queue: {args.work_queue} (node {options['node_id']}, lease TTL {args.lease_ttl:g}s)")
             if args.replace_originals:
                 print("Replace originals: YES (originals will be moved to trash)")
             print()
@@ -247,11 +800,13 @@ Examples:
                 scan_results,
                 args.compression,
                 args.matte_channel,
-                args.processes,
+                num_processes,
                 progress_queue,
                 result_queue,
                 stop_event,
-                args.replace_originals
+                args.replace_originals,
+                options,
+                self.events
             )
         )
         
@@ -267,7 +822,8 @@ Examples:
                         progress_tracker.update(
                             processed=processed,
                             status1=progress_data.get('status1', ''),
-                            status2=progress_data.get('status2', '')
+                            status2=progress_data.get('status2', ''),
+                            workers=progress_data.get('workers')
                         )
             except queue.Empty:
                 continue
@@ -282,6 +838,41 @@ Examples:
             print("\nError: No result returned from processing")
             return False
             
+        if result.get('skipped_files') and not args.quiet:
+            print(f"\nSkipped {result['skipped_files']} up-to-date file(s)")
+            
+        if result.get('report'):
+            if result['report']['run'].get('workers') and not args.quiet:
+                print(f"\nWorkers chosen by autoscaling: {result['report']['run']['workers']}")
+            if result['report']['run'].get('compression') and not args.quiet:
+                print("\nCompression chosen per sequence:")
+                for base_folder, choice in result['report']['run']['compression']['sequences'].items():
+                    print(f"  {os.path.basename(base_folder)}: {choice['compression']}")
+            if result['report']['run'].get('work_queue') and not args.quiet:
+                work_queue = result['report']['run']['work_queue']
+                print(f"\nWork queue: {result['report']['run']['frames']} file(s) processed by this node, "
+                      f"{work_queue['done_elsewhere']} by others, {work_queue['reclaimed']} taken over from "
+                      f"expired leases")
+            if result['report']['run'].get('verification') and not args.quiet:
+                verification = result['report']['run']['verification']
+                print(f"\nVerified {verification['frames']} file(s), {verification['failed']} failed")
+            if args.verbose and result['report']['run']['frames']:
+                print("\nStage timings:")
+                for line in format_stage_summary(result['report']):
+                    print(f"  {line}")
+            if args.report:
+                try:
+                    write_report(result['report'], args.report)
+                    if not args.quiet:
+                        print(f"Run report written to {args.report}")
+                except OSError as e:
+                    print(f"\nError writing run report: {e}", file=sys.stderr)
+                    
+        if not args.quiet:
+            for path in [args.profile, args.profile_collapsed]:
+                if path and os.path.exists(path):
+                    print(f"Profile written to {path}")
+            
         # Handle results
         if result.get('error'):
             print(f"\nError during processing: {result.get('error_message', 'Unknown error')}")
@@ -307,6 +898,46 @@ Examples:
                     print(f"\n✓ All files processed successfully!")
             return True
     
+    def run_watch(self, args):
+        """Embed frames as they land until interrupted"""
+        progress_queue = queue.Queue()
+        stop_event = threading.Event()
+        num_processes = os.cpu_count() if args.processes == 'auto' else args.processes
+        watch_thread = threading.Thread(
+            target=self.processor.watch_folder,
+            args=(args.folder_path, args.compression, args.matte_channel, num_processes, progress_queue,
+                  stop_event, self.get_processing_options(args), args.settle, args.poll, args.prune,
+                  args.scan_threads, self.events)
+        )
+        watch_thread.start()
+        failed = False
+        try:
+            while watch_thread.is_alive():
+                try:
+                    progress_data = progress_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                summary = progress_data.get('watch')
+                if summary is None:
+                    if not args.quiet:
+                        print(f"\n{progress_data['status1']} ({progress_data['status2']}), press Ctrl+C to stop")
+                    continue
+                failed = failed or bool(summary['error_files'])
+                if not args.quiet:
+                    print(f"{time.strftime('%H:%M:%S')} {progress_data['status1']} "
+                          f"in {summary['seconds']:.1f}s")
+                for warning in summary['warnings']:
+                    print(f"  ⚠ {warning}")
+                for file, error in summary['error_files']:
+                    print(f"  ✗ {file}: {error}")
+        except KeyboardInterrupt:
+            if not args.quiet:
+                print("\nStopping watch...")
+        finally:
+            stop_event.set()
+            watch_thread.join()
+        return 1 if failed else 0
+    
     def run(self, args=None):
         """Main CLI entry point"""
         parser = self.create_parser()
@@ -320,15 +951,56 @@ Examples:
                 print(f"  {error}", file=sys.stderr)
             return 1
             
+        if not args.events:
+            return self.run_command(args)
+        try:
+            events_file = open(args.events_file, 'a') if args.events_file else sys.stdout
+        except OSError as e:
+            print(f"Error opening events file: {e}", file=sys.stderr)
+            return 1
+        self.events = EventStream(JsonLinesSink(events_file), args.events_interval)
         try:
-            # Run scan
-            scan_results = self.run_scan(args.folder_path, args.quiet)
+            if events_file is sys.stdout:
+                # Standard output only carries the events, so they can be piped to a collector
+                with contextlib.redirect_stdout(sys.stderr):
+                    return self.run_command(args)
+            return self.run_command(args)
+        finally:
+            self.events.flush()
+            if events_file is not sys.stdout:
+                events_file.close()
+    
+    def run_command(self, args):
+        """Scan or load a plan, then process, with validated arguments"""
+        try:
+            if args.plan:
+                if not args.quiet:
+                    print(f"Loading plan: {args.plan}")
+                scan_results = load_plan(args.plan)
+            else:
+                # A plan is loaded on other machines, so it records absolute paths
+                folder_path = os.path.abspath(args.folder_path) if args.save_plan else args.folder_path
+                scan_results = self.run_scan(folder_path, args.quiet, args.rescan,
+                                             args.scan_threads, args.prune, args.frame_policy)
+                if args.verbose:
+                    stats = scan_results['scan_stats']
+                    print(f"Scan index: {stats['listed']} folder(s) listed, {stats['cached']} reused from cache")
+                if args.save_plan:
+                    # Frame sizes are stored so nodes sharding the plan do not read them again
+                    for pair in scan_results['pairs']:
+                        self.processor.estimate_frame_bytes(pair)
+                    save_plan(args.save_plan, scan_results, folder_path, args.frame_policy)
+                    if not args.quiet:
+                        print(f"Plan saved: {args.save_plan}")
+            
+            if args.frames or args.shard:
+                self.select_frames(scan_results, args.frames, args.shard, args.quiet)
             
             # Print scan results
             self.print_scan_results(scan_results, args.quiet)
             
             # Check if we found anything
-            if scan_results['total_sequences'] == 0:
+            if scan_results['total_sequences'] == 0 and not args.watch:
                 if not args.quiet:
                     print("No matching EXR sequences found.")
                 return 0
@@ -341,6 +1013,8 @@ Examples:
                 
             # Run processing
             success = self.run_processing(args, scan_results)
+            if args.watch:
+                return self.run_watch(args)
             return 0 if success else 1
             
         except KeyboardInterrupt:
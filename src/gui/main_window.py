@@ -9,27 +9,38 @@ import threading
 import queue
 import multiprocessing
 from ..utils.config import Config
+from ..utils.scan_index import ScanIndex
+from ..processing.executors import ENGINES, DEFAULT_ENGINE
+from ..processing.report import format_stage_summary
+from ..processing.compression_choice import AUTO_COMPRESSION
 import time, sys, os
 
 class ScanWorker(QThread):
     scanCompleted = Signal(dict)
     
-    def __init__(self, processor, folder_path):
+    def __init__(self, processor, folder_path, config_dir, frame_policy='strict'):
         super().__init__()
         self.processor = processor
         self.folder_path = folder_path
+        self.config_dir = config_dir
+        self.frame_policy = frame_policy
     
     def run(self):
         try:
-            # Scan using the new flexible approach
-            pairs, warnings = self.processor.find_matching_pairs(self.folder_path)
+            # Scan using the cached index so only changed folders are re-listed
+            scan_index = ScanIndex(self.folder_path, self.config_dir,
+                                   frame_parser=self.processor.extract_frame_numbers).load()
+            pairs, warnings = self.processor.find_matching_pairs(self.folder_path, scan_index,
+                                                                 frame_policy=self.frame_policy)
+            scan_index.save()
             
             # Combine results
             scan_results = {
                 'pairs': pairs,
                 'warnings': warnings,
                 'total_sequences': len(pairs),
-                'total_files': sum(len(pair['base_files']) for pair in pairs)
+                'total_files': sum(len(pair['base_files']) for pair in pairs),
+                'scan_stats': scan_index.get_stats()
             }
             
             self.scanCompleted.emit(scan_results)
@@ -85,6 +96,9 @@ class EXRProcessorGUI(QMainWindow):
         self.scan_results = None
         self.last_folder_from_config = ""  # Initialize before loading config
         self.replace_originals = False
+        self.verify = False
+        self.frame_policy = 'strict'
+        self.engine = DEFAULT_ENGINE
 
         # Progress tracking variables
         self.progress_queue = queue.Queue()
@@ -127,6 +141,12 @@ class EXRProcessorGUI(QMainWindow):
         self.compression = config_data.get('compression', 'piz')
         # Store the replace originals setting
         self.replace_originals = config_data.get('replace_originals', False)
+        # Store the output verification setting
+        self.verify = config_data.get('verify', False)
+        # Store the frame matching policy used when scanning
+        self.frame_policy = config_data.get('frame_policy', 'strict')
+        # Store the execution engine setting
+        self.engine = config_data.get('engine', DEFAULT_ENGINE)
 
     def apply_saved_config(self):
         """Apply the saved configuration after UI elements are created"""
@@ -144,6 +164,15 @@ class EXRProcessorGUI(QMainWindow):
         # Apply saved replace originals setting
         self.replace_originals_checkbox.setChecked(self.replace_originals)
 
+        # Apply saved output verification setting
+        self.verify_checkbox.setChecked(self.verify)
+
+        # Apply saved frame policy setting
+        self.common_frames_checkbox.setChecked(self.frame_policy == 'intersection')
+
+        # Apply saved engine setting
+        self.engine_combo.setCurrentText(self.engine)
+
     def on_compression_changed(self):
         """Called when compression setting changes - save to config"""
         self.save_config()
@@ -152,15 +181,29 @@ class EXRProcessorGUI(QMainWindow):
         """Called when replace originals setting changes - save to config"""
         self.save_config()
 
+    def on_verify_changed(self):
+        """Called when output verification setting changes - save to config"""
+        self.save_config()
+
+    def on_frame_policy_changed(self):
+        """Called when frame policy setting changes - save to config"""
+        self.save_config()
+
     def save_config(self):
         config_data = {
             'matte_channel_name': self.matte_channel_name_edit.text(),
             'last_folder_path': self.folder_path,
             'compression': self.compression_combo.currentText(),
-            'replace_originals': self.replace_originals_checkbox.isChecked()
+            'replace_originals': self.replace_originals_checkbox.isChecked(),
+            'verify': self.verify_checkbox.isChecked(),
+            'frame_policy': self.get_frame_policy(),
+            'engine': self.engine_combo.currentText()
         }
         self.config.save(config_data)
 
+    def get_frame_policy(self):
+        return 'intersection' if self.common_frames_checkbox.isChecked() else 'strict'
+
     def create_control_panel(self):
         # Create left panel for controls
         control_widget = QWidget()
@@ -205,7 +248,7 @@ class EXRProcessorGUI(QMainWindow):
         compression_label = QLabel("Compression:")
         self.compression_combo = QComboBox()
         self.compression_combo.setMinimumWidth(150)
-        self.compression_combo.addItems(self.processor.COMPRESSION_OPTIONS)
+        self.compression_combo.addItems(self.processor.COMPRESSION_OPTIONS + [AUTO_COMPRESSION])
         self.compression_combo.setCurrentText(self.compression)
         self.compression_combo.currentTextChanged.connect(self.on_compression_changed)
         compression_layout.addWidget(compression_label)
@@ -228,13 +271,36 @@ class EXRProcessorGUI(QMainWindow):
         process_label = QLabel("Number of Processes:")
         self.process_spinbox = QSpinBox()
         self.process_spinbox.setMinimumWidth(70)
-        self.process_spinbox.setRange(1, multiprocessing.cpu_count())
+        # 0 shows as Auto: the number of busy workers follows the measured throughput
+        self.process_spinbox.setRange(0, multiprocessing.cpu_count())
+        self.process_spinbox.setSpecialValueText("Auto")
         self.process_spinbox.setValue(self.num_processes)
+        self.process_spinbox.setToolTip(
+            "Auto starts with one worker and adds workers while files per second improves"
+        )
         process_layout.addWidget(process_label)
         process_layout.addWidget(self.process_spinbox)
         process_layout.addStretch()
         options_layout.addLayout(process_layout)
 
+        # Execution engine
+        engine_layout = QHBoxLayout()
+        engine_label = QLabel("Engine:")
+        self.engine_combo = QComboBox()
+        self.engine_combo.setMinimumWidth(150)
+        self.engine_combo.addItems(ENGINES)
+        self.engine_combo.setCurrentText(self.engine)
+        self.engine_combo.currentTextChanged.connect(self.save_config)
+        self.engine_combo.setToolTip(
+            "process: one process per worker\n"
+            "thread: worker threads in one process, avoiding process startup and pickling\n"
+            "hybrid: processes running two threads each"
+        )
+        engine_layout.addWidget(engine_label)
+        engine_layout.addWidget(self.engine_combo)
+        engine_layout.addStretch()
+        options_layout.addLayout(engine_layout)
+
         # Replace Originals checkbox
         self.replace_originals_checkbox = QCheckBox("Replace Originals (move to trash)")
         self.replace_originals_checkbox.setChecked(self.replace_originals)
@@ -245,6 +311,26 @@ class EXRProcessorGUI(QMainWindow):
         )
         options_layout.addWidget(self.replace_originals_checkbox)
 
+        # Verify outputs checkbox
+        self.verify_checkbox = QCheckBox("Verify Outputs")
+        self.verify_checkbox.setChecked(self.verify)
+        self.verify_checkbox.stateChanged.connect(self.on_verify_changed)
+        self.verify_checkbox.setToolTip(
+            "When enabled, every embedded frame is read back and compared with checksums\n"
+            "taken while writing it. Originals of sequences that fail are not replaced."
+        )
+        options_layout.addWidget(self.verify_checkbox)
+
+        # Frame policy checkbox
+        self.common_frames_checkbox = QCheckBox("Process Frames Present in All Mattes")
+        self.common_frames_checkbox.setChecked(self.frame_policy == 'intersection')
+        self.common_frames_checkbox.stateChanged.connect(self.on_frame_policy_changed)
+        self.common_frames_checkbox.setToolTip(
+            "When enabled, sequences with missing or extra matte frames are kept and only\n"
+            "the frames present in every channel are processed. Rescan after changing."
+        )
+        options_layout.addWidget(self.common_frames_checkbox)
+
         control_layout.addWidget(options_group)
 
         # Process Button
@@ -343,7 +429,8 @@ class EXRProcessorGUI(QMainWindow):
         self.progress_bar.setValue(0)
         
         # Start scan worker
-        self.scan_worker = ScanWorker(self.processor, self.folder_path)
+        self.scan_worker = ScanWorker(self.processor, self.folder_path, self.config.config_dir,
+                                      self.get_frame_policy())
         self.scan_worker.scanCompleted.connect(self.scan_completed)
         self.scan_worker.start()
 
@@ -457,15 +544,21 @@ class EXRProcessorGUI(QMainWindow):
         self.stop_event.clear()
         self.start_time = time.time()
         
+        autoscale = self.process_spinbox.value() == 0
         processing_args = {
             'scan_results': self.scan_results,
             'compression': self.compression_combo.currentText(),
             'matte_channel_name': self.matte_channel_name_edit.text(),
-            'num_processes': self.process_spinbox.value(),
+            'num_processes': multiprocessing.cpu_count() if autoscale else self.process_spinbox.value(),
             'progress_queue': self.progress_queue,
             'result_queue': self.result_queue,
             'stop_event': self.stop_event,
-            'replace_originals': self.replace_originals_checkbox.isChecked()
+            'replace_originals': self.replace_originals_checkbox.isChecked(),
+            'options': {
+                'engine': self.engine_combo.currentText(),
+                'autoscale': autoscale,
+                'verify': self.verify_checkbox.isChecked()
+            }
         }
         
         self.worker = ProcessingWorker(self.processor, processing_args)
@@ -487,6 +580,24 @@ class EXRProcessorGUI(QMainWindow):
         except queue.Empty:
             pass
 
+    def get_report_text(self, result):
+        """Stage timings of the run report for the completion dialogs"""
+        report = result.get('report')
+        if not report or not report['run']['frames']:
+            return ""
+        text = "\n\nStage timings:\n" + "\n".join(format_stage_summary(report))
+        if report['run'].get('workers'):
+            text += f"\n\nWorkers chosen by autoscaling: {report['run']['workers']}"
+        if report['run'].get('compression'):
+            text += "\n\nCompression chosen per sequence:\n" + "\n".join(
+                f"{os.path.basename(base_folder)}: {choice['compression']}"
+                for base_folder, choice in report['run']['compression']['sequences'].items()
+            )
+        if report['run'].get('verification'):
+            verification = report['run']['verification']
+            text += f"\n\nVerified {verification['frames']} frame(s), {verification['failed']} failed"
+        return text
+
     def processing_finished(self):
         self.progress_timer.stop()
         self.process_button.setEnabled(True)
@@ -513,7 +624,7 @@ class EXRProcessorGUI(QMainWindow):
                 QMessageBox.warning(
                     self,
                     status_message,
-                    result['error_message']
+                    result['error_message'] + self.get_report_text(result)
                 )
             else:
                 # Success case
@@ -524,6 +635,7 @@ class EXRProcessorGUI(QMainWindow):
                         message += f"\n\n{processed_count} sequence(s) replaced."
                 else:
                     message = "All files processed successfully."
+                message += self.get_report_text(result)
                 
                 QMessageBox.information(
                     self,
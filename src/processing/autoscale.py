@@ -0,0 +1,95 @@
+"""
+Adaptive number of active workers
+The pool is started with the maximum number of workers, and the autoscaler
+decides how many of them get work. It starts with one, measures files/s and CPU
+utilisation over a window of completed batches, and keeps adding workers while
+throughput improves. When it stops improving the last step is undone and the
+count is kept until throughput drops, which starts a new search up or down.
+"""
+import os
+import time
+
+# A window closes once it has lasted this long and seen WINDOW_BATCHES per active worker
+WINDOW_SECONDS = 1.0
+WINDOW_BATCHES = 2
+# Relative files/s change treated as a real improvement or drop rather than noise
+THRESHOLD = 0.05
+# Above this CPU utilisation per worker, workers beyond the core count only contend
+SATURATED_UTILISATION = 0.9
+
+
+class WorkerAutoscaler:
+    """Hill-climbs the number of active workers on measured throughput"""
+
+    def __init__(self, max_workers, start_workers=1, cpu_count=None):
+        self.max_workers = max(max_workers, 1)
+        self.active = min(max(start_workers, 1), self.max_workers)
+        self.cpu_count = cpu_count or os.cpu_count() or 1
+        self.direction = 1
+        self.settled = False
+        self.previous_rate = None
+        self.settled_rate = None
+        self.history = []
+        self.start_window()
+
+    def start_window(self):
+        self.window_start = time.perf_counter()
+        self.window_frames = 0
+        self.window_batches = 0
+        self.window_cpu_seconds = 0.0
+
+    def record(self, frames, cpu_seconds):
+        """Record a completed batch, returning True when the active count changed"""
+        self.window_frames += frames
+        self.window_batches += 1
+        self.window_cpu_seconds += cpu_seconds
+        elapsed = time.perf_counter() - self.window_start
+        if elapsed < WINDOW_SECONDS or self.window_batches < WINDOW_BATCHES * self.active:
+            return False
+
+        rate = self.window_frames / elapsed
+        utilisation = self.window_cpu_seconds / (elapsed * self.active)
+        self.history.append({
+            'workers': self.active,
+            'files_per_second': round(rate, 3),
+            'cpu_utilisation': round(utilisation, 3)
+        })
+        self.start_window()
+        return self.adjust(rate, utilisation)
+
+    def adjust(self, rate, utilisation):
+        """Choose the active count for the next window from the last one's measurements"""
+        previous_active = self.active
+        if self.settled:
+            if rate < self.settled_rate * (1 - THRESHOLD):
+                # Throughput fell (slower storage, heavier frames): search again from here,
+                # adding workers while they have CPU to spare and removing them otherwise
+                self.settled = False
+                self.previous_rate = rate
+                self.direction = 1 if utilisation < SATURATED_UTILISATION else -1
+                if not self.step(utilisation):
+                    self.settle(rate)
+        elif self.previous_rate is None or rate > self.previous_rate * (1 + THRESHOLD):
+            self.previous_rate = rate
+            if not self.step(utilisation):
+                self.settle(rate)
+        else:
+            # The last step did not help, so undo it
+            self.active -= self.direction
+            self.settle(self.previous_rate)
+        return self.active != previous_active
+
+    def step(self, utilisation):
+        """Add or remove a worker in the search direction, returning False at a limit"""
+        if self.direction > 0:
+            saturated = self.active >= self.cpu_count and utilisation > SATURATED_UTILISATION
+            if self.active >= self.max_workers or saturated:
+                return False
+        elif self.active <= 1:
+            return False
+        self.active += self.direction
+        return True
+
+    def settle(self, rate):
+        self.settled = True
+        self.settled_rate = rate
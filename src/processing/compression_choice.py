@@ -0,0 +1,48 @@
+"""
+Automatic compression selection from sample frames
+A few frames of each sequence are encoded with every candidate compression,
+and the one that best meets the objective is used for the whole sequence:
+'fastest' the lowest encode time, 'smallest' the fewest bytes, and 'balanced'
+the lowest product of the two, so halving either counts the same.
+"""
+
+AUTO_COMPRESSION = 'auto'
+OBJECTIVES = ['balanced', 'fastest', 'smallest']
+DEFAULT_OBJECTIVE = 'balanced'
+# Lossless candidates; lossy ones such as dwaa or b44 are only tried when asked for
+DEFAULT_CANDIDATES = ['rle', 'zips', 'zip', 'piz']
+DEFAULT_SAMPLE_FRAMES = 2
+
+
+def pick_sample_frames(frames, count=DEFAULT_SAMPLE_FRAMES):
+    """Up to count frames spread evenly over a sequence, its first and last included"""
+    if count >= len(frames):
+        return list(frames)
+    if count == 1:
+        return [frames[len(frames) // 2]]
+    return [frames[round(i * (len(frames) - 1) / (count - 1))] for i in range(count)]
+
+
+def score(measurement, objective):
+    if objective == 'fastest':
+        return measurement['seconds']
+    if objective == 'smallest':
+        return measurement['bytes']
+    return measurement['seconds'] * measurement['bytes']
+
+
+def choose_compression(measurements, objective=DEFAULT_OBJECTIVE):
+    """Compression with the best score among {compression: {'seconds', 'bytes'}}
+
+    Ties go to the compression measured first.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown compression objective: {objective}")
+    return min(measurements, key=lambda compression: score(measurements[compression], objective))
+
+
+def add_measurement(totals, compression, seconds, size):
+    """Add one sample frame's encode time and size to the totals of a compression"""
+    total = totals.setdefault(compression, {'seconds': 0.0, 'bytes': 0})
+    total['seconds'] += seconds
+    total['bytes'] += size
@@ -0,0 +1,143 @@
+"""
+Structured events of a run for monitoring
+Scans and runs emit typed events alongside the progress dicts the GUI and CLI
+display. Frame and progress events are held and delivered together at most
+every interval seconds, so fast sequences do not flood the consumer; every other
+event is delivered at once. JsonLinesSink writes them one JSON object per line.
+"""
+import json
+import time
+
+# Seconds between deliveries of frame and progress events
+DEFAULT_EVENT_INTERVAL = 1.0
+
+# Formats of the CLI's --events output
+EVENT_FORMATS = ['jsonl']
+
+
+class Event:
+    """One event, written as a dict of its type, the time it happened and its fields"""
+    type = 'event'
+    # Frame and progress events are delivered together at the throttled rate
+    throttled = False
+
+    def __init__(self, **fields):
+        self.time = time.time()
+        self.fields = fields
+
+    def to_dict(self):
+        return {'event': self.type, 'time': round(self.time, 3), **self.fields}
+
+
+class ScanStarted(Event):
+    type = 'scan_started'
+
+    def __init__(self, root):
+        super().__init__(root=root)
+
+
+class ScanFinished(Event):
+    type = 'scan_finished'
+
+    def __init__(self, sequences, files, warnings):
+        super().__init__(sequences=sequences, files=files, warnings=warnings)
+
+
+class RunStarted(Event):
+    type = 'run_started'
+
+    def __init__(self, sequences, files, skipped, workers, engine, compression):
+        super().__init__(sequences=sequences, files=files, skipped=skipped, workers=workers, engine=engine,
+                         compression=compression)
+
+
+class FrameDone(Event):
+    type = 'frame_done'
+    throttled = True
+
+    def __init__(self, sequence, frame, timings):
+        timings = timings or {}
+        super().__init__(sequence=sequence, frame=frame, seconds=round(sum(timings.values()), 4),
+                         stages={name: round(seconds, 4) for name, seconds in timings.items()})
+
+
+class FrameFailed(Event):
+    type = 'frame_failed'
+
+    def __init__(self, sequence, frame, error):
+        super().__init__(sequence=sequence, frame=frame, error=error)
+
+
+class SequenceDone(Event):
+    type = 'sequence_done'
+
+    def __init__(self, sequence, frames, errors, frame_seconds):
+        super().__init__(sequence=sequence, frames=frames, errors=errors, frame_seconds=round(frame_seconds, 4))
+
+
+class Progress(Event):
+    type = 'progress'
+    throttled = True
+
+    def __init__(self, processed, total, elapsed, files_per_second, remaining, workers=None):
+        super().__init__(processed=processed, total=total, elapsed=round(elapsed, 3),
+                         files_per_second=round(files_per_second, 3), remaining=round(remaining, 3),
+                         workers=workers)
+
+
+class RunSummary(Event):
+    type = 'run_summary'
+
+    def __init__(self, success, run, error_files, warnings):
+        super().__init__(success=success, run=run, errors=len(error_files), warnings=warnings)
+
+
+class EventStream:
+    """Delivers events to a sink, throttling frame and progress events
+
+    Held frame events are delivered before the next event that is not throttled, so
+    the order events happened in is kept. Only the latest held progress event is
+    delivered. Without a sink, events are dropped.
+    """
+
+    def __init__(self, sink=None, interval=DEFAULT_EVENT_INTERVAL):
+        self.sink = sink
+        self.interval = interval
+        self.held = []
+        self.progress = None
+        self.last_delivery = 0
+
+    def emit(self, event):
+        if self.sink is None:
+            return
+        if not event.throttled:
+            self.flush([event])
+            return
+        if isinstance(event, Progress):
+            self.progress = event
+        else:
+            self.held.append(event)
+        if time.monotonic() - self.last_delivery >= self.interval:
+            self.flush()
+
+    def flush(self, events=()):
+        """Deliver the held events, followed by events"""
+        if self.sink is None:
+            return
+        delivered = self.held + ([self.progress] if self.progress is not None else []) + list(events)
+        self.held = []
+        self.progress = None
+        self.last_delivery = time.monotonic()
+        if delivered:
+            self.sink.send(delivered)
+
+
+class JsonLinesSink:
+    """Writes events to a text stream as JSON lines, flushing after each delivery"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def send(self, events):
+        self.stream.write(''.join(json.dumps(event.to_dict()) + '\n' for event in events))
+        self.stream.flush()
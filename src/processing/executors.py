@@ -0,0 +1,161 @@
+"""
+Execution backends for processing batches
+'process' runs each worker in its own process, 'thread' runs workers as threads
+of this process (OpenEXR can release the GIL while decoding and encoding), and
+'hybrid' runs a process pool whose workers each run several threads.
+"""
+import sys
+import queue
+import itertools
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+from functools import partial
+
+ENGINES = ['process', 'thread', 'hybrid']
+DEFAULT_ENGINE = 'process'
+DEFAULT_HYBRID_THREADS = 2
+
+# Thread pool of a hybrid worker process, set by init_hybrid_worker
+_worker_threads = None
+
+
+def get_process_context():
+    """Multiprocessing context for process pools"""
+    if sys.platform == 'win32':
+        return multiprocessing.get_context('spawn')
+    return multiprocessing
+
+
+def init_hybrid_worker(threads, initializer, initargs):
+    """Process pool initializer starting the worker's thread pool"""
+    global _worker_threads
+    _worker_threads = ThreadPool(threads)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def group_items(items, size):
+    """Group (item, cost) pairs into ([items], summed cost) tasks of up to size items"""
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield [item for item, _ in chunk], sum(cost for _, cost in chunk)
+
+
+def run_threaded(func, items):
+    """Run func over items on the worker's thread pool"""
+    return _worker_threads.map(func, items)
+
+
+class PoolExecutor:
+    """Runs tasks on a process, thread or hybrid pool with a common imap_unordered interface
+
+    num_workers is the number of processes (process, hybrid) or threads (thread).
+    Hybrid workers each run threads_per_process threads, and are handed that many
+    tasks at a time.
+    """
+
+    def __init__(self, engine=DEFAULT_ENGINE, num_workers=1, initializer=None, initargs=(),
+                 threads_per_process=DEFAULT_HYBRID_THREADS):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        self.engine = engine
+        self.num_workers = max(num_workers, 1)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.threads_per_process = max(threads_per_process, 1) if engine == 'hybrid' else 1
+        self.pool = None
+        # Highest summed cost of the tasks in flight during imap_limited
+        self.peak_cost = 0
+
+    @property
+    def concurrency(self):
+        """Number of tasks running at once"""
+        return self.num_workers * self.threads_per_process
+
+    def __enter__(self):
+        if self.engine == 'thread':
+            self.pool = ThreadPool(self.num_workers, self.initializer, self.initargs)
+        elif self.engine == 'hybrid':
+            self.pool = get_process_context().Pool(
+                self.num_workers, init_hybrid_worker,
+                (self.threads_per_process, self.initializer, self.initargs)
+            )
+        else:
+            self.pool = get_process_context().Pool(self.num_workers, self.initializer, self.initargs)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.pool.terminate()
+        self.pool.join()
+        self.pool = None
+
+    def imap_unordered(self, func, iterable):
+        """Yield func(item) for each item as results complete
+
+        func must be a module-level function for the process and hybrid engines.
+        """
+        if self.engine != 'hybrid':
+            yield from self.pool.imap_unordered(func, iterable)
+            return
+
+        items = list(iterable)
+        groups = [items[i:i + self.threads_per_process] for i in range(0, len(items), self.threads_per_process)]
+        for results in self.pool.imap_unordered(partial(run_threaded, func), groups):
+            yield from results
+
+    def imap_limited(self, func, iterable, limit=None, costs=None, budget=None):
+        """Yield func(item) for each item as results complete, admitting items in order
+
+        An item is submitted while fewer than limit() tasks are in flight and, with costs
+        (one per item) and budget, while the summed cost of the items in flight stays within
+        budget. An item over the budget on its own runs once nothing else is in flight.
+        limit is called before each submission, so the number of busy workers can change
+        while the pool keeps running. Hybrid workers take threads_per_process items per task.
+        iterable and costs are read lazily, one item ahead of the submitted ones.
+        """
+        items = iter(zip(iterable, costs if costs is not None else itertools.repeat(0)))
+        if self.engine == 'hybrid':
+            tasks = group_items(items, self.threads_per_process)
+            task_func = partial(run_threaded, func)
+        else:
+            tasks = items
+            task_func = func
+
+        completed = queue.Queue()
+        in_flight = 0
+        in_flight_cost = 0
+        self.peak_cost = 0
+        next_task = None
+        while True:
+            while in_flight < max(limit() if limit else self.num_workers, 1):
+                # Items are taken from the iterable only once a worker can start them
+                if next_task is None:
+                    next_task = next(tasks, None)
+                    if next_task is None:
+                        break
+                task, task_cost = next_task
+                if in_flight and budget and in_flight_cost + task_cost > budget:
+                    break
+                next_task = None
+                self.pool.apply_async(
+                    task_func, (task,),
+                    callback=lambda result, cost=task_cost: completed.put((True, result, cost)),
+                    error_callback=lambda error, cost=task_cost: completed.put((False, error, cost))
+                )
+                in_flight += 1
+                in_flight_cost += task_cost
+                self.peak_cost = max(self.peak_cost, in_flight_cost)
+            if not in_flight:
+                return
+
+            success, result, released_cost = completed.get()
+            in_flight -= 1
+            in_flight_cost -= released_cost
+            if not success:
+                raise result
+            if self.engine == 'hybrid':
+                yield from result
+            else:
+                yield result
@@ -0,0 +1,357 @@
+"""
+Low level access to the OpenEXR file layout
+Reads headers and chunk offset tables so compressed chunks can be copied between
+files without decoding them, and assembles multi-part files from single-part ones.
+"""
+import io
+import struct
+
+MAGIC = 20000630
+VERSION = 2
+
+# Flags stored in the version field
+TILED_FLAG = 0x200
+LONG_NAMES_FLAG = 0x400
+NON_IMAGE_FLAG = 0x800
+MULTI_PART_FLAG = 0x1000
+
+# Scanlines per chunk for each compression value stored in the header
+SCANLINES_PER_CHUNK = {
+    0: 1,     # none
+    1: 1,     # rle
+    2: 1,     # zips
+    3: 16,    # zip
+    4: 32,    # piz
+    5: 16,    # pxr24
+    6: 32,    # b44
+    7: 32,    # b44a
+    8: 32,    # dwaa
+    9: 256    # dwab
+}
+
+# Bytes per pixel of the UINT, HALF and FLOAT pixel types
+PIXEL_TYPE_SIZES = {0: 4, 1: 2, 2: 4}
+
+# Compressions whose chunks can keep their size when the pixels change: none and b44
+# always, and b44a whenever no 4x4 block is flat before and after
+FIXED_SIZE_COMPRESSIONS = {0, 6, 7}
+
+# Attributes rewritten for every part of a multi-part file
+PART_ATTRIBUTES = ('name', 'type', 'chunkCount')
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def read_null_terminated(f):
+    """Read a null terminated string from a binary file"""
+    value = bytearray()
+    while True:
+        char = f.read(1)
+        if not char:
+            raise ValueError("Unexpected end of file in header")
+        if char == b'\0':
+            return bytes(value)
+        value += char
+
+
+def read_attributes(f):
+    """Read one header as a list of (name, type, raw value) tuples"""
+    attributes = []
+    while True:
+        name = read_null_terminated(f)
+        if not name:
+            return attributes
+        attribute_type = read_null_terminated(f)
+        size, = struct.unpack('<i', f.read(4))
+        value = f.read(size)
+        if len(value) != size:
+            raise ValueError("Unexpected end of file in header")
+        attributes.append((name.decode(), attribute_type.decode(), value))
+
+
+def open_source(path, data=None):
+    """Open a file for reading, or its contents when they are already in memory"""
+    if data is not None:
+        return io.BytesIO(data)
+    return open(path, 'rb')
+
+
+def read_layout(path, data=None):
+    """Read the header and chunk offsets of a single-part scanline EXR
+
+    data is the contents of the file when it has already been read. Raises
+    ValueError for files whose chunks cannot be copied as they are (tiled, deep or
+    multi-part files, or files with an incomplete offset table).
+    """
+    with open_source(path, data) as f:
+        magic, version = struct.unpack('<ii', f.read(8))
+        if magic != MAGIC:
+            raise ValueError(f"Not an OpenEXR file: {path}")
+        if version & (TILED_FLAG | NON_IMAGE_FLAG | MULTI_PART_FLAG):
+            raise ValueError(f"Only single-part scanline files can be copied: {path}")
+
+        attributes = read_attributes(f)
+        values = {name: value for name, _, value in attributes}
+        x_min, y_min, x_max, y_max = struct.unpack('<iiii', values['dataWindow'])
+        compression = values['compression'][0]
+        if compression not in SCANLINES_PER_CHUNK:
+            raise ValueError(f"Unsupported compression {compression} in {path}")
+
+        lines_per_chunk = SCANLINES_PER_CHUNK[compression]
+        chunk_count = -(-(y_max - y_min + 1) // lines_per_chunk)
+        offsets = struct.unpack(f'<{chunk_count}Q', f.read(8 * chunk_count))
+        if 0 in offsets:
+            raise ValueError(f"Incomplete offset table in {path}")
+
+        # Chunk sizes are needed up front to build the new offset table
+        chunk_sizes = []
+        for offset in offsets:
+            f.seek(offset)
+            _, data_size = struct.unpack('<ii', f.read(8))
+            chunk_sizes.append(8 + data_size)
+
+    return {
+        'path': path,
+        'data': data,
+        'version': version,
+        'attributes': attributes,
+        'data_window': (x_min, y_min, x_max, y_max),
+        'compression': compression,
+        'offsets': offsets,
+        'chunk_sizes': chunk_sizes
+    }
+
+
+def read_channel_list(value):
+    """(name, pixel type, x sampling, y sampling) of each channel in a chlist attribute"""
+    channels = []
+    f = io.BytesIO(value)
+    while True:
+        name = read_null_terminated(f)
+        if not name:
+            return channels
+        pixel_type, _, x_sampling, y_sampling = struct.unpack('<iB3xii', f.read(16))
+        channels.append((name.decode(), pixel_type, x_sampling, y_sampling))
+
+
+def has_raw_chunks(f, values, offsets, multi_part):
+    """Check whether any chunk of a scanline part is stored uncompressed
+
+    OpenEXR keeps a chunk as it is when compressing does not make it smaller, as
+    happens with noisy FLOAT data, so its size is the same whatever its pixels are.
+    """
+    x_min, y_min, x_max, y_max = struct.unpack('<iiii', values['dataWindow'])
+    channels = read_channel_list(values['channels'])
+    if any(x_sampling != 1 or y_sampling != 1 for _, _, x_sampling, y_sampling in channels):
+        # The raw size of subsampled lines depends on the line, so assume the worst
+        return True
+    line_bytes = (x_max - x_min + 1) * sum(PIXEL_TYPE_SIZES[pixel_type] for _, pixel_type, _, _ in channels)
+    lines_per_chunk = SCANLINES_PER_CHUNK[values['compression'][0]]
+    for offset in offsets:
+        # Chunks of multi-part files start with their part number
+        f.seek(offset + (4 if multi_part else 0))
+        y, data_size = struct.unpack('<ii', f.read(8))
+        if data_size == min(lines_per_chunk, y_max - y + 1) * line_bytes:
+            return True
+    return False
+
+
+def read_header_block(path):
+    """Raw bytes of the headers and chunk offset tables at the start of an EXR
+
+    Changing the pixels of a compressed chunk nearly always changes its size and with
+    it the offset table, so these bytes identify a file's contents without reading
+    its pixel data. Returns None when they do not: for parts using one of the
+    FIXED_SIZE_COMPRESSIONS, scanline parts with a chunk stored uncompressed, and
+    tiled or deep parts, whose chunks are not checked.
+    """
+    with open(path, 'rb') as f:
+        magic, version = struct.unpack('<ii', f.read(8))
+        if magic != MAGIC:
+            raise ValueError(f"Not an OpenEXR file: {path}")
+        multi_part = bool(version & MULTI_PART_FLAG)
+
+        headers = [read_attributes(f)]
+        if multi_part:
+            while headers[-1]:
+                headers.append(read_attributes(f))
+            headers.pop()
+
+        chunk_counts = []
+        for attributes in headers:
+            values = {name: value for name, _, value in attributes}
+            compression = values['compression'][0]
+            part_type = values.get('type', b'tiledimage' if version & TILED_FLAG else b'scanlineimage')
+            if (compression in FIXED_SIZE_COMPRESSIONS or compression not in SCANLINES_PER_CHUNK
+                    or part_type != b'scanlineimage'):
+                return None
+            _, y_min, _, y_max = struct.unpack('<iiii', values['dataWindow'])
+            chunk_counts.append(-(-(y_max - y_min + 1) // SCANLINES_PER_CHUNK[compression]))
+
+        block_size = f.tell() + 8 * sum(chunk_counts)
+        offset_tables = [struct.unpack(f'<{count}Q', f.read(8 * count)) for count in chunk_counts]
+        for attributes, offsets in zip(headers, offset_tables):
+            if has_raw_chunks(f, {name: value for name, _, value in attributes}, offsets, multi_part):
+                return None
+
+        f.seek(0)
+        return f.read(block_size)
+
+
+def encode_attribute(name, attribute_type, value):
+    """Encode one header attribute"""
+    return name.encode() + b'\0' + attribute_type.encode() + b'\0' + struct.pack('<i', len(value)) + value
+
+
+def encode_part_header(layout, part_name):
+    """Encode a part header: the source attributes plus name, type and chunkCount"""
+    header = bytearray()
+    for name, attribute_type, value in layout['attributes']:
+        if name not in PART_ATTRIBUTES:
+            header += encode_attribute(name, attribute_type, value)
+    header += encode_attribute('name', 'string', part_name.encode())
+    header += encode_attribute('type', 'string', b'scanlineimage')
+    header += encode_attribute('chunkCount', 'int', struct.pack('<i', len(layout['offsets'])))
+    return bytes(header) + b'\0'
+
+
+def needs_long_names(layout):
+    """Check whether a part needs the long names flag in a multi-part file"""
+    return bool(layout['version'] & LONG_NAMES_FLAG) or any(
+        len(name) > 31 or len(attribute_type) > 31 for name, attribute_type, _ in layout['attributes']
+    )
+
+
+def copy_bytes(source, destination, size, digest=None):
+    """Copy size bytes between open files in bounded reads, adding them to digest when given"""
+    while size > 0:
+        data = source.read(min(size, COPY_BUFFER_SIZE))
+        if not data:
+            raise ValueError("Unexpected end of file while copying chunk")
+        destination.write(data)
+        if digest is not None:
+            digest.update(data)
+        size -= len(data)
+
+
+def write_multipart(output_path, parts, digests=None):
+    """Write a multi-part EXR from single-part layouts, copying each chunk unchanged
+
+    parts is a list of (layout, part name) tuples in output part order. digests maps
+    a part number to a hashlib object the chunks of that part are added to as copied.
+    """
+    version = VERSION | MULTI_PART_FLAG
+    if any(needs_long_names(layout) for layout, _ in parts):
+        version |= LONG_NAMES_FLAG
+
+    headers = b''.join(encode_part_header(layout, part_name) for layout, part_name in parts) + b'\0'
+    chunk_total = sum(len(layout['offsets']) for layout, _ in parts)
+
+    # Every chunk gains a 4 byte part number in a multi-part file
+    offset = 8 + len(headers) + 8 * chunk_total
+    offset_table = []
+    for layout, _ in parts:
+        for chunk_size in layout['chunk_sizes']:
+            offset_table.append(offset)
+            offset += 4 + chunk_size
+
+    with open(output_path, 'wb') as out:
+        out.write(struct.pack('<ii', MAGIC, version))
+        out.write(headers)
+        out.write(struct.pack(f'<{chunk_total}Q', *offset_table))
+        for part_number, (layout, _) in enumerate(parts):
+            part_prefix = struct.pack('<i', part_number)
+            digest = (digests or {}).get(part_number)
+            with open_source(layout['path'], layout.get('data')) as source:
+                for chunk_offset, chunk_size in zip(layout['offsets'], layout['chunk_sizes']):
+                    source.seek(chunk_offset)
+                    out.write(part_prefix)
+                    copy_bytes(source, out, chunk_size, digest)
+
+
+def read_multipart_layouts(path):
+    """Read the layout of every part of a multi-part scanline EXR
+
+    Chunk offsets point past the part number of each chunk, so the layouts can be
+    used like those of read_layout.
+    """
+    with open(path, 'rb') as f:
+        magic, version = struct.unpack('<ii', f.read(8))
+        if magic != MAGIC or not version & MULTI_PART_FLAG:
+            raise ValueError(f"Not a multi-part OpenEXR file: {path}")
+
+        headers = []
+        while True:
+            attributes = read_attributes(f)
+            if not attributes:
+                break
+            headers.append(attributes)
+
+        layouts = []
+        for attributes in headers:
+            values = {name: value for name, _, value in attributes}
+            if values.get('type') != b'scanlineimage':
+                raise ValueError(f"Only scanline parts can be read: {path}")
+            chunk_count, = struct.unpack('<i', values['chunkCount'])
+            offsets = struct.unpack(f'<{chunk_count}Q', f.read(8 * chunk_count))
+            layouts.append({
+                'path': path,
+                'version': version & ~MULTI_PART_FLAG,
+                'attributes': attributes,
+                'data_window': struct.unpack('<iiii', values['dataWindow']),
+                'compression': values['compression'][0],
+                'offsets': tuple(offset + 4 for offset in offsets)
+            })
+
+        for layout in layouts:
+            chunk_sizes = []
+            for offset in layout['offsets']:
+                f.seek(offset)
+                _, data_size = struct.unpack('<ii', f.read(8))
+                chunk_sizes.append(8 + data_size)
+            layout['chunk_sizes'] = chunk_sizes
+    return layouts
+
+
+def hash_chunks(layout, digest):
+    """Add the raw chunks of a layout to a hashlib object, in offset table order"""
+    with open_source(layout['path'], layout.get('data')) as source:
+        for chunk_offset, chunk_size in zip(layout['offsets'], layout['chunk_sizes']):
+            source.seek(chunk_offset)
+            data = source.read(chunk_size)
+            if len(data) != chunk_size:
+                raise ValueError("Unexpected end of file while reading chunk")
+            digest.update(data)
+
+
+def extract_part(layout):
+    """Contents of a single-part file holding the chunks of one part, unchanged"""
+    version = VERSION | (LONG_NAMES_FLAG if needs_long_names(layout) else 0)
+    header = b''.join(
+        encode_attribute(name, attribute_type, value)
+        for name, attribute_type, value in layout['attributes'] if name not in PART_ATTRIBUTES
+    ) + b'\0'
+    offset = 8 + len(header) + 8 * len(layout['offsets'])
+    offset_table = []
+    for chunk_size in layout['chunk_sizes']:
+        offset_table.append(offset)
+        offset += chunk_size
+
+    out = io.BytesIO()
+    out.write(struct.pack('<ii', MAGIC, version))
+    out.write(header)
+    out.write(struct.pack(f'<{len(offset_table)}Q', *offset_table))
+    with open_source(layout['path'], layout.get('data')) as source:
+        for chunk_offset, chunk_size in zip(layout['offsets'], layout['chunk_sizes']):
+            source.seek(chunk_offset)
+            copy_bytes(source, out, chunk_size)
+    return out.getvalue()
+
+
+def get_part_name(layout, default):
+    """Existing part name of a file, or default when it has none"""
+    for name, _, value in layout['attributes']:
+        if name == 'name':
+            return value.decode()
+    return default
+
@@ -1,15 +1,96 @@
 import os
+import io
+import math
+import shutil
+import tempfile
 import OpenEXR
 import Imath
 import multiprocessing
 import time
 import sys
 import re
+import struct
+import itertools
+import contextlib
+import hashlib
+import json
+from functools import partial
 from send2trash import send2trash
+from . import exr_chunks
+from . import pixels
+from .manifest import SequenceManifest, file_signature, DEFAULT_FINGERPRINT
+from .scanner import DirectoryScanner, DEFAULT_SCAN_THREADS, DEFAULT_PRUNE_PATTERNS
+from .executors import PoolExecutor, DEFAULT_ENGINE, DEFAULT_HYBRID_THREADS
+from .report import StageTimer, RunReport
+from .profiling import ProfileCollector, run_profiled
+from .pipeline import FramePipeline, DEFAULT_PREFETCH_DEPTH, DEFAULT_WRITE_BEHIND_DEPTH
+from .autoscale import WorkerAutoscaler
+from .sharding import in_frame_ranges, assign_shards
+from .work_queue import WorkQueue, DEFAULT_LEASE_TTL
+from .temp_files import temp_path, remove_temp_files, STALE_TEMP_SECONDS
+from .watcher import create_watcher, Debouncer, InotifyWatcher, DEFAULT_SETTLE_SECONDS
+from .compression_choice import (AUTO_COMPRESSION, DEFAULT_CANDIDATES, DEFAULT_OBJECTIVE, DEFAULT_SAMPLE_FRAMES,
+                                 pick_sample_frames, choose_compression, add_measurement)
+from .verification import FrameChecksums, compare_checksums, new_digest
+from .events import EventStream, RunStarted, FrameDone, FrameFailed, SequenceDone, Progress, RunSummary
+
+# Compiled once, these run for every file of every scan
+FRAME_PATTERN = re.compile(r'\.(\d{4,})\.(exr)$', re.IGNORECASE)
+FALLBACK_FRAME_PATTERN = re.compile(r'(\d{4,})(?=.*\.exr$)', re.IGNORECASE)
+MATTE_FOLDER_PATTERN = re.compile(r'(.+)_matte(.*)$')
 
 class EXRProcessor:
     COMPRESSION_OPTIONS = ['none', 'rle', 'zip', 'zips', 'piz', 'pxr24', 'b44', 'b44a', 'dwaa']
 
+    # Imath.Compression values (these do not follow COMPRESSION_OPTIONS order: ZIPS is 2, ZIP is 3)
+    COMPRESSION_VALUES = {
+        'none': Imath.Compression.NO_COMPRESSION,
+        'rle': Imath.Compression.RLE_COMPRESSION,
+        'zips': Imath.Compression.ZIPS_COMPRESSION,
+        'zip': Imath.Compression.ZIP_COMPRESSION,
+        'piz': Imath.Compression.PIZ_COMPRESSION,
+        'pxr24': Imath.Compression.PXR24_COMPRESSION,
+        'b44': Imath.Compression.B44_COMPRESSION,
+        'b44a': Imath.Compression.B44A_COMPRESSION,
+        'dwaa': Imath.Compression.DWAA_COMPRESSION
+    }
+
+    # Pixel types mattes can be stored as; 'native' keeps the matte file's own type
+    MATTE_PIXEL_TYPES = ['half', 'float', 'native']
+    PIXEL_TYPES = {
+        'half': Imath.PixelType.HALF,
+        'float': Imath.PixelType.FLOAT,
+        'uint': Imath.PixelType.UINT
+    }
+
+    # Seconds between resume manifest saves while processing
+    MANIFEST_SAVE_INTERVAL = 10
+
+    # Options that change the written file; outputs are only reused when these match
+    OUTPUT_OPTION_KEYS = ['matte_pixel_type', 'output_layout', 'matte_compression', 'crop_mattes']
+
+    # Scanlines per chunk for each Imath.Compression value
+    SCANLINES_PER_CHUNK = exr_chunks.SCANLINES_PER_CHUNK
+
+    # 'single' re-encodes everything into one part, 'multipart' copies the base chunks
+    # unchanged into part 0 and writes the mattes to a second part
+    OUTPUT_LAYOUTS = ['single', 'multipart']
+
+    # 'strict' skips sequences whose channels have different frames, 'intersection'
+    # processes the frames present in every channel
+    FRAME_POLICIES = ['strict', 'intersection']
+
+    # Frames are sent to workers in batches from one sequence. A batch aims for this many
+    # bytes of base input, so small frames share one round trip, while each worker still
+    # gets several batches to balance the load.
+    BATCH_TARGET_BYTES = 64 * 1024 * 1024
+    BATCHES_PER_WORKER = 4
+    # Upper bound keeping progress updates and stop requests responsive
+    MAX_BATCH_FRAMES = 32
+
+    # Seconds between progress updates sent while processing
+    PROGRESS_INTERVAL = 0.1
+
     def __init__(self):
         if sys.platform == 'darwin':  # macOS
             multiprocessing.set_start_method('fork', force=True)
@@ -18,71 +99,227 @@ class EXRProcessor:
             multiprocessing.set_start_method('spawn', force=True)
             os.environ['PYTHONUNBUFFERED'] = '1'
 
-    def extract_frame_numbers(self, file_list):
+    def get_frame_number(self, filename):
+        """Extract the frame number from an EXR filename"""
+        match = FRAME_PATTERN.search(filename)
+        if match:
+            return match.group(1)
+        # Fallback: try to find any sequence of 4+ digits before .exr
+        fallback_match = FALLBACK_FRAME_PATTERN.search(filename)
+        if fallback_match:
+            return fallback_match.group(1)
+        # If no frame number found, use filename without extension as identifier
+        return os.path.splitext(filename)[0]
+
+    def extract_frame_numbers(self, file_list, frame_lookup=None):
         """Extract frame numbers from a list of EXR filenames"""
         frame_numbers = []
-        frame_pattern = re.compile(r'\.(\d{4,})\.(exr)$', re.IGNORECASE)
-        
         for filename in file_list:
-            match = frame_pattern.search(filename)
-            if match:
-                frame_numbers.append(match.group(1))
+            # Reuse frame numbers already parsed by the scan index
+            if frame_lookup and filename in frame_lookup:
+                frame_numbers.append(frame_lookup[filename])
             else:
-                # Fallback: try to find any sequence of 4+ digits before .exr
-                fallback_pattern = re.compile(r'(\d{4,})(?=.*\.exr$)', re.IGNORECASE)
-                fallback_match = fallback_pattern.search(filename)
-                if fallback_match:
-                    frame_numbers.append(fallback_match.group(1))
-                else:
-                    # If no frame number found, use filename without extension as identifier
-                    frame_numbers.append(os.path.splitext(filename)[0])
-        
+                frame_numbers.append(self.get_frame_number(filename))
         return frame_numbers
 
-    def validate_frame_sequences(self, base_files, matte_files_dict, base_folder):
-        """Validate that all sequences have matching frame numbers"""
+    def index_frames(self, file_list, frame_lookup=None):
+        """Map frame number to file name, returning (index, duplicated frame numbers)"""
+        index = {}
+        duplicates = set()
+        for filename, frame in zip(file_list, self.extract_frame_numbers(file_list, frame_lookup)):
+            if frame in index:
+                duplicates.add(frame)
+            else:
+                index[frame] = filename
+        return index, duplicates
+
+    @staticmethod
+    def frame_sort_key(frame):
+        """Sort numeric frame numbers numerically, ahead of non-numeric identifiers"""
+        return (0, int(frame), '') if frame.isdigit() else (1, 0, frame)
+
+    def validate_frame_sequences(self, base_files, matte_files_dict, base_folder, frame_lookup=None):
+        """Validate that all sequences have matching frame numbers
+
+        Every channel is checked, so the warnings list all missing, extra and
+        duplicated frames of the sequence.
+        """
         warnings = []
-        
+        valid = True
+        base_name = os.path.basename(base_folder)
+
         # Extract frame numbers from base sequence
-        base_frames = set(self.extract_frame_numbers(base_files))
+        base_index, base_duplicates = self.index_frames(base_files, frame_lookup)
+        base_frames = set(base_index)
+        if base_duplicates:
+            duplicates_str = ', '.join(sorted(base_duplicates, key=self.frame_sort_key))
+            warnings.append(f"Sequence '{base_name}' has duplicate frames: {duplicates_str}")
+            valid = False
         
         # Check each matte sequence against base
         for channel_name, matte_files in matte_files_dict.items():
-            matte_frames = set(self.extract_frame_numbers(matte_files))
+            matte_index, matte_duplicates = self.index_frames(matte_files, frame_lookup)
+            matte_frames = set(matte_index)
+            channel_display = channel_name if channel_name != 'base' else 'matte'
+
+            if matte_duplicates:
+                duplicates_str = ', '.join(sorted(matte_duplicates, key=self.frame_sort_key))
+                warnings.append(f"Channel '{channel_display}' in sequence '{base_name}' has duplicate frames: {duplicates_str}")
+                valid = False
             
             # Check for exact frame match
             if base_frames != matte_frames:
                 missing_in_matte = base_frames - matte_frames
                 extra_in_matte = matte_frames - base_frames
                 
-                base_name = os.path.basename(base_folder)
-                channel_display = channel_name if channel_name != 'base' else 'matte'
-                
                 if missing_in_matte:
-                    missing_str = ', '.join(sorted(missing_in_matte))
+                    missing_str = ', '.join(sorted(missing_in_matte, key=self.frame_sort_key))
                     warnings.append(f"Channel '{channel_display}' in sequence '{base_name}' is missing frames: {missing_str}")
                 
                 if extra_in_matte:
-                    extra_str = ', '.join(sorted(extra_in_matte))
+                    extra_str = ', '.join(sorted(extra_in_matte, key=self.frame_sort_key))
                     warnings.append(f"Channel '{channel_display}' in sequence '{base_name}' has extra frames: {extra_str}")
                 
-                return False, warnings
+                valid = False
         
-        return True, warnings
+        return valid, warnings
+
+    def build_frame_index(self, base_files, matte_files_dict, frame_lookup=None):
+        """Index a sequence by frame number
+
+        Returns one {'frame', 'base_file', 'matte_files'} entry per frame present exactly
+        once in the base and every matte channel, in frame order.
+        """
+        base_index, excluded = self.index_frames(base_files, frame_lookup)
+        common = set(base_index)
+        matte_indexes = {}
+        for channel_name, matte_files in matte_files_dict.items():
+            matte_index, duplicates = self.index_frames(matte_files, frame_lookup)
+            matte_indexes[channel_name] = matte_index
+            common &= set(matte_index)
+            excluded |= duplicates
+
+        frames = []
+        for frame in sorted(common - excluded, key=self.frame_sort_key):
+            frames.append({
+                'frame': frame,
+                'base_file': base_index[frame],
+                'matte_files': {channel: index[frame] for channel, index in matte_indexes.items()}
+            })
+        return frames
+
+    def get_pair_frames(self, pair):
+        """Frame index of a scanned pair, pairing files by sorted position for pairs without one"""
+        if 'frames' in pair:
+            return pair['frames']
+        return [
+            {
+                'frame': None,
+                'base_file': base_file,
+                'matte_files': {channel: files[i] for channel, files in pair['matte_files'].items()}
+            }
+            for i, base_file in enumerate(pair['base_files'])
+        ]
+
+    def estimate_frame_bytes(self, pair):
+        """Input bytes of one frame of a pair, from the file sizes of its first frame
+
+        Stored in the pair, so a saved plan carries it to every node.
+        """
+        if 'frame_bytes' not in pair:
+            frame = self.get_pair_frames(pair)[0]
+            input_paths = self.get_input_paths(pair['base_folder'], pair['matte_folders'],
+                                               frame['base_file'], frame['matte_files'])
+            try:
+                pair['frame_bytes'] = sum(os.path.getsize(path) for path in input_paths.values())
+            except OSError:
+                pair['frame_bytes'] = 0
+        return pair['frame_bytes']
+
+    def select_frames(self, pairs, frame_ranges=None, shard=None):
+        """Pairs reduced to the frames in frame_ranges and then to shard (i, n)
+
+        Shards split the frames of every sequence, in base folder and frame order, into
+        n contiguous parts of about equal input bytes, so every node given the same pairs
+        selects the same frames and together they cover each frame once. Frames left out
+        are added to the pair's skipped_frames so originals are never replaced from a part
+        of a sequence, and pairs left without frames are dropped.
+        """
+        selected = [(pair, self.get_pair_frames(pair)) for pair in sorted(pairs, key=lambda p: p['base_folder'])]
+        if frame_ranges:
+            selected = [
+                (pair, [frame for frame in frames
+                        if in_frame_ranges(frame['frame'] or self.get_frame_number(frame['base_file']),
+                                           frame_ranges)])
+                for pair, frames in selected
+            ]
+        if shard:
+            index, count = shard
+            weights = []
+            for pair, frames in selected:
+                if frames:
+                    weights.extend([self.estimate_frame_bytes(pair)] * len(frames))
+            shards = iter(assign_shards(weights, count))
+            selected = [(pair, [frame for frame in frames if next(shards) == index - 1]) for pair, frames in selected]
+
+        return [self.reduce_pair(pair, frames) for pair, frames in selected if frames]
+
+    def reduce_pair(self, pair, frames):
+        """Copy of a pair with only the given frames, the others added to its skipped_frames"""
+        kept = {frame['base_file'] for frame in frames}
+        left_out = [frame['frame'] or self.get_frame_number(frame['base_file'])
+                    for frame in self.get_pair_frames(pair) if frame['base_file'] not in kept]
+        return {
+            **pair,
+            'base_files': [frame['base_file'] for frame in frames],
+            'matte_files': {
+                channel_name: [frame['matte_files'][channel_name] for frame in frames]
+                for channel_name in pair['matte_files']
+            },
+            'frames': frames,
+            'skipped_frames': sorted(pair.get('skipped_frames', []) + left_out, key=self.frame_sort_key)
+        }
+
+    def list_exr_files(self, folder, scan_index=None, listings=None):
+        """Sorted EXR file names in a folder, from the walk listings or scan index when given"""
+        if listings and folder in listings:
+            return listings[folder]
+        if scan_index is None:
+            return sorted([f for f in os.listdir(folder) if f.endswith('.exr')])
+        entry = scan_index.list_dir(folder)
+        if entry is None:
+            raise OSError(f"Cannot list directory: {folder}")
+        return entry['exr_files']
+
+    def find_matching_pairs(self, main_folder, scan_index=None, scan_threads=DEFAULT_SCAN_THREADS,
+                            prune_patterns=None, frame_policy='strict'):
+        """Find matching main/matte folder pairs using flexible _matte* detection
 
-    def find_matching_pairs(self, main_folder):
-        """Find matching main/matte folder pairs using flexible _matte* detection"""
+        Folders are listed in parallel on scan_threads threads, skipping folders matching
+        prune_patterns (our own _embedded outputs and hidden folders by default). When a
+        ScanIndex is given, directory listings and frame numbers come from it and only
+        directories whose mtime changed since the last scan are re-listed.
+
+        Each pair gets a frame index ('frames') that pairs base and matte files by frame
+        number. With frame_policy 'strict' a sequence whose channels do not have the same
+        frames is skipped; with 'intersection' the frames present in every channel are kept.
+        """
         pairs = []
         warnings = []
         
         # Dictionary to group sequences by base folder
         sequence_groups = {}
         
+        scanner = DirectoryScanner(scan_index.list_dir if scan_index is not None else None,
+                                   scan_threads, prune_patterns)
+        walk_results = scanner.walk(main_folder)
+        listings = {root: files for root, _, files in walk_results}
+        
         # Walk through all folders to find matte folders
-        for root, dirs, files in os.walk(main_folder):
+        for root, dirs, files in walk_results:
             # Check if this folder matches the _matte* pattern
             folder_name = os.path.basename(root)
-            matte_match = re.match(r'(.+)_matte(.*)$', folder_name)
+            matte_match = MATTE_FOLDER_PATTERN.match(folder_name)
             
             if matte_match:
                 base_name = matte_match.group(1)
@@ -94,103 +331,301 @@ class EXRProcessor:
                     warnings.append(f"Base folder not found for matte folder: {root}")
                     continue
                 
-                # Initialize sequence group if not seen before
-                if base_folder not in sequence_groups:
-                    sequence_groups[base_folder] = {
-                        'base_folder': base_folder,
-                        'matte_folders': {},
-                        'base_files': None
-                    }
-                
-                # Determine channel name
-                if matte_suffix == '':
-                    # Just "_matte" - this is the base matte channel
-                    channel_name = 'base'
-                else:
-                    # "_matte{suffix}" - use suffix as channel name (lowercase)
-                    channel_name = matte_suffix.lower()
-                
-                # Store matte folder info
-                sequence_groups[base_folder]['matte_folders'][channel_name] = root
+                # Store matte folder info, grouped by base folder
+                matte_folders = sequence_groups.setdefault(base_folder, {})
+                matte_folders[self.get_matte_channel_key(matte_suffix)] = root
         
         # Process each sequence group
-        for base_folder, group_info in sequence_groups.items():
-            try:
-                # Get base files
-                base_files = sorted([f for f in os.listdir(base_folder) if f.endswith('.exr')])
-                if not base_files:
-                    warnings.append(f"No EXR files found in base folder: {base_folder}")
-                    continue
-                
-                group_info['base_files'] = base_files
-                
-                # Validate each matte folder and get file lists
-                matte_files = {}
-                file_count_mismatch = False
-                
-                for channel_name, matte_folder in group_info['matte_folders'].items():
-                    try:
-                        channel_files = sorted([f for f in os.listdir(matte_folder) if f.endswith('.exr')])
-                        if len(channel_files) != len(base_files):
-                            warnings.append(f"File count mismatch for {matte_folder}: expected {len(base_files)}, found {len(channel_files)}")
-                            file_count_mismatch = True
-                            break
-                        matte_files[channel_name] = channel_files
-                    except OSError as e:
-                        warnings.append(f"Error reading matte folder {matte_folder}: {str(e)}")
-                        file_count_mismatch = True
-                        break
-                
-                if file_count_mismatch:
-                    continue
-
-                # Validate frame number sequences
-                frames_valid, frame_warnings = self.validate_frame_sequences(base_files, matte_files, base_folder)
-                warnings.extend(frame_warnings)
-                
-                if not frames_valid:
-                    # Skip this sequence if frame numbers don't match
-                    continue
-                
-                # Determine sequence type
-                channel_names = list(group_info['matte_folders'].keys())
-                if len(channel_names) == 1 and 'base' in channel_names:
-                    sequence_type = "Single Channel Matte"
-                else:
-                    # Show actual channel names with conflict resolution
-                    display_channels = []
-                    for name in sorted(channel_names):
-                        if name == 'base':
-                            display_channels.append('matte')
-                        elif name.lower() in ['r', 'g', 'b', 'a']:
-                            display_channels.append(f'matte_{name.lower()}')
-                        else:
-                            display_channels.append(name)
-                    sequence_type = f"Multi-Channel ({', '.join(display_channels)})"
-                
-                pairs.append({
-                    'base_folder': base_folder,
-                    'matte_folders': group_info['matte_folders'],
-                    'base_files': base_files,
-                    'matte_files': matte_files,
-                    'channels': channel_names,
-                    'sequence_type': sequence_type
-                })
-                
-            except OSError as e:
-                warnings.append(f"Error reading base folder {base_folder}: {str(e)}")
-                continue
+        for base_folder, matte_folders in sequence_groups.items():
+            pair = self.build_pair(base_folder, matte_folders, main_folder, warnings, scan_index, listings,
+                                   frame_policy)
+            if pair is not None:
+                pairs.append(pair)
         
         return pairs, warnings
 
-    def process_exr_file(self, base_folder, matte_info, base_file, matte_files, compression, matte_channel_name):
-        """Process a single EXR file with its matte channels"""
+    @staticmethod
+    def get_matte_channel_key(matte_suffix):
+        """Channel name of a matte folder from the suffix after _matte"""
+        if matte_suffix == '':
+            # Just "_matte" - this is the base matte channel
+            return 'base'
+        # "_matte{suffix}" - use suffix as channel name (lowercase)
+        return matte_suffix.lower()
+
+    def find_sequence_pair(self, base_folder, scan_root, warnings, frame_policy='strict'):
+        """Pair of one base folder with the _matte* folders next to it, or None
+
+        Only the parent folder is listed, so a single sequence is rescanned without
+        walking the tree it is in.
+        """
+        parent, base_name = os.path.split(base_folder)
+        matte_folders = {}
         try:
-            exr1 = OpenEXR.InputFile(os.path.join(base_folder, base_file))
-        except Exception as e:
-            raise Exception(f"Error opening base file: {str(e)}")
+            names = sorted(os.listdir(parent))
+        except OSError:
+            return None
+        for name in names:
+            matte_match = MATTE_FOLDER_PATTERN.match(name)
+            if matte_match and matte_match.group(1) == base_name and os.path.isdir(os.path.join(parent, name)):
+                matte_folders[self.get_matte_channel_key(matte_match.group(2))] = os.path.join(parent, name)
+        if not matte_folders or not os.path.isdir(base_folder):
+            return None
+        return self.build_pair(base_folder, matte_folders, scan_root, warnings, frame_policy=frame_policy)
 
-        header1 = exr1.header()
+    def build_pair(self, base_folder, matte_folders, scan_root, warnings, scan_index=None, listings=None,
+                   frame_policy='strict'):
+        """Pair dict of a base folder and its matte folders, or None when the sequence is skipped"""
+        try:
+            # Get base files
+            base_files = self.list_exr_files(base_folder, scan_index, listings)
+            if not base_files:
+                warnings.append(f"No EXR files found in base folder: {base_folder}")
+                return None
+            
+            # Validate each matte folder and get file lists
+            matte_files = {}
+            file_count_mismatch = False
+            
+            for channel_name, matte_folder in matte_folders.items():
+                try:
+                    channel_files = self.list_exr_files(matte_folder, scan_index, listings)
+                    # Counts may differ when only the frames common to all channels are processed
+                    if frame_policy == 'strict' and len(channel_files) != len(base_files):
+                        warnings.append(f"File count mismatch for {matte_folder}: expected {len(base_files)}, found {len(channel_files)}")
+                        file_count_mismatch = True
+                    matte_files[channel_name] = channel_files
+                except OSError as e:
+                    warnings.append(f"Error reading matte folder {matte_folder}: {str(e)}")
+                    file_count_mismatch = True
+            
+            if file_count_mismatch:
+                return None
+
+            # Validate frame number sequences
+            frame_lookup = None
+            if scan_index is not None:
+                frame_lookup = scan_index.frame_lookup(base_folder)
+                for matte_folder in matte_folders.values():
+                    frame_lookup.update(scan_index.frame_lookup(matte_folder))
+            frames_valid, frame_warnings = self.validate_frame_sequences(base_files, matte_files, base_folder,
+                                                                         frame_lookup)
+            warnings.extend(frame_warnings)
+            
+            if not frames_valid and frame_policy == 'strict':
+                # Skip this sequence if frame numbers don't match
+                return None
+
+            frames = self.build_frame_index(base_files, matte_files, frame_lookup)
+            if not frames:
+                warnings.append(f"No frames common to all channels in sequence: {base_folder}")
+                return None
+            # Frames of any channel left out of the index, kept so replace_originals leaves them alone
+            skipped_frames = []
+            if not frames_valid:
+                all_frames = set(self.extract_frame_numbers(base_files, frame_lookup))
+                for channel_files in matte_files.values():
+                    all_frames.update(self.extract_frame_numbers(channel_files, frame_lookup))
+                skipped_frames = sorted(all_frames - {frame['frame'] for frame in frames},
+                                        key=self.frame_sort_key)
+                warnings.append(f"Processing {len(frames)} of {len(base_files)} frames in sequence "
+                                f"'{os.path.basename(base_folder)}'")
+            
+            # Determine sequence type
+            channel_names = list(matte_folders.keys())
+            if len(channel_names) == 1 and 'base' in channel_names:
+                sequence_type = "Single Channel Matte"
+            else:
+                # Show actual channel names with conflict resolution
+                display_channels = []
+                for name in sorted(channel_names):
+                    if name == 'base':
+                        display_channels.append('matte')
+                    elif name.lower() in ['r', 'g', 'b', 'a']:
+                        display_channels.append(f'matte_{name.lower()}')
+                    else:
+                        display_channels.append(name)
+                sequence_type = f"Multi-Channel ({', '.join(display_channels)})"
+            
+            # File lists are aligned by frame, so base_files[i] pairs with matte_files[channel][i]
+            return {
+                'base_folder': base_folder,
+                'matte_folders': matte_folders,
+                'base_files': [frame['base_file'] for frame in frames],
+                'matte_files': {
+                    channel_name: [frame['matte_files'][channel_name] for frame in frames]
+                    for channel_name in matte_files
+                },
+                'frames': frames,
+                'skipped_frames': skipped_frames,
+                'scan_root': scan_root,
+                'channels': channel_names,
+                'sequence_type': sequence_type
+            }
+            
+        except OSError as e:
+            warnings.append(f"Error reading base folder {base_folder}: {str(e)}")
+            return None
+
+    @staticmethod
+    def get_default_options():
+        """Default processing options, overridable per run"""
+        return {
+            'streaming': False,
+            'block_lines': 64,
+            'matte_pixel_type': 'half',
+            'output_layout': 'single',
+            'matte_compression': None,
+            'crop_mattes': False,
+            'resume': False,
+            'fingerprint': DEFAULT_FINGERPRINT,
+            'engine': DEFAULT_ENGINE,
+            'threads_per_process': DEFAULT_HYBRID_THREADS,
+            'profile': None,
+            'profile_collapsed': None,
+            'pipeline': False,
+            'prefetch_depth': DEFAULT_PREFETCH_DEPTH,
+            'write_behind_depth': DEFAULT_WRITE_BEHIND_DEPTH,
+            'staging_dir': None,
+            'output_root': None,
+            'autoscale': False,
+            'max_memory': None,
+            'work_queue': None,
+            'node_id': None,
+            'lease_ttl': DEFAULT_LEASE_TTL,
+            'compression_objective': DEFAULT_OBJECTIVE,
+            'auto_candidates': None,
+            'auto_samples': DEFAULT_SAMPLE_FRAMES,
+            'verify': False
+        }
+
+    def resolve_options(self, options):
+        """Merge user supplied processing options over the defaults"""
+        resolved = self.get_default_options()
+        if options:
+            resolved.update(options)
+        return resolved
+
+    def get_output_folder(self, base_folder, output_root=None, scan_root=None):
+        """Folder embedded frames of a sequence are written to
+
+        Next to the sequence by default. Under output_root the sequence keeps its path
+        relative to the scanned folder, or just its name when it is outside of it.
+        """
+        if not output_root:
+            return base_folder + '_embedded'
+        relative_path = os.path.basename(base_folder)
+        if scan_root:
+            try:
+                relative_path = os.path.relpath(base_folder, scan_root)
+            except ValueError:  # Different drives on Windows
+                pass
+            if relative_path == os.curdir or relative_path.startswith(os.pardir):
+                relative_path = os.path.basename(base_folder)
+        return os.path.join(output_root, relative_path + '_embedded')
+
+    def get_pair_output_folder(self, pair, options):
+        """Output folder of a scanned pair with the run's output root"""
+        return self.get_output_folder(pair['base_folder'], options.get('output_root'), pair.get('scan_root'))
+
+    def get_temp_path(self, output_path):
+        """Temporary name a file is written under before being renamed to output_path"""
+        return temp_path(output_path)
+
+    def get_output_settings(self, compression, matte_channel_name, options):
+        """Settings that determine the contents of an output file
+
+        With auto compression the compression is the list of candidates, which any
+        output written with one of them matches; outputs record the one used.
+        """
+        if compression == AUTO_COMPRESSION:
+            compression = list(options['auto_candidates'] or DEFAULT_CANDIDATES)
+        settings = {'compression': compression, 'matte_channel_name': matte_channel_name}
+        settings.update({key: options[key] for key in self.OUTPUT_OPTION_KEYS})
+        return settings
+
+    def get_recorded_settings(self, settings, context):
+        """Settings recorded for an output of a sequence, with the compression it was written with"""
+        return dict(settings, compression=context['compression'])
+
+    def get_input_paths(self, base_folder, matte_info, base_file, matte_files):
+        """Paths of every input of one frame, keyed by 'base' and 'matte.<channel>'"""
+        input_paths = {'base': os.path.join(base_folder, base_file)}
+        for channel_name, matte_folder in matte_info.items():
+            input_paths[f'matte.{channel_name}'] = os.path.join(matte_folder, matte_files[channel_name])
+        return input_paths
+
+    def get_compression(self, compression):
+        """Return the Imath compression attribute for a compression name"""
+        return Imath.Compression(self.COMPRESSION_VALUES[compression])
+
+    def get_scanlines_per_chunk(self, compression_value):
+        """Number of scanlines stored together in one chunk for a compression value"""
+        return self.SCANLINES_PER_CHUNK.get(compression_value, 1)
+
+    def get_output_channel_name(self, channel_name, matte_channel_name):
+        """Map a matte folder channel to its channel name in the output file"""
+        if channel_name == 'base':
+            return matte_channel_name
+        # Handle special cases that conflict with standard EXR channels
+        if channel_name.lower() in ['r', 'g', 'b', 'a']:
+            # Add 'matte_' prefix to avoid conflicts with R, G, B, A channels
+            return f'{matte_channel_name}.matte_{channel_name.lower()}'
+        return f'{matte_channel_name}.{channel_name}'
+
+    def get_input_signatures(self, input_paths, options):
+        """Signatures of a frame's inputs as recorded in the resume manifest"""
+        return {
+            key: file_signature(path, options.get('fingerprint', DEFAULT_FINGERPRINT))
+            for key, path in input_paths.items()
+        }
+
+    def get_frame_fingerprint(self, context, base_file, matte_files, settings):
+        """Fingerprint of the sizes and modification times of a frame's inputs and its output settings"""
+        input_paths = self.get_input_paths(context['base_folder'], context['matte_info'], base_file, matte_files)
+        try:
+            signatures = {key: file_signature(path) for key, path in input_paths.items()}
+        except OSError:
+            # The frame fails when it is processed, and is retried once its inputs are back
+            signatures = None
+        data = json.dumps([signatures, settings], sort_keys=True).encode('utf-8')
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def read_input(self, path):
+        """Read the contents of an input file for the prefetch stage"""
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def open_input(self, path, inputs=None, key='base'):
+        """Open an input file, from its prefetched contents when inputs holds them"""
+        if inputs is not None:
+            return OpenEXR.InputFile(io.BytesIO(inputs[key]))
+        return OpenEXR.InputFile(path)
+
+    def open_matte_files(self, matte_info, matte_files, inputs=None):
+        """Open the matte input files for one frame, keyed by channel name"""
+        matte_inputs = {}
+        try:
+            for channel_name, matte_folder in matte_info.items():
+                try:
+                    matte_file_path = os.path.join(matte_folder, matte_files[channel_name])
+                    matte_inputs[channel_name] = self.open_input(matte_file_path, inputs, f'matte.{channel_name}')
+                except Exception as e:
+                    raise Exception(f"Error processing matte channel {channel_name}: {str(e)}")
+        except Exception:
+            for exr_matte in matte_inputs.values():
+                exr_matte.close()
+            raise
+        return matte_inputs
+
+    def get_matte_pixel_type(self, exr_matte, matte_pixel_type):
+        """Pixel type a matte channel is stored as in the output file"""
+        if matte_pixel_type == 'native':
+            return exr_matte.header()['channels']['R'].type
+        return Imath.PixelType(self.PIXEL_TYPES[matte_pixel_type])
+
+    def build_output_header(self, header1, base_channels, matte_channels, matte_types, compression):
+        """Build the output header from the base header plus the matte channels"""
         header_out = OpenEXR.Header(
             header1['dataWindow'].max.x - header1['dataWindow'].min.x + 1,
             header1['dataWindow'].max.y - header1['dataWindow'].min.y + 1
@@ -201,76 +636,916 @@ class EXRProcessor:
             if attribute != 'writer':
                 header_out[attribute] = value
 
-        # Copy all existing channels except existing matte channels
-        channel_data = {
-            channel: exr1.channel(channel, Imath.PixelType(Imath.PixelType.HALF))
-            for channel in header1['channels'] 
-            if not channel.startswith(matte_channel_name)
+        # Only keep the base channels being copied (existing matte channels are replaced)
+        header_out['channels'] = {
+            channel: header1['channels'][channel] for channel in base_channels
         }
+        for channel_name, output_channel in matte_channels.items():
+            header_out['channels'][output_channel] = Imath.Channel(matte_types[channel_name])
 
-        # First, collect all matte data
-        matte_channels = {}
-        for channel_name, matte_folder in matte_info.items():
+        # Set compression
+        header_out['compression'] = self.get_compression(compression)
+        return header_out
+
+    def get_read_plan(self, exr1, matte_inputs, base_channels, matte_channels, matte_types):
+        """Group output channels by the input file they are copied from
+
+        Returns a list of (input file, [(output channel, input channel, pixel type)], stage) where a
+        pixel type of None means the channel is read in its native type, and stage is the
+        timing stage the read counts towards.
+        """
+        read_plan = []
+        # Base channels keep their header type, so they all decode in one channels() call
+        if base_channels:
+            read_plan.append((exr1, [(channel, channel, None) for channel in base_channels], 'read_base'))
+        for channel_name, output_channel in matte_channels.items():
+            exr_matte = matte_inputs[channel_name]
+            pixel_type = matte_types[channel_name]
+            if exr_matte.header()['channels']['R'].type == pixel_type:
+                pixel_type = None
+            read_plan.append((exr_matte, [(output_channel, 'R', pixel_type)], 'read_mattes'))
+        return read_plan
+
+    def read_channels(self, read_plan, y_range=None, timer=None):
+        """Read every planned channel, decoding each input file once per call
+
+        Channels in their native type are returned as the decoded buffers. Converted
+        channels are decoded natively and cast into arrays from the calling thread's
+        BufferPool, which are reused by the next frame.
+        """
+        timer = timer or StageTimer()
+        scanlines = {'scanLine1': y_range[0], 'scanLine2': y_range[1]} if y_range else {}
+        pool = pixels.get_buffer_pool()
+        channel_data = {}
+        for exr_in, channels, stage in read_plan:
             try:
-                matte_file_path = os.path.join(matte_folder, matte_files[channel_name])
-                exr_matte = OpenEXR.InputFile(matte_file_path)
-                matte_data = exr_matte.channel('R', Imath.PixelType(Imath.PixelType.HALF))
-                matte_channels[channel_name] = matte_data
-                exr_matte.close()
+                with timer.stage(stage):
+                    header = exr_in.header()
+                    # Subsampled channels are converted by OpenEXR, everything else comes from one decode
+                    decoded = [
+                        (output_channel, input_channel, pixel_type)
+                        for output_channel, input_channel, pixel_type in channels
+                        if pixel_type is None or self.is_full_resolution(header['channels'][input_channel])
+                    ]
+                    if decoded:
+                        buffers = exr_in.channels([input_channel for _, input_channel, _ in decoded], **scanlines)
+                        for (output_channel, input_channel, pixel_type), data in zip(decoded, buffers):
+                            if pixel_type is not None:
+                                data = self.convert_channel(pool, output_channel, data, header, input_channel,
+                                                            pixel_type, y_range)
+                            channel_data[output_channel] = data
+                    for output_channel, input_channel, pixel_type in channels:
+                        if output_channel not in channel_data:
+                            channel_data[output_channel] = exr_in.channel(input_channel, pixel_type,
+                                                                          *(y_range or ()))
             except Exception as e:
-                raise Exception(f"Error processing matte channel {channel_name}: {str(e)}")
+                channel_list = ', '.join(output_channel for output_channel, _, _ in channels)
+                raise Exception(f"Error reading channels {channel_list}: {str(e)}")
+        return channel_data
 
-        # Then, add all matte channels to output
-        for channel_name, matte_data in matte_channels.items():
-            # Determine output channel name
-            if channel_name == 'base':
-                output_channel = matte_channel_name
-            else:
-                # Handle special cases that conflict with standard EXR channels
-                if channel_name.lower() in ['r', 'g', 'b', 'a']:
-                    # Add 'matte_' prefix to avoid conflicts with R, G, B, A channels
-                    output_channel = f'{matte_channel_name}.matte_{channel_name.lower()}'
-                else:
-                    output_channel = f'{matte_channel_name}.{channel_name}'
-            
-            # Add to output
-            header_out['channels'][output_channel] = Imath.Channel(Imath.PixelType(Imath.PixelType.HALF))
-            channel_data[output_channel] = matte_data
+    def is_full_resolution(self, channel):
+        return channel.xSampling == 1 and channel.ySampling == 1
 
-        # Set compression
-        header_out['compression'] = Imath.Compression(self.COMPRESSION_OPTIONS.index(compression))
+    def convert_channel(self, pool, output_channel, data, header, input_channel, pixel_type, y_range=None):
+        """Cast decoded channel bytes into a pooled array of pixel_type"""
+        data_window = header['dataWindow']
+        width = data_window.max.x - data_window.min.x + 1
+        y_min, y_max = y_range or (data_window.min.y, data_window.max.y)
+        array = pixels.to_array(data, header['channels'][input_channel].type, width, y_max - y_min + 1)
+        return pool.copy(output_channel, array, pixels.NUMPY_DTYPES[pixel_type.v])
+
+    def can_stream(self, header1):
+        """Check whether a base file can be embedded in scanline blocks"""
+        # Streamed writes always advance in increasing y, so decreasing files use the full-frame path
+        return header1['lineOrder'].v != Imath.LineOrder.DECREASING_Y and 'tiles' not in header1
+
+    def get_block_lines(self, header1, header_out, block_lines):
+        """Scanlines per streamed block, aligned to the input and output chunk sizes"""
+        group = max(
+            self.get_scanlines_per_chunk(header1['compression'].v),
+            self.get_scanlines_per_chunk(header_out['compression'].v)
+        )
+        return max(1, -(-block_lines // group)) * group
+
+    def add_checksums(self, checksums, channel_data, header_out, timer):
+        """Hash channel data about to be written when the frame is verified"""
+        if checksums is not None:
+            with timer.stage('checksum'):
+                checksums.add_channels(channel_data, header_out)
+
+    def write_full_frame(self, read_plan, output_path, header_out, timer=None, checksums=None):
+        """Decode the whole frame and write it with a single writePixels call"""
+        timer = timer or StageTimer()
+        channel_data = self.read_channels(read_plan, timer=timer)
+        self.add_checksums(checksums, channel_data, header_out, timer)
 
-        # Create output directory
-        output_dir = base_folder + '_embedded'
-        os.makedirs(output_dir, exist_ok=True)
-        
         try:
-            output_path = os.path.join(output_dir, base_file)
-            exr_out = OpenEXR.OutputFile(output_path, header_out)
-            exr_out.writePixels(channel_data)
-            exr_out.close()
+            with timer.stage('write'):
+                exr_out = OpenEXR.OutputFile(output_path, header_out)
+                exr_out.writePixels(channel_data)
+            with timer.stage('close'):
+                exr_out.close()
         except Exception as e:
             raise Exception(f"Error writing output file: {str(e)}")
 
-        exr1.close()
+    def write_streamed(self, read_plan, output_path, header_out, block_lines, timer=None, checksums=None):
+        """Copy the frame in blocks of scanlines so only one block is decoded at a time"""
+        timer = timer or StageTimer()
+        data_window = header_out['dataWindow']
+        for exr_in, _, _ in read_plan:
+            if exr_in.header()['dataWindow'] != data_window:
+                raise Exception("Error processing matte channel: dataWindow does not match base file")
+
+        try:
+            with timer.stage('write'):
+                exr_out = OpenEXR.OutputFile(output_path, header_out)
+        except Exception as e:
+            raise Exception(f"Error writing output file: {str(e)}")
+
+        try:
+            for y_start in range(data_window.min.y, data_window.max.y + 1, block_lines):
+                y_end = min(y_start + block_lines - 1, data_window.max.y)
+                block_data = self.read_channels(read_plan, (y_start, y_end), timer)
+                self.add_checksums(checksums, block_data, header_out, timer)
+                try:
+                    with timer.stage('write'):
+                        exr_out.writePixels(block_data, y_end - y_start + 1)
+                except Exception as e:
+                    raise Exception(f"Error writing output file: {str(e)}")
+        finally:
+            with timer.stage('close'):
+                exr_out.close()
+
+    def get_chunk_layout(self, base_path, header1, base_channels, data=None):
+        """Chunk layout of a base file whose chunks can be copied as they are, or None"""
+        # Existing matte channels have to be stripped, which means decoding
+        if len(base_channels) != len(header1['channels']):
+            return None
+        try:
+            return exr_chunks.read_layout(base_path, data)
+        except (ValueError, OSError, struct.error):
+            return None
+
+    def write_cropped_mattes(self, matte_plan, header_out, output_path, timer=None, checksums=None):
+        """Write the matte channels with a dataWindow cropped to their non-zero pixels"""
+        timer = timer or StageTimer()
+        data_window = header_out['dataWindow']
+        width = data_window.max.x - data_window.min.x + 1
+        height = data_window.max.y - data_window.min.y + 1
+        matte_arrays = {
+            channel: pixels.to_array(data, header_out['channels'][channel].type, width, height)
+            for channel, data in self.read_channels(matte_plan, timer=timer).items()
+        }
+
+        with timer.stage('crop'):
+            # An all-zero matte still needs a valid window, so keep a single zero pixel
+            bounds = pixels.nonzero_bounds(matte_arrays.values()) or (0, 0, 0, 0)
+            x_min, y_min, x_max, y_max = bounds
+            header_out['dataWindow'] = Imath.Box2i(
+                Imath.V2i(data_window.min.x + x_min, data_window.min.y + y_min),
+                Imath.V2i(data_window.min.x + x_max, data_window.min.y + y_max)
+            )
+            # The crops are copied into pooled arrays, which writePixels reads directly
+            pool = pixels.get_buffer_pool()
+            channel_data = {
+                channel: pool.copy(f'{channel}.crop', array[y_min:y_max + 1, x_min:x_max + 1])
+                for channel, array in matte_arrays.items()
+            }
+        self.add_checksums(checksums, channel_data, header_out, timer)
 
-    def process_exr_file_wrapper(self, args):
-        """Wrapper for multiprocessing"""
         try:
-            self.process_exr_file(*args)
-            return args[0], args[1], args[2], None
+            with timer.stage('write'):
+                exr_out = OpenEXR.OutputFile(output_path, header_out)
+                exr_out.writePixels(channel_data)
+            with timer.stage('close'):
+                exr_out.close()
         except Exception as e:
-            return args[0], args[1], args[2], str(e)
+            raise Exception(f"Error writing output file: {str(e)}")
+
+    def write_matte_part(self, matte_plan, header_out, output_path, options, timer=None, checksums=None):
+        """Write the matte channels as a single-part file for the multi-part assembly"""
+        if options['crop_mattes']:
+            # The bounding box needs the whole matte, so cropping always reads full frames
+            self.write_cropped_mattes(matte_plan, header_out, output_path, timer, checksums)
+        elif options['streaming'] and self.can_stream(header_out):
+            block_lines = self.get_block_lines(header_out, header_out, options['block_lines'])
+            self.write_streamed(matte_plan, output_path, header_out, block_lines, timer, checksums)
+        else:
+            self.write_full_frame(matte_plan, output_path, header_out, timer, checksums)
+
+    def write_multipart(self, base_layout, matte_plan, matte_header, output_path, matte_channel_name, options,
+                        timer=None, checksums=None):
+        """Copy the base chunks into part 0 and add the encoded mattes as part 1
+
+        With checksums, the base chunks are hashed as they are copied, since they are never decoded.
+        """
+        timer = timer or StageTimer()
+        matte_path = output_path + '.matte.tmp'
+        try:
+            self.write_matte_part(matte_plan, matte_header, matte_path, options, timer, checksums)
+            with timer.stage('write'):
+                matte_layout = exr_chunks.read_layout(matte_path)
+                try:
+                    exr_chunks.write_multipart(output_path, [
+                        (base_layout, exr_chunks.get_part_name(base_layout, 'rgba')),
+                        (matte_layout, matte_channel_name)
+                    ], {0: checksums.chunk_digest()} if checksums is not None else None)
+                except (OSError, ValueError, struct.error) as e:
+                    raise Exception(f"Error writing output file: {str(e)}")
+        finally:
+            if os.path.exists(matte_path):
+                os.remove(matte_path)
+
+    def process_exr_file(self, base_folder, matte_info, base_file, matte_files, compression, matte_channel_name,
+                         options=None, timer=None, inputs=None, output_path=None, checksums=None, scan_root=None):
+        """Process a single EXR file with its matte channels
+
+        Time spent in each stage is added to timer when one is given. inputs holds the
+        contents of the input files, keyed as in get_input_paths, when they have been
+        prefetched, and output_path replaces the frame's path in the output folder.
+        Under an output root, the output folder keeps the sequence's path relative to
+        scan_root, as in a scanned run. The written data is hashed into checksums when
+        a FrameChecksums is given.
+        """
+        options = self.resolve_options(options)
+        timer = timer or StageTimer()
+
+        base_path = os.path.join(base_folder, base_file)
+        try:
+            with timer.stage('open'):
+                exr1 = self.open_input(base_path, inputs)
+        except Exception as e:
+            raise Exception(f"Error opening base file: {str(e)}")
+
+        try:
+            with timer.stage('open'):
+                header1 = exr1.header()
+                matte_inputs = self.open_matte_files(matte_info, matte_files, inputs)
+            try:
+                with timer.stage('header'):
+                    # Copy all existing channels except existing matte channels
+                    base_channels = [
+                        channel for channel in header1['channels']
+                        if not channel.startswith(matte_channel_name)
+                    ]
+                    matte_channels = {
+                        channel_name: self.get_output_channel_name(channel_name, matte_channel_name)
+                        for channel_name in matte_info
+                    }
+                    matte_types = {
+                        channel_name: self.get_matte_pixel_type(exr_matte, options['matte_pixel_type'])
+                        for channel_name, exr_matte in matte_inputs.items()
+                    }
+                    if output_path is None:
+                        # Create output directory
+                        output_dir = self.get_output_folder(base_folder, options['output_root'], scan_root)
+                        os.makedirs(output_dir, exist_ok=True)
+                        output_path = os.path.join(output_dir, base_file)
+
+                    base_layout = None
+                    if options['output_layout'] == 'multipart':
+                        base_layout = self.get_chunk_layout(base_path, header1, base_channels,
+                                                            inputs['base'] if inputs else None)
+
+                    if base_layout:
+                        matte_header = self.build_output_header(header1, [], matte_channels, matte_types,
+                                                                options['matte_compression'] or compression)
+                        matte_plan = self.get_read_plan(exr1, matte_inputs, [], matte_channels, matte_types)
+                    else:
+                        header_out = self.build_output_header(header1, base_channels, matte_channels,
+                                                              matte_types, compression)
+                        read_plan = self.get_read_plan(exr1, matte_inputs, base_channels, matte_channels,
+                                                       matte_types)
+
+                # A frame only appears under its name once it is complete, so an interrupted
+                # write never leaves a truncated file that looks like finished output
+                temp_path = self.get_temp_path(output_path)
+                try:
+                    if base_layout:
+                        self.write_multipart(base_layout, matte_plan, matte_header, temp_path,
+                                             matte_channel_name, options, timer, checksums)
+                    elif options['streaming'] and self.can_stream(header1):
+                        block_lines = self.get_block_lines(header1, header_out, options['block_lines'])
+                        self.write_streamed(read_plan, temp_path, header_out, block_lines, timer, checksums)
+                    else:
+                        self.write_full_frame(read_plan, temp_path, header_out, timer, checksums)
+                    with timer.stage('close'):
+                        os.replace(temp_path, output_path)
+                finally:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+            finally:
+                with timer.stage('close'):
+                    for exr_matte in matte_inputs.values():
+                        exr_matte.close()
+        finally:
+            with timer.stage('close'):
+                exr1.close()
+
+    def process_exr_file_wrapper(self, args, output_path=None):
+        """Wrapper for multiprocessing
+
+        Returns (base_folder, matte_info, base_file, error, info) where info holds the
+        stage timings of the frame, the input signatures recorded in the resume manifest
+        and, when verifying, the checksums of the written data.
+        """
+        base_folder, matte_info, base_file, matte_files, _, _, options = args
+        timer = StageTimer()
+        info = {'timings': timer.stages}
+        checksums = FrameChecksums() if options and options.get('verify') else None
+        try:
+            if options and options.get('resume'):
+                # Signatures are taken before reading, so a change during processing is caught next run
+                input_paths = self.get_input_paths(base_folder, matte_info, base_file, matte_files)
+                info['inputs'] = self.get_input_signatures(input_paths, options)
+            self.process_exr_file(*args, timer=timer, output_path=output_path, checksums=checksums)
+            if checksums is not None:
+                info['checksums'] = checksums.to_dict()
+            return base_folder, matte_info, base_file, None, info
+        except Exception as e:
+            return base_folder, matte_info, base_file, str(e), info
+
+    def create_sequence_contexts(self, pairs, compression, matte_channel_name, options):
+        """Data shared by every frame of a sequence, sent to each worker once"""
+        return [
+            {
+                'base_folder': pair['base_folder'],
+                'matte_info': pair['matte_folders'],
+                'compression': compression,
+                'matte_channel_name': matte_channel_name,
+                'options': options,
+                'output_folder': self.get_pair_output_folder(pair, options)
+            }
+            for pair in pairs
+        ]
+
+    def create_tasks(self, pairs, compression, matte_channel_name, options, manifests=None, in_place_manifests=None):
+        """Create one (sequence index, base_file, matte_files) task per frame
+
+        Frames the manifests show are up to date are left out, and so are base frames that
+        in_place_manifests (the manifests found in the base folders) show were embedded in
+        place from the current mattes, which are linked into the output folder instead.
+        Returns (tasks, skipped file count).
+        """
+        tasks = []
+        skipped = 0
+        settings = self.get_output_settings(compression, matte_channel_name, options)
+
+        # Create tasks for all pairs
+        for seq_id, pair in enumerate(pairs):
+            base_folder = pair['base_folder']
+            matte_info = pair['matte_folders']
+            manifest = manifests.get(base_folder) if manifests else None
+            in_place_manifest = in_place_manifests.get(base_folder) if in_place_manifests else None
+            
+            for frame in self.get_pair_frames(pair):
+                base_file = frame['base_file']
+                matte_files = frame['matte_files']
+
+                if manifest is not None:
+                    input_paths = self.get_input_paths(base_folder, matte_info, base_file, matte_files)
+                    if manifest.is_up_to_date(base_file, input_paths, settings, options['fingerprint']):
+                        skipped += 1
+                        continue
+                    if in_place_manifest and in_place_manifest.is_embedded_in_place(base_file, input_paths, settings,
+                                                                                      options['fingerprint']):
+                        if self.reuse_embedded_frame(pair, base_file, input_paths, options, manifest,
+                                                     in_place_manifest, settings):
+                            skipped += 1
+                            continue
+                
+                tasks.append((seq_id, base_file, matte_files))
+
+        return tasks, skipped
+
+    def reuse_embedded_frame(self, pair, base_file, input_paths, options, manifest, in_place_manifest, settings):
+        """Link a base frame embedded in place into the output folder and record it as up to date
+
+        Returns False when it cannot be linked or copied, and the frame is embedded again.
+        """
+        output_folder = self.get_pair_output_folder(pair, options)
+        try:
+            os.makedirs(output_folder, exist_ok=True)
+            self.link_output(input_paths['base'], os.path.join(output_folder, base_file))
+            inputs = self.get_input_signatures(input_paths, options)
+        except OSError:
+            return False
+        embedded = in_place_manifest.frames[base_file]
+        manifest.record(base_file, inputs, embedded['settings'], embedded.get('checksums'))
+        return True
+
+    def link_output(self, source_path, output_path):
+        """Hard-link a finished frame to an output path, copying it when it cannot be linked"""
+        temp_path = self.get_temp_path(output_path)
+        try:
+            try:
+                os.link(source_path, temp_path)
+            except OSError:
+                # Another volume, or a filesystem without hard links
+                shutil.copy2(source_path, temp_path)
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def create_output_folders(self, contexts, tasks, error_files):
+        """Create the output folder of every sequence with tasks, once per run
+
+        Stale temporary files left in existing folders by killed workers are removed.
+        Tasks of sequences whose folder cannot be created are added to error_files
+        and left out of the returned tasks.
+        """
+        failed = {}
+        for seq_id in dict.fromkeys(seq_id for seq_id, _, _ in tasks):
+            try:
+                os.makedirs(contexts[seq_id]['output_folder'], exist_ok=True)
+            except OSError as e:
+                failed[seq_id] = f"Error creating output folder: {str(e)}"
+                continue
+            # Other nodes or shards may be writing to the folder, so only old files are removed
+            remove_temp_files(contexts[seq_id]['output_folder'], STALE_TEMP_SECONDS)
+        if not failed:
+            return tasks
+
+        for seq_id, base_file, _ in tasks:
+            if seq_id in failed:
+                error_files.append((base_file, failed[seq_id]))
+        return [task for task in tasks if task[0] not in failed]
+
+    def read_header(self, path):
+        """Header of an EXR file"""
+        exr_in = OpenEXR.InputFile(path)
+        try:
+            return exr_in.header()
+        finally:
+            exr_in.close()
+
+    def estimate_frame_memory(self, context, base_file, matte_files):
+        """Estimated peak bytes of pixel data held while processing one frame
+
+        Counts the decoded base channels (none when multipart copies the base chunks) and
+        the decoded mattes with their converted and cropped copies, for the whole frame or
+        one streamed block, from the input headers. With the pipeline, the prefetched input
+        files are added.
+        """
+        options = context['options']
+        input_paths = self.get_input_paths(context['base_folder'], context['matte_info'], base_file, matte_files)
+        header1 = self.read_header(input_paths['base'])
+        data_window = header1['dataWindow']
+        width = data_window.max.x - data_window.min.x + 1
+        height = data_window.max.y - data_window.min.y + 1
+
+        rows = height
+        if options['streaming'] and self.can_stream(header1):
+            header_out = {'compression': self.get_compression(context['compression'])}
+            rows = min(height, self.get_block_lines(header1, header_out, options['block_lines']))
+
+        base_channels = [
+            channel for channel in header1['channels'] if not channel.startswith(context['matte_channel_name'])
+        ]
+        copies_base = options['output_layout'] == 'multipart' and len(base_channels) == len(header1['channels'])
+        total = 0
+        if not copies_base:
+            total += rows * width * sum(pixels.pixel_size(header1['channels'][channel].type)
+                                        for channel in base_channels)
+
+        cropped = copies_base and options['crop_mattes']
+        # Cropping finds the bounds on whole mattes, so it never streams
+        matte_rows = height if cropped else rows
+        for channel_name in context['matte_info']:
+            matte_type = self.read_header(input_paths[f'matte.{channel_name}'])['channels']['R'].type
+            output_type = matte_type
+            if options['matte_pixel_type'] != 'native':
+                output_type = Imath.PixelType(self.PIXEL_TYPES[options['matte_pixel_type']])
+            total += matte_rows * width * pixels.pixel_size(matte_type)
+            if output_type != matte_type:
+                total += matte_rows * width * pixels.pixel_size(output_type)
+            if cropped:
+                total += matte_rows * width * pixels.pixel_size(output_type)
+
+        if options['pipeline']:
+            input_bytes = sum(os.path.getsize(path) for path in input_paths.values())
+            # The queued frames, the one being encoded and the one the prefetch thread holds for a free slot
+            total += (options['prefetch_depth'] + 2) * input_bytes
+        return total
+
+    def estimate_batch_memory(self, contexts, batches, warnings, frame_costs=None):
+        """Estimated peak bytes of each batch, generated lazily
+
+        The frames of a batch are processed one at a time, and frames of a sequence are
+        expected to share a size, so each sequence is estimated once from the headers of
+        the first frame seen and kept in frame_costs, keyed by sequence index. Batches
+        over the memory budget on their own are warned about once per sequence, and
+        batches whose inputs cannot be read count as 0.
+        """
+        frame_costs = {} if frame_costs is None else frame_costs
+        for seq_id, frames in batches:
+            if seq_id not in frame_costs:
+                context = contexts[seq_id]
+                try:
+                    cost = self.estimate_frame_memory(context, *frames[0])
+                except Exception:
+                    # The worker reports the error when it opens the frame
+                    cost = 0
+                frame_costs[seq_id] = cost
+                if cost > context['options']['max_memory']:
+                    warnings.append(f"Frames of {context['base_folder']} need about {cost / 1024 ** 2:.0f} MB, "
+                                    f"more than the memory budget, and are processed one at a time")
+            yield frame_costs[seq_id]
+
+    def get_batch_size(self, frame_path, total_tasks, num_workers):
+        """Frames per batch for a sequence, from its frame size and the number of workers"""
+        try:
+            frame_bytes = max(os.path.getsize(frame_path), 1)
+        except OSError:
+            frame_bytes = self.BATCH_TARGET_BYTES
+        by_size = self.BATCH_TARGET_BYTES // frame_bytes
+        by_balance = math.ceil(total_tasks / (max(num_workers, 1) * self.BATCHES_PER_WORKER))
+        return max(1, min(by_size, by_balance, self.MAX_BATCH_FRAMES))
+
+    def get_batch_sizes(self, contexts, tasks, num_workers):
+        """Frames per batch of each sequence with tasks, keyed by sequence index"""
+        batch_sizes = {}
+        for seq_id, base_file, _ in tasks:
+            if seq_id not in batch_sizes:
+                first_frame = os.path.join(contexts[seq_id]['base_folder'], base_file)
+                batch_sizes[seq_id] = self.get_batch_size(first_frame, len(tasks), num_workers)
+        return batch_sizes
+
+    def create_batches(self, contexts, tasks, num_workers):
+        """Group tasks into (sequence index, [(base_file, matte_files), ...]) batches"""
+        frames_by_sequence = {}
+        for seq_id, base_file, matte_files in tasks:
+            frames_by_sequence.setdefault(seq_id, []).append((base_file, matte_files))
+
+        batch_sizes = self.get_batch_sizes(contexts, tasks, num_workers)
+        batches = []
+        for seq_id, frames in frames_by_sequence.items():
+            batch_size = batch_sizes[seq_id]
+            for start in range(0, len(frames), batch_size):
+                batches.append((seq_id, frames[start:start + batch_size]))
+        return batches
+
+    def process_task_batch(self, contexts, batch):
+        """Process a batch of frames from one sequence
+
+        Returns (sequence index, [(base_file, error, info), ...], profile stats, CPU seconds)
+        where the profile stats are the batch's raw cProfile stats when profiling, otherwise
+        None, and CPU seconds is the CPU time of the thread that processed the batch.
+        """
+        seq_id, frames = batch
+        context = contexts[seq_id]
+        cpu_start = time.thread_time()
+        profile_stats = None
+        if context['options'].get('profile') or context['options'].get('profile_collapsed'):
+            results, profile_stats = run_profiled(self.process_frames, context, frames)
+        else:
+            results = self.process_frames(context, frames)
+        if context['options'].get('max_memory'):
+            # Pooled arrays would otherwise stay at the largest frame's size, outside the budget
+            pixels.get_buffer_pool().clear()
+        return seq_id, results, profile_stats, time.thread_time() - cpu_start
+
+    def process_frames(self, context, frames):
+        """Process (base_file, matte_files) frames of one sequence context"""
+        if context['options'].get('pipeline'):
+            return self.process_frames_pipelined(context, frames)
+
+        results = []
+        for base_file, matte_files in frames:
+            _, _, _, error, info = self.process_exr_file_wrapper((
+                context['base_folder'],
+                context['matte_info'],
+                base_file,
+                matte_files,
+                context['compression'],
+                context['matte_channel_name'],
+                context['options']
+            ), os.path.join(context['output_folder'], base_file))
+            results.append((base_file, error, info))
+        return results
+
+    def process_frames_pipelined(self, context, frames):
+        """Process frames with a prefetch stage before and a write-behind stage after the encode
+
+        The inputs of up to prefetch_depth upcoming frames are read into memory while the
+        current frame is encoded into a staging file, and up to write_behind_depth encoded
+        frames are moved into the output folder in the background.
+        """
+        options = context['options']
+        pipeline = FramePipeline(options['prefetch_depth'], options['write_behind_depth'])
+        return pipeline.run(
+            frames,
+            partial(self.fetch_frame, context),
+            partial(self.encode_frame, context),
+            partial(self.store_frame, context['output_folder'])
+        )
+
+    def fetch_frame(self, context, frame):
+        """Prefetch stage: read every input of a frame into memory
+
+        Returns (timer, info, inputs, error) for encode_frame.
+        """
+        base_file, matte_files = frame
+        options = context['options']
+        timer = StageTimer()
+        info = {'timings': timer.stages}
+        input_paths = self.get_input_paths(context['base_folder'], context['matte_info'], base_file, matte_files)
+        try:
+            if options['resume']:
+                # Signatures are taken before reading, so a change during processing is caught next run
+                info['inputs'] = self.get_input_signatures(input_paths, options)
+            with timer.stage('fetch'):
+                inputs = {key: self.read_input(path) for key, path in input_paths.items()}
+        except Exception as e:
+            return timer, info, None, f"Error reading input file: {str(e)}"
+        return timer, info, inputs, None
+
+    def encode_frame(self, context, frame, fetched):
+        """Encode a prefetched frame into a staging file
+
+        Returns (base_file, timer, info, staging path, error) for store_frame.
+        """
+        base_file, matte_files = frame
+        timer, info, inputs, error = fetched
+        staging_path = None
+        if error is None:
+            checksums = FrameChecksums() if context['options']['verify'] else None
+            try:
+                staging_path = self.create_staging_file(context['options'])
+                self.process_exr_file(context['base_folder'], context['matte_info'], base_file, matte_files,
+                                      context['compression'], context['matte_channel_name'], context['options'],
+                                      timer=timer, inputs=inputs, output_path=staging_path, checksums=checksums)
+                if checksums is not None:
+                    info['checksums'] = checksums.to_dict()
+            except Exception as e:
+                error = str(e)
+        return base_file, timer, info, staging_path, error
+
+    def store_frame(self, output_dir, encoded):
+        """Write-behind stage: move an encoded frame into the output folder
+
+        Returns (base_file, error, info) like process_frames.
+        """
+        base_file, timer, info, staging_path, error = encoded
+        output_path = os.path.join(output_dir, base_file)
+        temp_path = self.get_temp_path(output_path)
+        try:
+            if error is None:
+                with timer.stage('store'):
+                    # Copied under a temporary name when staging is on another volume, then renamed
+                    shutil.move(staging_path, temp_path)
+                    os.replace(temp_path, output_path)
+        except (OSError, shutil.Error) as e:
+            error = f"Error writing output file: {str(e)}"
+        finally:
+            for path in (staging_path, temp_path):
+                if path and os.path.exists(path):
+                    os.remove(path)
+        return base_file, error, info
+
+    def create_staging_file(self, options):
+        """Create an empty staging file for an encoded frame, on local storage by default"""
+        fd, path = tempfile.mkstemp(suffix='.exr', prefix='embed_', dir=options['staging_dir'])
+        os.close(fd)
+        return path
+
+    def measure_compressions(self, context, base_file, matte_files, candidates):
+        """Encode seconds and output bytes of one frame with each candidate compression
+
+        The inputs are read into memory once, so only encoding and writing are compared.
+        Returns {compression: (seconds, bytes)}.
+        """
+        input_paths = self.get_input_paths(context['base_folder'], context['matte_info'], base_file, matte_files)
+        inputs = {key: self.read_input(path) for key, path in input_paths.items()}
+        measurements = {}
+        for compression in candidates:
+            staging_path = self.create_staging_file(context['options'])
+            try:
+                timer = StageTimer()
+                self.process_exr_file(context['base_folder'], context['matte_info'], base_file, matte_files,
+                                      compression, context['matte_channel_name'], context['options'],
+                                      timer=timer, inputs=inputs, output_path=staging_path)
+                measurements[compression] = (timer.stages.get('write', 0.0), os.path.getsize(staging_path))
+            finally:
+                os.remove(staging_path)
+        return measurements
+
+    def choose_compressions(self, executor, contexts, tasks, warnings):
+        """Choose the compression of every sequence with tasks by encoding sample frames
+
+        Sets the compression of each of their contexts and returns the choices keyed by
+        base folder, with the summed encode seconds and bytes of every candidate.
+        """
+        options = contexts[0]['options']
+        candidates = options['auto_candidates'] or DEFAULT_CANDIDATES
+        frames_by_sequence = {}
+        for seq_id, base_file, matte_files in tasks:
+            frames_by_sequence.setdefault(seq_id, []).append((base_file, matte_files))
+        # Samples carry their context, so they run on pools started with any contexts
+        samples = [
+            (seq_id, contexts[seq_id], base_file, matte_files, candidates)
+            for seq_id, frames in frames_by_sequence.items()
+            for base_file, matte_files in pick_sample_frames(frames, options['auto_samples'])
+        ]
+
+        totals = {}
+        for seq_id, measurements, error in executor.imap_unordered(measure_sample, samples):
+            if error:
+                continue
+            sequence_totals = totals.setdefault(seq_id, {})
+            for compression in candidates:
+                seconds, size = measurements[compression]
+                add_measurement(sequence_totals, compression, seconds, size)
+
+        choices = {}
+        for seq_id in frames_by_sequence:
+            context = contexts[seq_id]
+            if seq_id in totals:
+                context['compression'] = choose_compression(totals[seq_id], options['compression_objective'])
+            else:
+                # The frames report their own errors when they are processed
+                context['compression'] = candidates[0]
+                warnings.append(f"No sample frame of {context['base_folder']} could be encoded, "
+                                f"using {candidates[0]} compression")
+            choices[context['base_folder']] = {
+                'compression': context['compression'],
+                'samples': {
+                    compression: {'seconds': round(total['seconds'], 4), 'bytes': total['bytes']}
+                    for compression, total in totals.get(seq_id, {}).items()
+                }
+            }
+        return choices
+
+    def emit_sequence_done(self, events, run_report, base_folder):
+        sequence = run_report.get_sequence(base_folder)
+        events.emit(SequenceDone(base_folder, sequence['frames'], sequence['errors'],
+                                 sum(sequence['stages'].values())))
+
+    def count_done_elsewhere(self, work_queue, contexts, remaining, run_report, events):
+        """Account for the frames other nodes finished since the last call, returning how many
+
+        They are added to the run report, and sequences with no frames left get their
+        sequence_done event, also when this node processed none of their frames.
+        """
+        found = work_queue.take_done_elsewhere()
+        for seq_id, _ in found:
+            base_folder = contexts[seq_id]['base_folder']
+            run_report.add_done_elsewhere(base_folder)
+            remaining[seq_id] -= 1
+            if not remaining[seq_id]:
+                self.emit_sequence_done(events, run_report, base_folder)
+        return len(found)
+
+    def process_queued_batches(self, executor, work_queue, contexts, tasks, limit, warnings, stop_event):
+        """Yield batch results for the tasks this node claims from a work queue
+
+        Tasks are claimed as workers free up, so nodes sharing the queue split the work
+        by their speed. Once every task is claimed or done, frames leased by other nodes
+        are checked again every poll interval until they are done, or until their lease
+        expires and this node takes them over.
+        """
+        options = contexts[0]['options']
+        pending = {(seq_id, base_file): (seq_id, base_file, matte_files) for seq_id, base_file, matte_files in tasks}
+        batch_sizes = self.get_batch_sizes(contexts, tasks, executor.concurrency)
+        frame_costs = {}
+        while True:
+            batches = work_queue.claim_batches(pending, batch_sizes, stop_event)
+            costs = None
+            if options['max_memory']:
+                batches, costed_batches = itertools.tee(batches)
+                costs = self.estimate_batch_memory(contexts, costed_batches, warnings, frame_costs)
+            yield from executor.imap_limited(process_batch, batches, limit=limit, costs=costs,
+                                             budget=options['max_memory'])
+            if not work_queue.wait(pending, stop_event):
+                return
+
+    def read_output_checksums(self, output_path, expected):
+        """Decode an output frame and hash the channels recorded in expected
+
+        Part 0 of a multi-part output is hashed as raw chunks, like the base chunks
+        copied into it, and only the matte part is decoded.
+        """
+        actual = {'channels': {}}
+        if 'chunks' in expected:
+            layouts = exr_chunks.read_multipart_layouts(output_path)
+            digest = new_digest()
+            exr_chunks.hash_chunks(layouts[0], digest)
+            actual['chunks'] = digest.hexdigest()
+            exr_in = OpenEXR.InputFile(io.BytesIO(exr_chunks.extract_part(layouts[-1])))
+        else:
+            exr_in = OpenEXR.InputFile(output_path)
+        try:
+            header = exr_in.header()
+            channels = [channel for channel in expected['channels'] if channel in header['channels']]
+            if channels:
+                # Channels of lossy compressions are decoded too, which checks that they decode
+                for channel, data in zip(channels, exr_in.channels(channels)):
+                    actual['channels'][channel] = new_digest(data).hexdigest()
+        finally:
+            exr_in.close()
+        return actual
+
+    def verify_frames(self, context, frames):
+        """Compare (base_file, checksums) frames of one sequence with their outputs
+
+        Returns [(base_file, error), ...] where error is None for frames that match.
+        """
+        results = []
+        for base_file, checksums in frames:
+            output_path = os.path.join(context['output_folder'], base_file)
+            try:
+                error = compare_checksums(checksums, self.read_output_checksums(output_path, checksums))
+            except Exception as e:
+                error = f"output cannot be read: {str(e)}"
+            results.append((base_file, f"Verification failed: {error}" if error else None))
+        return results
+
+    def verify_outputs(self, executor, contexts, pairs, frame_checksums, manifests, progress_queue, stop_event):
+        """Verify every output frame of the run in the workers
+
+        frame_checksums holds the checksums of the frames written by this run, keyed by
+        (sequence index, base_file). Frames skipped by resume are verified with the
+        checksums in their manifest. Returns (failed frames as (sequence index, base_file,
+        error), base folders with every frame verified, verified frame count).
+        """
+        tasks = []
+        unverified = set()
+        for seq_id, pair in enumerate(pairs):
+            manifest = manifests.get(pair['base_folder']) if manifests else None
+            for frame in self.get_pair_frames(pair):
+                base_file = frame['base_file']
+                checksums = frame_checksums.get((seq_id, base_file))
+                if checksums is None and manifest is not None:
+                    checksums = manifest.frames.get(base_file, {}).get('checksums')
+                if checksums is None:
+                    # Failed, written by another node, or recorded without checksums
+                    unverified.add(seq_id)
+                else:
+                    tasks.append((seq_id, base_file, checksums))
+
+        remaining = {}
+        for seq_id, _, _ in tasks:
+            remaining[seq_id] = remaining.get(seq_id, 0) + 1
+        failed = []
+        verified_files = 0
+        last_progress = 0
+        for seq_id, results in executor.imap_unordered(verify_batch, self.create_batches(contexts, tasks,
+                                                                                        executor.concurrency)):
+            if stop_event.is_set():
+                break
+            for base_file, error in results:
+                verified_files += 1
+                remaining[seq_id] -= 1
+                if error:
+                    failed.append((seq_id, base_file, error))
+                    unverified.add(seq_id)
+
+            current_time = time.time()
+            if current_time - last_progress >= self.PROGRESS_INTERVAL or verified_files == len(tasks):
+                last_progress = current_time
+                progress_queue.put({
+                    'progress': 100,
+                    'status1': 'Verifying outputs...',
+                    'status2': f"Verified {verified_files}/{len(tasks)} files"
+                })
+
+        verified_folders = [
+            pair['base_folder'] for seq_id, pair in enumerate(pairs)
+            if seq_id not in unverified and not remaining.get(seq_id)
+        ]
+        return failed, verified_folders, verified_files
+
+    def write_profile(self, profile_collector, options, warnings):
+        """Write the merged worker profile to the files named in the options"""
+        if profile_collector.stats is None:
+            warnings.append("No profile data was collected")
+            return
+        try:
+            if options['profile']:
+                profile_collector.dump(options['profile'])
+            if options['profile_collapsed']:
+                profile_collector.write_collapsed(options['profile_collapsed'])
+        except OSError as e:
+            warnings.append(f"Error writing profile: {str(e)}")
 
     def process_sequences_from_cache(self, scan_results, compression, matte_channel_name, 
-                                   num_processes, progress_queue, result_queue, stop_event, replace_originals=False):
-        """Process sequences using cached scan results"""
-        
+                                   num_processes, progress_queue, result_queue, stop_event, replace_originals=False,
+                                   options=None, events=None):
+        """Process sequences using cached scan results
+
+        Besides the progress dicts on progress_queue, typed events are emitted to the
+        EventStream events when one is given.
+        """
+        options = self.resolve_options(options)
+        events = events or EventStream()
+
         pairs = scan_results.get('pairs', [])
         warnings = scan_results.get('warnings', [])
         
         if not pairs:
             progress_queue.put({'progress': 0, 'status1': "No sequences to process.", 'status2': ""})
+            events.emit(RunSummary(True, None, [], warnings))
             result_queue.put({'success': True})
             stop_event.set()
             return
@@ -281,61 +1556,210 @@ class EXRProcessor:
 
         start_time = time.time()
 
-        # Determine multiprocessing context
-        if sys.platform == 'win32':
-            mp_context = multiprocessing.get_context('spawn')
+        # Resume: skip frames whose output is complete and newer than its inputs
+        manifests = None
+        in_place_manifests = None
+        if options['resume']:
+            manifests = {
+                pair['base_folder']: SequenceManifest(self.get_pair_output_folder(pair, options)).load()
+                for pair in pairs
+            }
+            # Base folders replaced by their _embedded folder still hold its manifest
+            in_place_manifests = {pair['base_folder']: SequenceManifest(pair['base_folder']).load() for pair in pairs}
+        settings = self.get_output_settings(compression, matte_channel_name, options)
+        contexts = self.create_sequence_contexts(pairs, compression, matte_channel_name, options)
+        tasks, skipped_files = self.create_tasks(pairs, compression, matte_channel_name, options, manifests,
+                                                 in_place_manifests)
+        tasks = self.create_output_folders(contexts, tasks, error_files)
+        compression_choices = None
+        if compression == AUTO_COMPRESSION and tasks:
+            progress_queue.put({
+                'progress': 0,
+                'status1': 'Choosing compression...',
+                'status2': f"Encoding sample frames with {', '.join(options['auto_candidates'] or DEFAULT_CANDIDATES)}"
+            })
+            with PoolExecutor(options['engine'], num_processes, init_worker, (self, []),
+                              options['threads_per_process']) as sample_executor:
+                compression_choices = self.choose_compressions(sample_executor, contexts, tasks, warnings)
+        # Sequence contexts go to each worker once, batches only carry file names
+        executor = PoolExecutor(options['engine'], num_processes, init_worker, (self, contexts),
+                                options['threads_per_process'])
+        work_queue = None
+        if options['work_queue']:
+            output_paths = {
+                (seq_id, base_file): os.path.join(contexts[seq_id]['output_folder'], base_file)
+                for seq_id, base_file, _ in tasks
+            }
+            # Frames marked done by an earlier run are processed again when their inputs changed
+            fingerprints = {
+                (seq_id, base_file): self.get_frame_fingerprint(
+                    contexts[seq_id], base_file, matte_files, self.get_recorded_settings(settings, contexts[seq_id]))
+                for seq_id, base_file, matte_files in tasks
+            }
+            work_queue = WorkQueue(options['work_queue'], output_paths, options['node_id'], options['lease_ttl'],
+                                   fingerprints)
+            batches = []
         else:
-            mp_context = multiprocessing
+            batches = self.create_batches(contexts, tasks, executor.concurrency)
+        processed_files = skipped_files + len(error_files)
+        if skipped_files:
+            progress_queue.put({
+                'progress': (processed_files / total_files) * 100,
+                'status1': f"Skipped {skipped_files} up-to-date files",
+                'status2': f"Progress: {processed_files}/{total_files} files",
+                'processed': processed_files
+            })
+        last_manifest_save = time.time()
+        last_progress = 0
+        run_report = RunReport()
+        run_report.skipped_files = skipped_files
+        profile_collector = ProfileCollector()
 
-        with mp_context.Pool(processes=num_processes) as pool:
-            tasks = []
-            
-            # Create tasks for all pairs
-            for pair in pairs:
-                base_folder = pair['base_folder']
-                matte_info = pair['matte_folders']
-                
-                for i, base_file in enumerate(pair['base_files']):
-                    # Get corresponding matte files for this frame
-                    matte_files = {channel: files[i] for channel, files in pair['matte_files'].items()}
-                    
-                    tasks.append((
-                        base_folder,
-                        matte_info,
-                        base_file,
-                        matte_files,
-                        compression,
-                        matte_channel_name
-                    ))
+        autoscaler = None
+        if options['autoscale']:
+            # The pool has num_processes workers, the autoscaler decides how many of them are busy
+            autoscaler = WorkerAutoscaler(executor.num_workers,
+                                          cpu_count=max((os.cpu_count() or 1) // executor.threads_per_process, 1))
+
+        # Memory budget: batches wait until their estimated pixel data fits next to the running ones
+        batch_costs = None
+        if options['max_memory']:
+            batch_costs = list(self.estimate_batch_memory(contexts, batches, warnings))
+        limit = (lambda: autoscaler.active) if autoscaler is not None else None
+        # Frames still to come from each sequence, for its sequence_done event
+        remaining = {}
+        for seq_id, _, _ in tasks:
+            remaining[seq_id] = remaining.get(seq_id, 0) + 1
+        events.emit(RunStarted(len(pairs), total_files, skipped_files, executor.num_workers, options['engine'],
+                               compression))
+        # Write checksums of the frames processed, keyed by (sequence index, base_file)
+        frame_checksums = {}
+        verification = None
+
+        with executor, work_queue or contextlib.nullcontext():
+            if work_queue is not None:
+                batch_results = self.process_queued_batches(executor, work_queue, contexts, tasks, limit,
+                                                            warnings, stop_event)
+            elif autoscaler is not None or batch_costs is not None:
+                batch_results = executor.imap_limited(process_batch, batches, limit=limit, costs=batch_costs,
+                                                      budget=options['max_memory'])
+            else:
+                batch_results = executor.imap_unordered(process_batch, batches)
 
             # Process files
-            for result in pool.imap_unordered(self.process_exr_file_wrapper, tasks):
+            for seq_id, results, profile_stats, cpu_seconds in batch_results:
                 if stop_event.is_set():
                     break
-                    
-                processed_files += 1
-                base_folder, _, base_file, error = result
 
-                if error:
-                    error_files.append((base_file, str(error)))
+                profile_collector.add(profile_stats)
+                if autoscaler is not None:
+                    autoscaler.record(len(results), cpu_seconds / executor.threads_per_process)
+
+                base_folder = contexts[seq_id]['base_folder']
+                for base_file, error, info in results:
+                    processed_files += 1
+                    run_report.add_frame(base_folder, info.get('timings'), error)
+                    if work_queue is not None:
+                        work_queue.complete(seq_id, base_file, error)
+                    remaining[seq_id] -= 1
+                    if error:
+                        events.emit(FrameFailed(base_folder, base_file, str(error)))
+                    else:
+                        events.emit(FrameDone(base_folder, base_file, info.get('timings')))
+                    if not remaining[seq_id]:
+                        self.emit_sequence_done(events, run_report, base_folder)
+                    if error:
+                        error_files.append((base_file, str(error)))
+                        continue
+                    if options['verify']:
+                        frame_checksums[(seq_id, base_file)] = info['checksums']
+                    if manifests is not None:
+                        manifests[base_folder].record(base_file, info['inputs'],
+                                                      self.get_recorded_settings(settings, contexts[seq_id]),
+                                                      info.get('checksums'))
+                if work_queue is not None:
+                    # Frames other nodes finished count as processed
+                    processed_files += self.count_done_elsewhere(work_queue, contexts, remaining, run_report, events)
+
+                # Save periodically so a killed run keeps most of its progress
+                if manifests is not None and time.time() - last_manifest_save > self.MANIFEST_SAVE_INTERVAL:
+                    for manifest in manifests.values():
+                        manifest.save()
+                    last_manifest_save = time.time()
+
+                # Progress is aggregated over batches and sent at most every PROGRESS_INTERVAL
+                current_time = time.time()
+                if current_time - last_progress < self.PROGRESS_INTERVAL and processed_files != total_files:
+                    continue
+                last_progress = current_time
 
                 progress = (processed_files / total_files) * 100
                 status1 = f"Processing: {os.path.basename(base_folder)}"
                 status2 = f"Progress: {processed_files}/{total_files} files"
-                progress_queue.put({
+                progress_data = {
                     'progress': progress, 
                     'status1': status1, 
                     'status2': status2,
                     'processed': processed_files
-                })
+                }
+                if autoscaler is not None:
+                    progress_data['status2'] += f" ({autoscaler.active} workers)"
+                    progress_data['workers'] = autoscaler.active
+                progress_queue.put(progress_data)
 
                 # Update timing information
-                elapsed_time = time.time() - start_time
-                avg_time_per_file = elapsed_time / processed_files
+                elapsed_time = current_time - start_time
+                avg_time_per_file = elapsed_time / (processed_files - skipped_files)
                 estimated_time_left = avg_time_per_file * (total_files - processed_files)
                 progress_queue.put({
                     'timing': f"Elapsed: {elapsed_time:.2f}s, Avg: {avg_time_per_file:.2f}s/file, Est. remaining: {estimated_time_left:.2f}s"
                 })
+                events.emit(Progress(processed_files, total_files, elapsed_time,
+                                     (processed_files - skipped_files) / elapsed_time if elapsed_time else 0.0,
+                                     estimated_time_left, autoscaler.active if autoscaler is not None else None))
+
+            if work_queue is not None:
+                # Frames found done in the passes after this node's last batch
+                processed_files += self.count_done_elsewhere(work_queue, contexts, remaining, run_report, events)
+
+            # Outputs are re-opened in the workers, which already hold the sequence contexts
+            if options['verify'] and not stop_event.is_set():
+                verification = self.verify_outputs(executor, contexts, pairs, frame_checksums, manifests,
+                                                   progress_queue, stop_event)
+
+        run_report.finish()
+        verified_folders = []
+        if verification is not None:
+            failed_files, verified_folders, verified_files = verification
+            for seq_id, base_file, error in failed_files:
+                events.emit(FrameFailed(contexts[seq_id]['base_folder'], base_file, error))
+                error_files.append((base_file, error))
+            run_report.verification = {
+                'frames': verified_files,
+                'failed': len(failed_files),
+                'verified_sequences': len(verified_folders)
+            }
+        if compression_choices is not None:
+            run_report.compression = {
+                'objective': options['compression_objective'],
+                'sequences': compression_choices
+            }
+        if work_queue is not None:
+            run_report.work_queue = {
+                'node': work_queue.node_id,
+                'done_elsewhere': work_queue.done_elsewhere,
+                'reclaimed': work_queue.reclaimed
+            }
+        if options['max_memory']:
+            run_report.memory = {'budget': options['max_memory'], 'peak_estimate': executor.peak_cost}
+        if autoscaler is not None:
+            run_report.workers = autoscaler.active
+            run_report.autoscale = autoscaler.history
+        if tasks and (options['profile'] or options['profile_collapsed']):
+            self.write_profile(profile_collector, options, warnings)
+        if manifests is not None:
+            for manifest in manifests.values():
+                manifest.save()
 
         # Handle original replacement if requested and no errors occurred
         processed_pairs = []
@@ -349,9 +1773,21 @@ class EXRProcessor:
                 
                 for pair in pairs:
                     base_folder = pair['base_folder']
-                    embedded_folder = base_folder + '_embedded'
+                    embedded_folder = self.get_pair_output_folder(pair, options)
+
+                    if pair.get('skipped_frames'):
+                        # Frames outside the index were never embedded and only exist in the originals
+                        warnings.append(f"Originals kept for {base_folder}: frames "
+                                        f"{', '.join(pair['skipped_frames'])} were not embedded")
+                        continue
+                    if options['verify'] and base_folder not in verified_folders:
+                        warnings.append(f"Originals kept for {base_folder}: not every frame could be verified")
+                        continue
                     
                     if os.path.exists(embedded_folder):
+                        # Temporary files of killed workers must not end up among the originals
+                        remove_temp_files(embedded_folder)
+
                         # Move original base folder to trash
                         send2trash(base_folder)
                         
@@ -360,8 +1796,8 @@ class EXRProcessor:
                             if os.path.exists(matte_folder):
                                 send2trash(matte_folder)
                         
-                        # Rename embedded folder to original name
-                        os.rename(embedded_folder, base_folder)
+                        # Rename embedded folder to original name, copying when it is on another volume
+                        shutil.move(embedded_folder, base_folder)
                         processed_pairs.append(base_folder)
                         
             except Exception as e:
@@ -383,13 +1819,17 @@ class EXRProcessor:
                 for file, error in error_files:
                     error_message += f"{file}: {error}\n"
                     
+            events.emit(RunSummary(False, run_report.to_dict()['run'], error_files, warnings))
             result_queue.put({
                 'error_files': error_files,
                 'warnings': warnings,
-                'error_message': error_message
+                'error_message': error_message,
+                'skipped_files': skipped_files,
+                'report': run_report.to_dict()
             })
         else:
-            success_result = {'success': True}
+            success_result = {'success': True, 'skipped_files': skipped_files, 'report': run_report.to_dict()}
+            events.emit(RunSummary(True, success_result['report']['run'], error_files, warnings))
             if replace_originals and processed_pairs:
                 success_result['replaced_originals'] = True
                 success_result['processed_pairs'] = processed_pairs
@@ -397,6 +1837,145 @@ class EXRProcessor:
 
         stop_event.set()
 
+    def get_changed_sequences(self, paths):
+        """Changed EXR paths grouped by the base folder of the sequence they belong to"""
+        sequences = {}
+        for path in paths:
+            folder = os.path.dirname(path)
+            matte_match = MATTE_FOLDER_PATTERN.match(os.path.basename(folder))
+            if matte_match:
+                folder = os.path.join(os.path.dirname(folder), matte_match.group(1))
+            sequences.setdefault(folder, set()).add(path)
+        return sequences
+
+    def is_output_current(self, output_path, input_paths):
+        """Whether an output exists and is newer than all of its inputs"""
+        try:
+            output_mtime = os.stat(output_path).st_mtime_ns
+            return all(os.stat(path).st_mtime_ns <= output_mtime for path in input_paths.values())
+        except OSError:
+            return False
+
+    def process_changes(self, executor, folder, paths, compression, matte_channel_name, options,
+                        compression_choices=None, events=None):
+        """Embed the frames with an input among the changed paths, returning a summary dict
+
+        Each affected sequence is rescanned on its own. Frames are matched across channels
+        as with the 'intersection' frame policy, so a frame whose other channels have not
+        landed yet is processed once they do, and frames whose output is already newer
+        than their inputs are left alone. With auto compression, the choice of each
+        sequence is kept in compression_choices and only made on its first change.
+        Frame and sequence events are emitted to events when given.
+        """
+        events = events or EventStream()
+        pairs = []
+        for base_folder, changed in sorted(self.get_changed_sequences(paths).items()):
+            # Scan warnings repeat on every change while a sequence is still being rendered
+            pair = self.find_sequence_pair(base_folder, folder, [], 'intersection')
+            if pair is None:
+                continue
+            output_folder = self.get_pair_output_folder(pair, options)
+            frames = []
+            for frame in pair['frames']:
+                input_paths = self.get_input_paths(base_folder, pair['matte_folders'],
+                                                   frame['base_file'], frame['matte_files'])
+                if changed.isdisjoint(input_paths.values()):
+                    continue
+                if not self.is_output_current(os.path.join(output_folder, frame['base_file']), input_paths):
+                    frames.append(frame)
+            if frames:
+                pairs.append(self.reduce_pair(pair, frames))
+
+        summary = {'sequences': [pair['base_folder'] for pair in pairs], 'processed': 0, 'error_files': [],
+                   'warnings': []}
+        if not pairs:
+            return summary
+
+        contexts = self.create_sequence_contexts(pairs, compression, matte_channel_name, options)
+        tasks, _ = self.create_tasks(pairs, compression, matte_channel_name, options)
+        tasks = self.create_output_folders(contexts, tasks, summary['error_files'])
+        if compression == AUTO_COMPRESSION:
+            compression_choices = {} if compression_choices is None else compression_choices
+            new_tasks = [task for task in tasks if contexts[task[0]]['base_folder'] not in compression_choices]
+            if new_tasks:
+                compression_choices.update(self.choose_compressions(executor, contexts, new_tasks,
+                                                                    summary['warnings']))
+            for context in contexts:
+                if context['base_folder'] in compression_choices:
+                    context['compression'] = compression_choices[context['base_folder']]['compression']
+        manifests = None
+        if options['resume']:
+            manifests = {context['base_folder']: SequenceManifest(context['output_folder']).load()
+                         for context in contexts}
+        settings = self.get_output_settings(compression, matte_channel_name, options)
+
+        # Batches carry their sequence context, since the warm pool was started before it was known
+        batches = [(seq_id, contexts[seq_id], frames)
+                   for seq_id, frames in self.create_batches(contexts, tasks, executor.concurrency)]
+        run_report = RunReport()
+        for seq_id, results, _, _ in executor.imap_unordered(process_context_batch, batches):
+            base_folder = contexts[seq_id]['base_folder']
+            for base_file, error, info in results:
+                run_report.add_frame(base_folder, info.get('timings'), error)
+                if error:
+                    events.emit(FrameFailed(base_folder, base_file, str(error)))
+                    summary['error_files'].append((os.path.join(base_folder, base_file), str(error)))
+                else:
+                    events.emit(FrameDone(base_folder, base_file, info.get('timings')))
+                    summary['processed'] += 1
+                    if manifests is not None:
+                        manifests[base_folder].record(base_file, info['inputs'],
+                                                      self.get_recorded_settings(settings, contexts[seq_id]))
+        if manifests is not None:
+            for manifest in manifests.values():
+                manifest.save()
+        for base_folder in run_report.sequences:
+            self.emit_sequence_done(events, run_report, base_folder)
+        return summary
+
+    def watch_folder(self, folder, compression, matte_channel_name, num_processes, progress_queue, stop_event,
+                     options=None, settle_seconds=DEFAULT_SETTLE_SECONDS, polling=False,
+                     prune_patterns=None, scan_threads=DEFAULT_SCAN_THREADS, events=None):
+        """Embed frames as they land under folder, until stop_event is set
+
+        Changes come from inotify, or from listing the tree when polling or where inotify
+        is unavailable, and are processed once they stopped changing for settle_seconds.
+        The worker pool stays up between changes. Each batch of changes is reported on
+        progress_queue as a dict with a 'watch' summary, and frames and sequences are
+        emitted to events when given.
+        """
+        options = self.resolve_options(options)
+        watcher = create_watcher(folder, DEFAULT_PRUNE_PATTERNS + (prune_patterns or []), scan_threads, polling)
+        debouncer = Debouncer(settle_seconds)
+        compression_choices = {}
+        # Wake up often enough to pick up settled files soon after they settle
+        wake_seconds = min(max(settle_seconds / 4, 0.05), 1.0)
+        executor = PoolExecutor(options['engine'], num_processes, init_worker, (self, []),
+                                options['threads_per_process'])
+        try:
+            with executor:
+                method = 'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'
+                progress_queue.put({'status1': f"Watching {folder}", 'status2': f"Change detection: {method}"})
+                while not stop_event.is_set():
+                    debouncer.add(watcher.read_changes(wake_seconds))
+                    settled = debouncer.settled()
+                    if not settled:
+                        continue
+                    start_time = time.time()
+                    summary = self.process_changes(executor, folder, settled, compression, matte_channel_name,
+                                                   options, compression_choices, events)
+                    if not summary['sequences']:
+                        continue
+                    summary['seconds'] = time.time() - start_time
+                    names = ', '.join(os.path.basename(base_folder) for base_folder in summary['sequences'])
+                    progress_queue.put({
+                        'status1': f"Embedded {summary['processed']} file(s) of {names}",
+                        'status2': f"{len(summary['error_files'])} error(s)",
+                        'watch': summary
+                    })
+        finally:
+            watcher.close()
+
     def process_sequences(self, folder, compression, rgb_mode, matte_channel_name, 
                         num_processes, progress_queue, result_queue, stop_event):
         """Legacy method for backward compatibility - auto-detects and processes"""
@@ -418,6 +1997,46 @@ class EXRProcessor:
             num_processes, progress_queue, result_queue, stop_event
         )
 
+# Worker process state set by init_worker
+_worker_state = {}
+
+
+def init_worker(processor, contexts):
+    """Pool initializer keeping the processor and sequence contexts in the worker"""
+    _worker_state['processor'] = processor
+    _worker_state['contexts'] = contexts
+
+
+def process_batch(batch):
+    """Pool task processing one batch with the worker's sequence contexts"""
+    return _worker_state['processor'].process_task_batch(_worker_state['contexts'], batch)
+
+
+def verify_batch(batch):
+    """Pool task verifying a (sequence index, [(base_file, checksums), ...]) batch of outputs"""
+    seq_id, frames = batch
+    return seq_id, _worker_state['processor'].verify_frames(_worker_state['contexts'][seq_id], frames)
+
+
+def measure_sample(sample):
+    """Pool task encoding a sample frame with each candidate compression
+
+    Returns (sequence index, {compression: (seconds, bytes)}, error).
+    """
+    seq_id, context, base_file, matte_files, candidates = sample
+    try:
+        return seq_id, _worker_state['processor'].measure_compressions(context, base_file, matte_files,
+                                                                       candidates), None
+    except Exception as e:
+        return seq_id, None, str(e)
+
+
+def process_context_batch(batch):
+    """Pool task processing a (sequence index, context, frames) batch that carries its own context"""
+    seq_id, context, frames = batch
+    return _worker_state['processor'].process_task_batch({seq_id: context}, (seq_id, frames))
+
+
 if __name__ == '__main__':
     multiprocessing.freeze_support()
     if sys.platform == 'win32':
@@ -0,0 +1,187 @@
+"""
+Per-sequence manifest of completed output frames
+Records the inputs and settings each output was written from, so interrupted
+runs can skip frames that are already complete and up to date. An input whose
+size and modification time changed is compared by a fingerprint when one was
+recorded: its header and chunk offset table, or a hash of its whole contents.
+Header fingerprints hash the whole file when its chunk sizes do not follow its
+pixels: fixed size compressions, chunks stored uncompressed, and tiled or deep
+parts. New pixels compressing to the same size in every chunk are still missed.
+"""
+import os
+import json
+import hashlib
+from . import exr_chunks
+from .temp_files import temp_path
+
+try:
+    import xxhash
+except ImportError:  # Optional, content hashes fall back to blake2b
+    xxhash = None
+
+MANIFEST_NAME = '.exr_matte_embed_manifest.json'
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# 'stat' treats any input whose size or mtime changed as changed, 'header' compares the
+# header and chunk offset table of touched inputs, and 'content' their whole contents
+FINGERPRINTS = ['stat', 'header', 'content']
+DEFAULT_FINGERPRINT = 'stat'
+
+
+def content_hash_type():
+    """Hash used for new content fingerprints, xxh3 when the xxhash package is installed"""
+    return 'xxh3_128' if xxhash is not None else 'blake2b'
+
+
+def hash_file(path, hash_type='blake2b'):
+    """Content hash of a file"""
+    digest = xxhash.xxh3_128() if hash_type == 'xxh3_128' else hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_header(path):
+    """Hash of the headers and chunk offset tables of an EXR, or of all of it when they do not identify it"""
+    block = exr_chunks.read_header_block(path)
+    if block is None:
+        return hash_file(path)
+    return hashlib.blake2b(block, digest_size=16).hexdigest()
+
+
+def file_signature(path, fingerprint=DEFAULT_FINGERPRINT):
+    """Size, mtime and the fingerprint of a file"""
+    stat = os.stat(path)
+    signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if fingerprint == 'header':
+        signature['header'] = hash_header(path)
+    elif fingerprint == 'content':
+        signature['hash_type'] = content_hash_type()
+        signature['hash'] = hash_file(path, signature['hash_type'])
+    return signature
+
+
+def fingerprint_matches(recorded, path, fingerprint):
+    """Compare a file with the fingerprint recorded for it, False when none was recorded"""
+    try:
+        if fingerprint == 'header' and 'header' in recorded:
+            return hash_header(path) == recorded['header']
+        if fingerprint == 'content' and 'hash' in recorded:
+            # Hashes recorded before the hash type was stored are blake2b
+            hash_type = recorded.get('hash_type', 'blake2b')
+            if hash_type == 'xxh3_128' and xxhash is None:
+                return False
+            return hash_file(path, hash_type) == recorded['hash']
+    except (OSError, ValueError, KeyError):
+        pass
+    return False
+
+
+def settings_match(recorded, settings):
+    """Compare recorded settings with a run's, where a list in the run's settings accepts any of its values"""
+    if set(recorded) != set(settings):
+        return False
+    return all(
+        recorded[key] in value if isinstance(value, list) else recorded[key] == value
+        for key, value in settings.items()
+    )
+
+
+class SequenceManifest:
+    """Manifest stored inside one output folder, keyed by output file name"""
+    VERSION = 1
+
+    def __init__(self, output_folder):
+        self.output_folder = output_folder
+        self.manifest_file = os.path.join(output_folder, MANIFEST_NAME)
+        self.frames = {}
+        self.dirty = False
+
+    def load(self):
+        try:
+            with open(self.manifest_file, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                self.frames = data.get('frames', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.frames = {}
+        return self
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(self.output_folder, exist_ok=True)
+        temp_file = temp_path(self.manifest_file)
+        with open(temp_file, 'w') as f:
+            json.dump({'version': self.VERSION, 'frames': self.frames}, f)
+        os.replace(temp_file, self.manifest_file)
+        self.dirty = False
+
+    def record(self, output_file, inputs, settings, checksums=None):
+        """Record a completed output with the input signatures it was written from
+
+        checksums are the write checksums of a verified run, kept so frames skipped by
+        a later run can still be verified.
+        """
+        output_path = os.path.join(self.output_folder, output_file)
+        self.frames[output_file] = {
+            'inputs': inputs,
+            'settings': settings,
+            'output': file_signature(output_path)
+        }
+        if checksums is not None:
+            self.frames[output_file]['checksums'] = checksums
+        self.dirty = True
+
+    def input_matches(self, recorded, path, output_mtime_ns, fingerprint):
+        """Check an input against its recorded signature"""
+        try:
+            current = file_signature(path)
+        except OSError:
+            return False
+        if current['size'] != recorded['size']:
+            return False
+        # Unchanged since it was recorded, and older than the output written from it
+        if current['mtime_ns'] == recorded['mtime_ns'] and current['mtime_ns'] <= output_mtime_ns:
+            return True
+        # A touched file with the same fingerprint is still up to date
+        return fingerprint_matches(recorded, path, fingerprint)
+
+    def get_entry(self, output_file, input_paths, settings):
+        """Entry of an output written with settings from inputs with the keys of input_paths"""
+        entry = self.frames.get(output_file)
+        if not entry or not settings_match(entry['settings'], settings) or set(entry['inputs']) != set(input_paths):
+            return None
+        return entry
+
+    def is_up_to_date(self, output_file, input_paths, settings, fingerprint=DEFAULT_FINGERPRINT, ignored_inputs=()):
+        """Check whether an output is complete and was written from the current inputs
+
+        input_paths maps an input key to its path, matching the keys passed to record().
+        Inputs whose key is in ignored_inputs are not compared.
+        """
+        entry = self.get_entry(output_file, input_paths, settings)
+        if entry is None:
+            return False
+
+        try:
+            output = file_signature(os.path.join(self.output_folder, output_file))
+        except OSError:
+            return False
+        if output != entry['output']:
+            return False
+
+        return all(
+            self.input_matches(entry['inputs'][key], path, output['mtime_ns'], fingerprint)
+            for key, path in input_paths.items() if key not in ignored_inputs
+        )
+
+    def is_embedded_in_place(self, output_file, input_paths, settings, fingerprint=DEFAULT_FINGERPRINT):
+        """Check whether a base frame is an output of this manifest written from the current mattes
+
+        After originals are replaced, the manifest of an _embedded folder is inside the
+        base folder and its outputs are the base frames. Such a frame needs no embedding
+        while it is still the file that was written and its mattes did not change.
+        """
+        return self.is_up_to_date(output_file, input_paths, settings, fingerprint, ignored_inputs=('base',))
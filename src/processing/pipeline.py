@@ -0,0 +1,109 @@
+"""
+Prefetch and write-behind pipeline for the frames of a batch
+A prefetch thread reads the inputs of upcoming frames while the calling thread
+decodes and encodes the current one, and a write-behind thread moves finished
+outputs into place, so storage latency overlaps with compression work.
+"""
+import queue
+import threading
+
+DEFAULT_PREFETCH_DEPTH = 2
+DEFAULT_WRITE_BEHIND_DEPTH = 2
+
+# Seconds between checks for a stopped pipeline while waiting on a queue
+WAIT_INTERVAL = 0.1
+
+_DONE = object()
+
+
+def put_unless_stopped(items, item, stop):
+    """Put item on a bounded queue, giving up once stop is set"""
+    while not stop.is_set():
+        try:
+            items.put(item, timeout=WAIT_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def get_unless_stopped(items, stop):
+    """Get the next item from a queue, or _DONE once stop is set"""
+    while not stop.is_set():
+        try:
+            return items.get(timeout=WAIT_INTERVAL)
+        except queue.Empty:
+            pass
+    return _DONE
+
+
+class FramePipeline:
+    """Runs fetch, process and store over items on three threads
+
+    At most prefetch_depth fetched items wait for processing and at most
+    write_behind_depth processed items wait to be stored, which bounds the memory
+    held by the pipeline. fetch and store are expected to report their own errors
+    in the values they return; an exception in any stage stops the pipeline and is
+    raised from run() once the threads have finished.
+    """
+
+    def __init__(self, prefetch_depth=DEFAULT_PREFETCH_DEPTH, write_behind_depth=DEFAULT_WRITE_BEHIND_DEPTH):
+        self.prefetch_depth = max(prefetch_depth, 1)
+        self.write_behind_depth = max(write_behind_depth, 1)
+
+    def run(self, items, fetch, process, store):
+        """Return [store(process(item, fetch(item))) for item in items], computed in a pipeline"""
+        fetched = queue.Queue(self.prefetch_depth)
+        processed = queue.Queue(self.write_behind_depth)
+        stop = threading.Event()
+        errors = []
+        results = []
+
+        def prefetch():
+            try:
+                for item in items:
+                    if not put_unless_stopped(fetched, (item, fetch(item)), stop):
+                        return
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                put_unless_stopped(fetched, _DONE, stop)
+
+        def write_behind():
+            # Keeps draining after an error so the processing thread never blocks on a full queue
+            while True:
+                entry = processed.get()
+                if entry is _DONE:
+                    return
+                if errors:
+                    continue
+                try:
+                    results.append(store(entry))
+                except BaseException as e:
+                    errors.append(e)
+                    stop.set()
+
+        threads = [
+            threading.Thread(target=prefetch, name='prefetch', daemon=True),
+            threading.Thread(target=write_behind, name='write-behind', daemon=True)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                entry = get_unless_stopped(fetched, stop)
+                if entry is _DONE:
+                    break
+                processed.put(process(*entry))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            stop.set()
+            processed.put(_DONE)
+            for thread in threads:
+                thread.join()
+
+        if errors:
+            raise errors[0]
+        return results
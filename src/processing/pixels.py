@@ -0,0 +1,88 @@
+"""
+NumPy helpers for EXR pixel data
+"""
+import threading
+import numpy as np
+import Imath
+
+# NumPy dtype for each Imath.PixelType value
+NUMPY_DTYPES = {
+    Imath.PixelType.UINT: np.uint32,
+    Imath.PixelType.HALF: np.float16,
+    Imath.PixelType.FLOAT: np.float32
+}
+
+
+def pixel_size(pixel_type):
+    """Bytes per pixel of an Imath.PixelType"""
+    return np.dtype(NUMPY_DTYPES[pixel_type.v]).itemsize
+
+
+def to_array(data, pixel_type, width, height):
+    """View raw channel bytes as a (height, width) array without copying"""
+    return np.frombuffer(data, dtype=NUMPY_DTYPES[pixel_type.v]).reshape(height, width)
+
+
+class BufferPool:
+    """Reusable arrays keyed by name
+
+    Each name keeps one flat allocation that grows to the largest size requested,
+    so frames of the same or smaller size reuse its memory instead of allocating.
+    An array is only valid until the same name is requested again.
+    """
+
+    def __init__(self):
+        self.buffers = {}
+
+    def get(self, name, shape, dtype):
+        """Array of the given shape and dtype backed by the pooled memory for name"""
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape))
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.dtype != dtype or buffer.size < size:
+            buffer = np.empty(size, dtype=dtype)
+            self.buffers[name] = buffer
+        return buffer[:size].reshape(shape)
+
+    def clear(self):
+        """Release every pooled array"""
+        self.buffers = {}
+
+    def copy(self, name, array, dtype=None):
+        """Copy (and convert) an array into the pooled memory for name"""
+        out = self.get(name, array.shape, dtype or array.dtype)
+        # Values beyond HALF range become infinity, as in OpenEXR's own conversion
+        with np.errstate(over='ignore'):
+            np.copyto(out, array, casting='unsafe')
+        return out
+
+
+# Worker threads of the thread and hybrid engines each keep their own pool
+_local = threading.local()
+
+
+def get_buffer_pool():
+    """BufferPool of the calling thread, kept across frames"""
+    pool = getattr(_local, 'pool', None)
+    if pool is None:
+        pool = _local.pool = BufferPool()
+    return pool
+
+
+def nonzero_bounds(arrays):
+    """Bounding box (x_min, y_min, x_max, y_max) of pixels that are non-zero in any array
+
+    Coordinates are array indices. Returns None when every pixel is zero.
+    """
+    mask = None
+    for array in arrays:
+        nonzero = array != 0
+        mask = nonzero if mask is None else mask | nonzero
+    if mask is None:
+        return None
+
+    rows = np.flatnonzero(mask.any(axis=1))
+    if not len(rows):
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]), int(rows[-1])
@@ -0,0 +1,112 @@
+"""
+Profiling of frame processing inside the workers
+Each batch runs under its own cProfile profiler in the worker that processes it,
+and the raw stats come back with the batch result. The parent merges them into
+one pstats file, and can write them as collapsed stacks for flame graph tools.
+"""
+import os
+import cProfile
+import pstats
+
+# Call paths below this many seconds are left out of collapsed stacks
+COLLAPSED_MIN_SECONDS = 1e-6
+COLLAPSED_MAX_DEPTH = 64
+
+
+class ProfileData:
+    """Raw cProfile stats in the form pstats.Stats loads"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def run_profiled(func, *args):
+    """Run func under cProfile, returning (result, raw stats)
+
+    The stats are None when another profiler is already active in this thread.
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return func(*args), None
+    try:
+        result = func(*args)
+    finally:
+        profiler.disable()
+    profiler.create_stats()
+    return result, profiler.stats
+
+
+def format_function(func):
+    """Frame label for a pstats function key"""
+    filename, line, name = func
+    if filename == '~':
+        label = name
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{line})"
+    # Semicolons separate frames in collapsed stacks
+    return label.replace(';', ':')
+
+
+class ProfileCollector:
+    """Merges the raw stats returned by workers"""
+
+    def __init__(self):
+        self.stats = None
+        self.batches = 0
+
+    def add(self, raw_stats):
+        if not raw_stats:
+            return
+        self.batches += 1
+        if self.stats is None:
+            self.stats = pstats.Stats(ProfileData(raw_stats))
+        else:
+            self.stats.add(ProfileData(raw_stats))
+
+    def dump(self, path):
+        """Write the merged stats as a pstats file"""
+        self.stats.dump_stats(path)
+
+    def collapsed_stacks(self):
+        """Approximate stacks with their self time in microseconds
+
+        cProfile only records caller/callee pairs, so each function's time is split
+        over its callers in proportion to the time spent under each of them.
+        """
+        stats = self.stats.stats
+        children = {}
+        for func, (_, _, _, _, callers) in stats.items():
+            for caller, edge in callers.items():
+                children.setdefault(caller, {})[func] = edge[3]
+
+        stacks = {}
+
+        def walk(func, path, seconds):
+            _, _, self_seconds, cumulative, _ = stats[func]
+            if cumulative <= 0 or seconds < COLLAPSED_MIN_SECONDS:
+                return
+            key = ';'.join(format_function(frame) for frame in path)
+            stacks[key] = stacks.get(key, 0.0) + seconds * self_seconds / cumulative
+            if len(path) >= COLLAPSED_MAX_DEPTH:
+                return
+            for child, child_seconds in children.get(func, {}).items():
+                # Recursive calls are already counted in the outer frame
+                if child in stats and child not in path:
+                    walk(child, path + [child], seconds * child_seconds / cumulative)
+
+        for func, (_, _, _, cumulative, callers) in stats.items():
+            if not any(caller in stats for caller in callers):
+                walk(func, [func], cumulative)
+
+        return {stack: int(seconds * 1e6) for stack, seconds in stacks.items() if int(seconds * 1e6) > 0}
+
+    def write_collapsed(self, path):
+        """Write collapsed stacks, one 'frame;frame;frame microseconds' line each"""
+        with open(path, 'w') as f:
+            for stack, microseconds in sorted(self.collapsed_stacks().items()):
+                f.write(f"{stack} {microseconds}\n")
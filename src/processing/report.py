@@ -0,0 +1,173 @@
+"""
+Per-stage timings of embedded frames and the run report built from them
+Workers time each stage of a frame and return the timings with the result; the
+parent aggregates them per sequence and per run, and writes them as JSON or CSV.
+"""
+import os
+import csv
+import json
+import time
+from contextlib import contextmanager
+
+# Stages of one frame, in processing order
+STAGES = ['open', 'header', 'read_base', 'read_mattes', 'write', 'close']
+STAGE_LABELS = {
+    'open': 'Open inputs',
+    'header': 'Build header',
+    'read_base': 'Read base',
+    'read_mattes': 'Read mattes',
+    # Finding the bounds of the mattes and copying the crops for --crop-mattes
+    'crop': 'Crop mattes',
+    'write': 'Encode + write',
+    'close': 'Close',
+    # Pipelined processing runs these alongside the stages of other frames
+    'fetch': 'Prefetch inputs',
+    'store': 'Write-behind',
+    # Hashing written data for --verify
+    'checksum': 'Checksum'
+}
+
+
+class StageTimer:
+    """Accumulates seconds spent in each stage of a frame"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+
+class RunReport:
+    """Stage timings aggregated per sequence and for the whole run"""
+
+    def __init__(self):
+        self.sequences = {}
+        self.start_time = time.time()
+        self.end_time = None
+        self.skipped_files = 0
+        # Active worker count chosen by the autoscaler and its measurement windows
+        self.workers = None
+        self.autoscale = []
+        # Memory budget and the highest estimated memory of the batches running at once, in bytes
+        self.memory = None
+        # Node id and frame counts of a run sharing a work queue with other nodes
+        self.work_queue = None
+        # Objective and per-sequence choices of automatic compression selection
+        self.compression = None
+        # Frames verified after writing and how many of them failed
+        self.verification = None
+
+    def get_sequence(self, base_folder):
+        return self.sequences.setdefault(base_folder, {
+            'frames': 0,
+            'errors': 0,
+            'done_elsewhere': 0,
+            'stages': dict.fromkeys(STAGES, 0.0)
+        })
+
+    def add_frame(self, base_folder, timings, error=None):
+        sequence = self.get_sequence(base_folder)
+        sequence['frames'] += 1
+        if error:
+            sequence['errors'] += 1
+        for name, seconds in (timings or {}).items():
+            sequence['stages'][name] = sequence['stages'].get(name, 0.0) + seconds
+
+    def add_done_elsewhere(self, base_folder):
+        """Count a frame of a sequence another node sharing the work queue finished"""
+        self.get_sequence(base_folder)['done_elsewhere'] += 1
+
+    def finish(self):
+        self.end_time = time.time()
+
+    @staticmethod
+    def summarize(frames, stages):
+        """Totals, per-frame averages and shares of each stage"""
+        total = sum(stages.values())
+        return {
+            'frames': frames,
+            'frame_seconds': round(total, 4),
+            'stages': {
+                name: {
+                    'seconds': round(seconds, 4),
+                    'per_frame_ms': round(seconds / frames * 1000, 3) if frames else 0.0,
+                    'share': round(seconds / total, 4) if total else 0.0
+                }
+                for name, seconds in stages.items()
+            },
+            'slowest_stage': max(stages, key=stages.get) if total else None
+        }
+
+    def to_dict(self):
+        run_stages = dict.fromkeys(STAGES, 0.0)
+        for sequence in self.sequences.values():
+            for name, seconds in sequence['stages'].items():
+                run_stages[name] = run_stages.get(name, 0.0) + seconds
+        frames = sum(sequence['frames'] for sequence in self.sequences.values())
+        wall_seconds = (self.end_time or time.time()) - self.start_time
+
+        run = self.summarize(frames, run_stages)
+        run.update({
+            'wall_seconds': round(wall_seconds, 4),
+            'files_per_second': round(frames / wall_seconds, 3) if wall_seconds else 0.0,
+            'errors': sum(sequence['errors'] for sequence in self.sequences.values()),
+            'skipped_files': self.skipped_files
+        })
+        if self.workers is not None:
+            run['workers'] = self.workers
+            run['autoscale'] = self.autoscale
+        if self.memory is not None:
+            run['memory'] = self.memory
+        if self.work_queue is not None:
+            run['work_queue'] = self.work_queue
+        if self.compression is not None:
+            run['compression'] = self.compression
+        if self.verification is not None:
+            run['verification'] = self.verification
+        return {
+            'run': run,
+            'sequences': [
+                {
+                    'sequence': base_folder,
+                    'errors': sequence['errors'],
+                    **self.summarize(sequence['frames'], sequence['stages']),
+                    **({'done_elsewhere': sequence['done_elsewhere']} if sequence['done_elsewhere'] else {})
+                }
+                for base_folder, sequence in self.sequences.items()
+            ]
+        }
+
+
+def write_report(report, path):
+    """Write a report dict as CSV when path ends in .csv, JSON otherwise"""
+    if os.path.splitext(path)[1].lower() != '.csv':
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return
+
+    stage_names = list(report['run']['stages'])
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['sequence', 'frames', 'errors', 'frame_seconds'] +
+                        [f'{name}_seconds' for name in stage_names] + ['slowest_stage'])
+        rows = report['sequences'] + [{'sequence': 'TOTAL', **report['run']}]
+        for row in rows:
+            writer.writerow([row['sequence'], row['frames'], row['errors'], row['frame_seconds']] +
+                            [row['stages'].get(name, {}).get('seconds', 0.0) for name in stage_names] +
+                            [row['slowest_stage'] or ''])
+
+
+def format_stage_summary(report):
+    """One line per stage with its share of frame time, slowest first"""
+    stages = report['run']['stages']
+    lines = []
+    for name in sorted(stages, key=lambda name: stages[name]['seconds'], reverse=True):
+        stage = stages[name]
+        lines.append(f"{STAGE_LABELS.get(name, name)}: {stage['share']:.0%} ({stage['per_frame_ms']:.1f} ms/frame)")
+    return lines
@@ -0,0 +1,79 @@
+"""
+Parallel directory scanner for finding EXR sequences
+Lists directories with os.scandir on a thread pool, so trees on high-latency
+network filesystems are listed many directories at a time, and prunes folders
+that can never contain sequences to process.
+"""
+import os
+import queue
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+
+# Our own output folders and hidden folders (.snapshot, .git, ...) are never scanned
+DEFAULT_PRUNE_PATTERNS = ['*_embedded', '.*']
+DEFAULT_SCAN_THREADS = 8
+
+
+def list_directory(path):
+    """List sub-directory names and EXR file names of a directory, or None if unreadable
+
+    Directory checks use the file type cached on each DirEntry, so no stat call is
+    made per entry on filesystems that report types while listing.
+    """
+    dirs = []
+    exr_files = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.name)
+                elif entry.name.endswith('.exr'):
+                    exr_files.append(entry.name)
+    except OSError:
+        return None
+    return {'dirs': sorted(dirs), 'exr_files': sorted(exr_files)}
+
+
+class DirectoryScanner:
+    """Walks a tree top-down with a thread pool of directory listings"""
+
+    def __init__(self, list_dir=None, max_workers=DEFAULT_SCAN_THREADS, prune_patterns=None):
+        self.list_dir = list_dir or list_directory
+        self.max_workers = max(max_workers, 1)
+        self.prune_patterns = DEFAULT_PRUNE_PATTERNS if prune_patterns is None else prune_patterns
+
+    def is_pruned(self, name):
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.prune_patterns)
+
+    def walk(self, top):
+        """List every directory under top, returning (path, dirs, exr_files) sorted by path
+
+        dirs only contains the sub-directories that were not pruned.
+        """
+        results = []
+        # Finished listings are handed back through a queue, so each completion is O(1)
+        completed = queue.Queue()
+
+        def list_path(path):
+            try:
+                completed.put((path, self.list_dir(path), None))
+            except Exception as e:
+                completed.put((path, None, e))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            executor.submit(list_path, top)
+            pending = 1
+            while pending:
+                path, listing, error = completed.get()
+                pending -= 1
+                if error is not None:
+                    raise error
+                if listing is None:
+                    continue
+                dirs = [name for name in listing['dirs'] if not self.is_pruned(name)]
+                results.append((path, dirs, listing['exr_files']))
+                for name in dirs:
+                    executor.submit(list_path, os.path.join(path, name))
+                    pending += 1
+        results.sort(key=lambda result: result[0])
+        return results
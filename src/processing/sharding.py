@@ -0,0 +1,94 @@
+"""
+Splitting a scan across farm nodes
+Frame ranges keep the frames whose number falls in any range, and shard i of n
+splits the remaining frames of all sequences into n contiguous parts of about
+equal estimated bytes. A saved scan plan lets every node shard the same frame
+list without scanning again.
+"""
+import os
+import json
+import time
+
+PLAN_VERSION = 1
+# Keys of the scan results stored in a plan
+PLAN_KEYS = ['pairs', 'warnings', 'total_sequences', 'total_files']
+
+
+def parse_frame_ranges(spec):
+    """Parse '1001-1100,1200' into [(1001, 1100), (1200, 1200)]"""
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, separator, end = part.partition('-')
+        try:
+            start = int(start)
+            end = int(end) if separator else start
+        except ValueError:
+            raise ValueError(f"Invalid frame range '{part}', expected a frame or first-last")
+        if end < start:
+            raise ValueError(f"Invalid frame range '{part}', the last frame is before the first")
+        ranges.append((start, end))
+    if not ranges:
+        raise ValueError("No frame ranges given")
+    return ranges
+
+
+def parse_shard(spec):
+    """Parse 'i/n' into (i, n), with shards numbered from 1"""
+    index, separator, count = spec.partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected i/n such as 3/16")
+    if not separator or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{spec}', i must be between 1 and n")
+    return index, count
+
+
+def in_frame_ranges(frame, ranges):
+    try:
+        number = int(frame)
+    except ValueError:
+        return False
+    return any(start <= number <= end for start, end in ranges)
+
+
+def assign_shards(weights, count):
+    """Shard index (from 0) of each weighted item, splitting the items in order into count
+    contiguous parts of about equal total weight"""
+    total = sum(weights)
+    if not total:
+        return [min(i * count // max(len(weights), 1), count - 1) for i in range(len(weights))]
+    shards = []
+    position = 0
+    for weight in weights:
+        # Each item goes to the shard its midpoint falls in
+        shards.append(min(int((position + weight / 2) * count / total), count - 1))
+        position += weight
+    return shards
+
+
+def save_plan(path, scan_results, folder_path, frame_policy):
+    """Write scan results as a plan other nodes can load instead of scanning"""
+    plan = {
+        'version': PLAN_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'folder_path': os.path.abspath(folder_path),
+        'frame_policy': frame_policy,
+        **{key: scan_results[key] for key in PLAN_KEYS}
+    }
+    temp_file = f'{path}.{os.getpid()}.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump(plan, f)
+    os.replace(temp_file, path)
+
+
+def load_plan(path):
+    """Read a plan written by save_plan, returning it in the form of scan results"""
+    with open(path, 'r') as f:
+        plan = json.load(f)
+    if plan.get('version') != PLAN_VERSION:
+        raise ValueError(f"Unsupported plan version in {path}")
+    return plan
@@ -0,0 +1,55 @@
+"""
+Temporary names for files written before being renamed into place
+Outputs, manifests and queue markers are written under a temporary name next to
+their final path and renamed once complete. Several processes, threads and
+nodes sharing a filesystem may write the same path, and containers on different
+hosts often share pids, so the names carry the hostname, pid and thread id.
+Files left under a temporary name by killed workers are removed once stale.
+"""
+import os
+import time
+import socket
+import threading
+
+TEMP_SUFFIX = '.tmp'
+# Seconds after their last write that temporary files are taken to be left by a killed
+# writer; files still being written, maybe by another node, are newer
+STALE_TEMP_SECONDS = 3600
+
+
+def unique_suffix():
+    """Suffix of temporary names no other thread or node on the shared filesystem uses"""
+    return f'{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}'
+
+
+def temp_path(path):
+    """Temporary name a file is written under before being renamed to path"""
+    return f'{path}.{unique_suffix()}{TEMP_SUFFIX}'
+
+
+def is_temp_file(name):
+    return name.endswith(TEMP_SUFFIX)
+
+
+def remove_temp_files(folder, max_age=None):
+    """Remove the temporary files in a folder, only those older than max_age seconds when given
+
+    Returns the number of files removed.
+    """
+    removed = 0
+    try:
+        entries = list(os.scandir(folder))
+    except OSError:
+        return 0
+    now = time.time()
+    for entry in entries:
+        if not is_temp_file(entry.name) or not entry.is_file(follow_symlinks=False):
+            continue
+        try:
+            if max_age is not None and now - entry.stat().st_mtime < max_age:
+                continue
+            os.remove(entry.path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
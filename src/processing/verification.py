@@ -0,0 +1,86 @@
+"""
+Checksums of written frames for verifying outputs
+Channel data is hashed as it is handed to OpenEXR, and chunks copied unchanged
+from a base file are hashed as they are copied. Verifying an output decodes it
+again and compares the hashes, so no second copy of the pixels is kept. Lossy
+compressions change the decoded values, so their channels are only checked to
+decode.
+"""
+import hashlib
+import Imath
+
+DIGEST_SIZE = 16
+
+# Compressions whose decoded pixels differ from the written ones, with the pixel types they
+# change; b44 and pxr24 store the other types losslessly
+LOSSY_PIXEL_TYPES = {
+    Imath.Compression.PXR24_COMPRESSION: {Imath.PixelType.FLOAT},
+    Imath.Compression.B44_COMPRESSION: {Imath.PixelType.HALF},
+    Imath.Compression.B44A_COMPRESSION: {Imath.PixelType.HALF},
+    Imath.Compression.DWAA_COMPRESSION: {Imath.PixelType.HALF, Imath.PixelType.FLOAT, Imath.PixelType.UINT},
+    Imath.Compression.DWAB_COMPRESSION: {Imath.PixelType.HALF, Imath.PixelType.FLOAT, Imath.PixelType.UINT}
+}
+
+
+def new_digest(data=b''):
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE)
+
+
+def is_exact(compression_value, pixel_type_value):
+    """Check whether a channel decodes to exactly the data written with a compression"""
+    return pixel_type_value not in LOSSY_PIXEL_TYPES.get(compression_value, ())
+
+
+class FrameChecksums:
+    """Hashes of the data written to one output frame
+
+    Channels are hashed in the order their data is written, so a frame written in
+    blocks of scanlines hashes the same as one written whole.
+    """
+
+    def __init__(self):
+        self.channels = {}
+        # Channels of a lossy compression, only checked to decode
+        self.inexact = set()
+        self.chunks = None
+
+    def add_channels(self, channel_data, header):
+        compression = header['compression'].v
+        for channel, data in channel_data.items():
+            if not is_exact(compression, header['channels'][channel].type.v):
+                self.inexact.add(channel)
+                continue
+            digest = self.channels.get(channel)
+            if digest is None:
+                digest = self.channels[channel] = new_digest()
+            digest.update(data)
+
+    def chunk_digest(self):
+        """Digest of the raw chunks copied into part 0 of a multi-part output"""
+        self.chunks = new_digest()
+        return self.chunks
+
+    def to_dict(self):
+        """Hex digests keyed by channel, None for channels only checked to decode"""
+        checksums = {'channels': dict.fromkeys(self.inexact)}
+        checksums['channels'].update({channel: digest.hexdigest() for channel, digest in self.channels.items()})
+        if self.chunks is not None:
+            checksums['chunks'] = self.chunks.hexdigest()
+        return checksums
+
+
+def compare_checksums(expected, actual):
+    """Differences between recorded and recomputed checksums, as a message or None"""
+    problems = []
+    missing = sorted(set(expected['channels']) - set(actual['channels']))
+    if missing:
+        problems.append(f"missing channels {', '.join(missing)}")
+    mismatched = sorted(
+        channel for channel, digest in expected['channels'].items()
+        if digest is not None and channel in actual['channels'] and actual['channels'][channel] != digest
+    )
+    if mismatched:
+        problems.append(f"checksum mismatch in {', '.join(mismatched)}")
+    if 'chunks' in expected and actual.get('chunks') != expected['chunks']:
+        problems.append("copied base chunks differ")
+    return '; '.join(problems) or None
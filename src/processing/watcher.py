@@ -0,0 +1,209 @@
+"""
+Change detection for watch mode
+InotifyWatcher reports EXR files created, written or moved in under a tree as
+the kernel sees them (Linux, through ctypes), and PollingWatcher compares file
+sizes and modification times between listings elsewhere. The Debouncer holds
+changed files back until they stop changing, so frames still being rendered or
+copied are not read half-written.
+"""
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from .scanner import DirectoryScanner, DEFAULT_PRUNE_PATTERNS, DEFAULT_SCAN_THREADS
+
+# Seconds a file must stay unchanged before it is processed
+DEFAULT_SETTLE_SECONDS = 2.0
+# Seconds between listings of the polling watcher
+DEFAULT_POLL_SECONDS = 2.0
+
+# inotify event flags from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class PollingWatcher:
+    """Finds changed EXR files by listing the tree every poll_seconds"""
+
+    def __init__(self, root, prune_patterns=None, scan_threads=DEFAULT_SCAN_THREADS,
+                 poll_seconds=DEFAULT_POLL_SECONDS):
+        self.root = root
+        self.scanner = DirectoryScanner(None, scan_threads,
+                                        DEFAULT_PRUNE_PATTERNS if prune_patterns is None else prune_patterns)
+        self.poll_seconds = poll_seconds
+        self.snapshot = self.take_snapshot()
+        self.last_poll = time.monotonic()
+
+    def take_snapshot(self):
+        snapshot = {}
+        for folder, _, exr_files in self.scanner.walk(self.root):
+            for name in exr_files:
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def read_changes(self, timeout):
+        """Wait up to timeout seconds, returning the paths changed since the last call"""
+        remaining = self.poll_seconds - (time.monotonic() - self.last_poll)
+        if remaining > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(remaining, 0))
+        snapshot = self.take_snapshot()
+        self.last_poll = time.monotonic()
+        changed = {path for path, state in snapshot.items() if self.snapshot.get(path) != state}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Reports changed EXR files from inotify events, watching every folder of the tree"""
+
+    def __init__(self, root, prune_patterns=None, scan_threads=DEFAULT_SCAN_THREADS):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.scanner = DirectoryScanner(None, scan_threads,
+                                        DEFAULT_PRUNE_PATTERNS if prune_patterns is None else prune_patterns)
+        self.folders = {}
+        self.root = root
+        try:
+            self.watch_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def watch_folder(self, folder):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                raise OSError(error, "Too many folders for inotify, raise fs.inotify.max_user_watches")
+            # The folder was removed or cannot be read
+            return
+        self.folders[wd] = folder
+
+    def watch_tree(self, top):
+        """Watch top and its folders, returning the EXR files already in them"""
+        paths = set()
+        for folder, _, exr_files in self.scanner.walk(top):
+            self.watch_folder(folder)
+            paths.update(os.path.join(folder, name) for name in exr_files)
+        return paths
+
+    def read_changes(self, timeout):
+        """Wait up to timeout seconds for events, returning the paths they touched
+
+        After an event queue overflow every file of the tree is returned, so nothing is missed.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0'))
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                changed.update(self.watch_tree(self.root))
+                continue
+            if mask & IN_IGNORED:
+                self.folders.pop(wd, None)
+                continue
+            folder = self.folders.get(wd)
+            if folder is None or not name:
+                continue
+            path = os.path.join(folder, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not self.scanner.is_pruned(name):
+                    # Files may have landed before the new folder was watched
+                    changed.update(self.watch_tree(path))
+            elif name.endswith('.exr'):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def create_watcher(root, prune_patterns=None, scan_threads=DEFAULT_SCAN_THREADS, polling=False,
+                   poll_seconds=DEFAULT_POLL_SECONDS):
+    """inotify watcher on Linux unless polling is requested or inotify is unavailable"""
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root, prune_patterns, scan_threads)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, prune_patterns, scan_threads, poll_seconds)
+
+
+class Debouncer:
+    """Holds changed paths until their size and modification time stay the same for settle_seconds"""
+
+    def __init__(self, settle_seconds=DEFAULT_SETTLE_SECONDS):
+        self.settle_seconds = settle_seconds
+        # Path -> (time of the last change seen, (size, mtime) then)
+        self.pending = {}
+
+    def add(self, paths):
+        now = time.monotonic()
+        for path in paths:
+            self.pending[path] = (now, self.file_state(path))
+
+    @staticmethod
+    def file_state(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def settled(self):
+        """Remove and return the paths that stopped changing, dropping deleted ones"""
+        now = time.monotonic()
+        ready = set()
+        for path, (changed_at, state) in list(self.pending.items()):
+            if now - changed_at < self.settle_seconds:
+                continue
+            current = self.file_state(path)
+            if current is None:
+                del self.pending[path]
+            elif current == state:
+                del self.pending[path]
+                ready.add(path)
+            else:
+                # Checked once more a settle period later
+                self.pending[path] = (now, current)
+        return ready
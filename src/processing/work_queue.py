@@ -0,0 +1,213 @@
+"""
+Work queue shared by several nodes through lease files
+Nodes pointed at the same queue folder on a shared filesystem claim frames by
+creating a lease file with O_EXCL, which only one of them can do, and mark them
+done once written. A node renews its leases while it runs, so the lease of a
+node that died stops being renewed and another node takes the frame over once
+the lease is older than the lease TTL. Node clocks are expected to be in sync.
+Done markers record the fingerprint of the frame's inputs and settings, so a
+frame whose inputs changed since it was marked done is processed again.
+"""
+import os
+import json
+import time
+import socket
+import hashlib
+import threading
+from .temp_files import unique_suffix, temp_path
+
+DEFAULT_LEASE_TTL = 60.0
+# Seconds between passes over frames leased by other nodes
+POLL_INTERVAL = 1.0
+
+LEASE_SUFFIX = '.lease'
+DONE_SUFFIX = '.done'
+
+
+def default_node_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class WorkQueue:
+    """Claims (sequence index, base_file, matte_files) tasks through lease files in queue_dir
+
+    Frames are identified by their output path, so every node must see the outputs
+    under the same path. fingerprints holds a fingerprint of the inputs and settings
+    of each task, keyed like output_paths; done markers with another fingerprint are
+    stale.
+    """
+
+    def __init__(self, queue_dir, output_paths, node_id=None, lease_ttl=DEFAULT_LEASE_TTL, fingerprints=None):
+        self.queue_dir = queue_dir
+        # Output path of each task, keyed by (sequence index, base_file)
+        self.output_paths = output_paths
+        self.fingerprints = fingerprints or {}
+        self.node_id = node_id or default_node_id()
+        self.lease_ttl = lease_ttl
+        self.held = set()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.heartbeat = None
+        # Frames done by other nodes, and leases of dead nodes taken over
+        self.done_elsewhere = 0
+        self.reclaimed = 0
+        # (sequence index, base_file) of frames found done by other nodes since take_done_elsewhere()
+        self.found_done = []
+
+    def __enter__(self):
+        os.makedirs(self.queue_dir, exist_ok=True)
+        self.heartbeat = threading.Thread(target=self.renew_leases, name='lease-heartbeat', daemon=True)
+        self.heartbeat.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.heartbeat.join()
+        # Leases of frames this node will not finish go back to the queue
+        with self.lock:
+            for key in self.held:
+                self.release(key)
+            self.held.clear()
+        return False
+
+    def frame_key(self, seq_id, base_file):
+        path = os.path.abspath(self.output_paths[(seq_id, base_file)])
+        return hashlib.sha1(path.encode('utf-8')).hexdigest()
+
+    def lease_file(self, key):
+        return os.path.join(self.queue_dir, key + LEASE_SUFFIX)
+
+    def done_file(self, key):
+        return os.path.join(self.queue_dir, key + DONE_SUFFIX)
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def release(self, key):
+        """Remove the lease of key unless another node took it over after it expired"""
+        try:
+            with open(self.lease_file(key)) as f:
+                owner = json.load(f).get('node')
+        except (OSError, ValueError):
+            return
+        if owner == self.node_id:
+            self.remove(self.lease_file(key))
+
+    def renew_leases(self):
+        """Touch every held lease each third of the TTL"""
+        while not self.stopped.wait(self.lease_ttl / 3):
+            with self.lock:
+                held = list(self.held)
+            for key in held:
+                try:
+                    os.utime(self.lease_file(key))
+                except OSError:
+                    pass
+
+    def is_done(self, seq_id, base_file):
+        """Check for a done marker of a frame written from its current inputs
+
+        Markers of failed frames do not count, so a frame that failed for a passing
+        reason is tried again by the other nodes and by later runs.
+        """
+        try:
+            with open(self.done_file(self.frame_key(seq_id, base_file))) as f:
+                marker = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return not marker.get('error') and marker.get('fingerprint') == self.fingerprints.get((seq_id, base_file))
+
+    def create_lease(self, key):
+        try:
+            fd = os.open(self.lease_file(key), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'node': self.node_id, 'claimed': time.time()}, f)
+        return True
+
+    def take_over_expired(self, key):
+        """Remove the lease of key when it has not been renewed within the TTL"""
+        lease_file = self.lease_file(key)
+        try:
+            if time.time() - os.stat(lease_file).st_mtime < self.lease_ttl:
+                return False
+            # Renaming first means only one node removes the expired lease
+            expired_file = f'{lease_file}.{unique_suffix()}.expired'
+            os.rename(lease_file, expired_file)
+        except (FileNotFoundError, PermissionError):
+            return False
+        self.remove(expired_file)
+        return True
+
+    def claim(self, seq_id, base_file):
+        """Lease a frame, returning False when it is done or leased by a live node"""
+        key = self.frame_key(seq_id, base_file)
+        if self.is_done(seq_id, base_file):
+            return False
+        if not self.create_lease(key):
+            if not self.take_over_expired(key) or not self.create_lease(key):
+                return False
+            self.reclaimed += 1
+        # Another node may have finished the frame just before its lease was removed
+        if self.is_done(seq_id, base_file):
+            self.remove(self.lease_file(key))
+            return False
+        with self.lock:
+            self.held.add(key)
+        return True
+
+    def complete(self, seq_id, base_file, error=None):
+        """Mark a claimed frame done, recording the error of a failed frame for whoever looks at the queue"""
+        key = self.frame_key(seq_id, base_file)
+        temp_file = temp_path(self.done_file(key))
+        with open(temp_file, 'w') as f:
+            json.dump({'node': self.node_id, 'error': str(error) if error else None,
+                       'fingerprint': self.fingerprints.get((seq_id, base_file))}, f)
+        os.replace(temp_file, self.done_file(key))
+        with self.lock:
+            self.held.discard(key)
+        self.release(key)
+
+    def claim_batches(self, pending, batch_sizes, stop_event=None):
+        """Claim pending tasks as they are requested, yielding (sequence index, frames) batches
+
+        pending maps (sequence index, base_file) to the task. One pass is made over it:
+        claimed tasks and tasks found done are removed, and tasks leased by other nodes
+        stay for the next pass.
+        """
+        seq_id = None
+        frames = []
+        for key, task in list(pending.items()):
+            if stop_event is not None and stop_event.is_set():
+                break
+            if frames and key[0] != seq_id:
+                yield seq_id, frames
+                frames = []
+            if self.claim(*key):
+                del pending[key]
+                seq_id = key[0]
+                frames.append(task[1:])
+                if len(frames) >= batch_sizes[seq_id]:
+                    yield seq_id, frames
+                    frames = []
+            elif self.is_done(*key):
+                del pending[key]
+                self.done_elsewhere += 1
+                self.found_done.append(key)
+        if frames:
+            yield seq_id, frames
+
+    def take_done_elsewhere(self):
+        """Frames found done by other nodes since the last call"""
+        found, self.found_done = self.found_done, []
+        return found
+
+    def wait(self, pending, stop_event):
+        """Wait before the next pass while tasks remain, returning False when there is none"""
+        if not pending:
+            return False
+        return not stop_event.wait(POLL_INTERVAL)
@@ -30,5 +30,8 @@ class Config:
             'matte_channel_name': 'matte',
             'last_folder_path': '',
             'compression': 'piz',
-            'replace_originals': False
+            'replace_originals': False,
+            'verify': False,
+            'frame_policy': 'strict',
+            'engine': 'process'
         }
\ No newline at end of file
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from ..processing.scanner import list_directory
+
+# Listings taken within this window of the directory's mtime are not trusted, since
+# an entry added in the same timestamp tick would not change the mtime again
+RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+
+class ScanIndex:
+    """On-disk cache of directory listings for one scan root
+
+    Stores each directory's mtime, sub-directories, EXR files and their parsed
+    frame numbers. A rescan only re-lists directories whose mtime changed.
+    """
+    VERSION = 1
+
+    def __init__(self, root, config_dir, frame_parser=None, force_rescan=False):
+        self.root = os.path.abspath(root)
+        self.index_dir = os.path.join(config_dir, 'scan_index')
+        root_hash = hashlib.sha1(self.root.encode('utf-8')).hexdigest()
+        self.index_file = os.path.join(self.index_dir, f'{root_hash}.json')
+        self.frame_parser = frame_parser
+        self.force_rescan = force_rescan
+        self.entries = {}
+        self.visited = {}
+        self.listed = 0
+        self.cached = 0
+        # Directories are listed from several scanner threads
+        self.lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION and data.get('root') == self.root:
+                self.entries = data.get('entries', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+        return self
+
+    def save(self):
+        """Write the directories visited by this scan, dropping ones no longer reachable"""
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            temp_file = f'{self.index_file}.{os.getpid()}.tmp'
+            with open(temp_file, 'w') as f:
+                json.dump({'version': self.VERSION, 'root': self.root, 'entries': self.visited}, f)
+            os.replace(temp_file, self.index_file)
+            return True
+        except Exception as e:
+            print(f"Error saving scan index: {e}")
+            return False
+
+    def is_fresh(self, entry, mtime_ns):
+        """Check whether a cached listing still describes the directory"""
+        return (
+            not self.force_rescan
+            and entry['mtime_ns'] == mtime_ns
+            and entry['listed_at_ns'] - mtime_ns > RACY_WINDOW_NS
+        )
+
+    def list_dir(self, path):
+        """Return the listing for a directory, or None if it cannot be read"""
+        path = os.path.abspath(path)
+        with self.lock:
+            if path in self.visited:
+                return self.visited[path]
+
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        entry = self.entries.get(path)
+        fresh = entry is not None and self.is_fresh(entry, mtime_ns)
+        if not fresh:
+            entry = self.read_dir(path, mtime_ns)
+            if entry is None:
+                return None
+
+        with self.lock:
+            if fresh:
+                self.cached += 1
+            else:
+                self.listed += 1
+            self.visited[path] = entry
+        return entry
+
+    def read_dir(self, path, mtime_ns):
+        """List a directory from disk, the same way as an uncached scan"""
+        listed_at_ns = time.time_ns()
+        listing = list_directory(path)
+        if listing is None:
+            return None
+
+        frames = self.frame_parser(listing['exr_files']) if self.frame_parser else []
+        return {
+            'mtime_ns': mtime_ns,
+            'listed_at_ns': listed_at_ns,
+            'dirs': listing['dirs'],
+            'exr_files': listing['exr_files'],
+            'frames': frames
+        }
+
+    def frame_lookup(self, path):
+        """Map each EXR file in a listed directory to its cached frame number"""
+        entry = self.list_dir(path)
+        if entry is None or len(entry['frames']) != len(entry['exr_files']):
+            return {}
+        return dict(zip(entry['exr_files'], entry['frames']))
+
+    def get_stats(self):
+        return {'listed': self.listed, 'cached': self.cached}
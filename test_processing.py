@@ -0,0 +1,980 @@
+#!/usr/bin/env python3
+"""
+Tests for EXR processing on small synthetic sequences
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+import queue
+import socket
+import threading
+import pstats
+import json
+import subprocess
+
+import numpy as np
+import OpenEXR
+import Imath
+
+# Add project root to path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.processing.exr_processor import EXRProcessor
+from src.processing import exr_chunks
+from src.processing import pixels
+from src.processing.report import write_report
+from src.processing.autoscale import WorkerAutoscaler
+from src.processing.executors import PoolExecutor
+from src.processing.scanner import DirectoryScanner
+from src.processing.sharding import parse_frame_ranges, parse_shard, save_plan, load_plan
+from src.processing.work_queue import WorkQueue
+from src.processing.compression_choice import pick_sample_frames, choose_compression
+from src.processing.verification import FrameChecksums
+from src.processing.events import EventStream, FrameDone, Progress, SequenceDone
+from src.utils.scan_index import ScanIndex
+
+WIDTH = 48
+HEIGHT = 70
+ORIGIN = (10, 20)
+
+
+def write_exr(path, channels, compression=OpenEXR.PIZ_COMPRESSION):
+    """Write a scanline EXR whose dataWindow starts at ORIGIN"""
+    height, width = next(iter(channels.values())).shape
+    header = {
+        'compression': compression,
+        'type': OpenEXR.scanlineimage,
+        'dataWindow': (np.array(ORIGIN, dtype=np.int32),
+                       np.array([ORIGIN[0] + width - 1, ORIGIN[1] + height - 1], dtype=np.int32)),
+        'displayWindow': (np.array([0, 0], dtype=np.int32),
+                          np.array([ORIGIN[0] + width - 1, ORIGIN[1] + height - 1], dtype=np.int32))
+    }
+    with OpenEXR.File(header, channels) as exr:
+        exr.write(path)
+
+
+def read_channels(path):
+    """Read every channel of an EXR into numpy arrays"""
+    with OpenEXR.File(path, separate_channels=True) as exr:
+        return {name: channel.pixels.copy() for name, channel in exr.channels().items()}
+
+
+def make_sequence(root, frames=(1001, 1002), base_channels=None):
+    """Create shot/, shot_matte/ and shot_matteHero/ folders under root"""
+    rng = np.random.default_rng(7)
+    base_channels = base_channels or {
+        'R': np.float16, 'G': np.float16, 'B': np.float16
+    }
+    for folder in ['shot', 'shot_matte', 'shot_matteHero']:
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+
+    for frame in frames:
+        write_exr(os.path.join(root, 'shot', f'shot.{frame}.exr'), {
+            name: rng.random((HEIGHT, WIDTH)).astype(dtype) for name, dtype in base_channels.items()
+        })
+        matte = np.zeros((HEIGHT, WIDTH), dtype=np.float16)
+        matte[30:40, 5:25] = 1.0
+        write_exr(os.path.join(root, 'shot_matte', f'shot_matte.{frame}.exr'), {'R': matte})
+        write_exr(os.path.join(root, 'shot_matteHero', f'shot_matteHero.{frame}.exr'),
+                  {'R': rng.random((HEIGHT, WIDTH)).astype(np.float16)})
+    return os.path.join(root, 'shot')
+
+
+def embed(root, compression='piz', options=None):
+    """Scan root and embed its first sequence, returning the output folder"""
+    processor = EXRProcessor()
+    pairs, _ = processor.find_matching_pairs(root)
+    pair = pairs[0]
+    for i, base_file in enumerate(pair['base_files']):
+        matte_files = {channel: files[i] for channel, files in pair['matte_files'].items()}
+        processor.process_exr_file(pair['base_folder'], pair['matte_folders'], base_file,
+                                   matte_files, compression, 'matte', options)
+    return pair['base_folder'] + '_embedded'
+
+
+def run_sequences(root, options=None, compression='piz', frame_policy='strict', events=None, replace_originals=False):
+    """Scan root and run the full multiprocessing pipeline, returning the result dict"""
+    processor = EXRProcessor()
+    pairs, warnings = processor.find_matching_pairs(root, frame_policy=frame_policy)
+    scan_results = {
+        'pairs': pairs,
+        'warnings': warnings,
+        'total_sequences': len(pairs),
+        'total_files': sum(len(pair['base_files']) for pair in pairs)
+    }
+    result_queue = queue.Queue()
+    processor.process_sequences_from_cache(scan_results, compression, 'matte', 1, queue.Queue(),
+                                           result_queue, threading.Event(), replace_originals, options, events)
+    return result_queue.get_nowait()
+
+
+def test_full_frame_embed():
+    """Embedding adds every matte channel next to the base channels"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_folder = make_sequence(temp_dir)
+        output_dir = embed(temp_dir)
+
+        output = read_channels(os.path.join(output_dir, 'shot.1001.exr'))
+        base = read_channels(os.path.join(base_folder, 'shot.1001.exr'))
+        matte = read_channels(os.path.join(temp_dir, 'shot_matte', 'shot_matte.1001.exr'))
+
+        assert sorted(output) == ['B', 'G', 'R', 'matte', 'matte.hero']
+        assert np.array_equal(output['R'], base['R'])
+        assert np.array_equal(output['matte'], matte['R'])
+
+
+def test_streaming_matches_full_frame():
+    """Streamed blocks produce the same pixels as a full-frame embed"""
+    for compression in ['zips', 'zip', 'piz']:
+        with tempfile.TemporaryDirectory() as full_dir, tempfile.TemporaryDirectory() as stream_dir:
+            make_sequence(full_dir)
+            make_sequence(stream_dir)
+            full_output = embed(full_dir, compression)
+            stream_output = embed(stream_dir, compression, {'streaming': True, 'block_lines': 8})
+
+            for frame_file in os.listdir(full_output):
+                full = read_channels(os.path.join(full_output, frame_file))
+                streamed = read_channels(os.path.join(stream_output, frame_file))
+                assert sorted(full) == sorted(streamed)
+                for name in full:
+                    assert np.array_equal(full[name], streamed[name]), (compression, name)
+
+
+def test_native_pixel_types_preserved():
+    """FLOAT and UINT channels keep their type and exact values"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_folder = make_sequence(temp_dir, base_channels={
+            'R': np.float16, 'Z': np.float32, 'id': np.uint32
+        })
+        for options in [{'matte_pixel_type': 'float'}, {'streaming': True, 'block_lines': 16}]:
+            output_dir = embed(temp_dir, 'zip', options)
+            output = read_channels(os.path.join(output_dir, 'shot.1002.exr'))
+            base = read_channels(os.path.join(base_folder, 'shot.1002.exr'))
+
+            for name in ['R', 'Z', 'id']:
+                assert output[name].dtype == base[name].dtype
+                assert np.array_equal(output[name], base[name])
+            expected_matte_type = np.float32 if 'matte_pixel_type' in options else np.float16
+            assert output['matte'].dtype == expected_matte_type
+
+
+def test_multipart_copies_base_chunks():
+    """Multi-part output keeps the base chunks byte for byte and adds a matte part"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_folder = make_sequence(temp_dir, base_channels={'R': np.float16, 'Z': np.float32})
+        output_dir = embed(temp_dir, 'zip', {'output_layout': 'multipart', 'matte_compression': 'zips'})
+        base_path = os.path.join(base_folder, 'shot.1001.exr')
+        output_path = os.path.join(output_dir, 'shot.1001.exr')
+
+        with OpenEXR.File(output_path, separate_channels=True) as exr:
+            assert [part.name() for part in exr.parts] == ['rgba', 'matte']
+            assert sorted(exr.parts[1].channels) == ['matte', 'matte.hero']
+            assert exr.parts[1].header['compression'] == OpenEXR.ZIPS_COMPRESSION
+            assert exr.parts[0].header['compression'] == OpenEXR.PIZ_COMPRESSION
+            assert np.array_equal(exr.parts[0].channels['Z'].pixels, read_channels(base_path)['Z'])
+
+        base_layout = exr_chunks.read_layout(base_path)
+        with open(base_path, 'rb') as f:
+            base_bytes = f.read()
+        with open(output_path, 'rb') as f:
+            output_bytes = f.read()
+        for offset, size in zip(base_layout['offsets'], base_layout['chunk_sizes']):
+            assert base_bytes[offset:offset + size] in output_bytes
+
+
+def test_cropped_matte_part():
+    """The matte part dataWindow covers only the non-zero matte pixels"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        make_sequence(temp_dir)
+        shutil.rmtree(os.path.join(temp_dir, 'shot_matteHero'))
+        output_dir = embed(temp_dir, 'piz', {'output_layout': 'multipart', 'crop_mattes': True})
+
+        with OpenEXR.File(os.path.join(output_dir, 'shot.1001.exr'), separate_channels=True) as exr:
+            matte_part = exr.parts[1]
+            data_min, data_max = matte_part.header['dataWindow']
+            assert list(data_min) == [ORIGIN[0] + 5, ORIGIN[1] + 30]
+            assert list(data_max) == [ORIGIN[0] + 24, ORIGIN[1] + 39]
+            assert np.all(matte_part.channels['matte'].pixels == 1.0)
+
+
+def test_nonzero_bounds():
+    """Bounds cover non-zero pixels across every array"""
+    first = np.zeros((10, 12), dtype=np.float16)
+    second = np.zeros((10, 12), dtype=np.float16)
+    assert pixels.nonzero_bounds([first, second]) is None
+    first[2, 3] = 1.0
+    second[7, 9] = 0.5
+    assert pixels.nonzero_bounds([first, second]) == (3, 2, 9, 7)
+
+
+def test_scan_index_relists_changed_folders():
+    """A rescan reuses cached listings and only re-lists folders whose mtime changed"""
+    with tempfile.TemporaryDirectory() as temp_dir, tempfile.TemporaryDirectory() as config_dir:
+        make_sequence(temp_dir)
+        # Age the tree so the listings are outside the racy mtime window
+        past = time.time() - 60
+        for path, _, _ in os.walk(temp_dir):
+            os.utime(path, (past, past))
+
+        processor = EXRProcessor()
+
+        def scan():
+            scan_index = ScanIndex(temp_dir, config_dir, processor.extract_frame_numbers).load()
+            pairs, _ = processor.find_matching_pairs(temp_dir, scan_index)
+            scan_index.save()
+            return pairs, scan_index.get_stats()
+
+        pairs, stats = scan()
+        assert stats == {'listed': 4, 'cached': 0}
+        assert pairs[0]['base_files'] == ['shot.1001.exr', 'shot.1002.exr']
+
+        pairs, stats = scan()
+        assert stats == {'listed': 0, 'cached': 4}
+        assert pairs[0]['base_files'] == ['shot.1001.exr', 'shot.1002.exr']
+
+        make_sequence(temp_dir, frames=(1003,))
+        pairs, stats = scan()
+        assert stats == {'listed': 3, 'cached': 1}
+        assert pairs[0]['base_files'] == ['shot.1001.exr', 'shot.1002.exr', 'shot.1003.exr']
+
+
+def test_resume_skips_up_to_date_frames():
+    """A resumed run only redoes frames that are missing or whose inputs changed"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        make_sequence(temp_dir, frames=(1001, 1002, 1003))
+        output_dir = os.path.join(temp_dir, 'shot_embedded')
+
+        result = run_sequences(temp_dir, {'resume': True})
+        assert result['success'] and result['skipped_files'] == 0
+
+        result = run_sequences(temp_dir, {'resume': True})
+        assert result['skipped_files'] == 3
+
+        # A missing output and a changed matte are both redone
+        os.remove(os.path.join(output_dir, 'shot.1001.exr'))
+        future = time.time() + 60
+        os.utime(os.path.join(temp_dir, 'shot_matte', 'shot_matte.1002.exr'), (future, future))
+        result = run_sequences(temp_dir, {'resume': True})
+        assert result['skipped_files'] == 1
+        assert os.path.exists(os.path.join(output_dir, 'shot.1001.exr'))
+
+        # Different output settings invalidate every frame
+        result = run_sequences(temp_dir, {'resume': True, 'matte_pixel_type': 'float'})
+        assert result['skipped_files'] == 0
+
+
+def test_scanner_prunes_output_and_hidden_folders():
+    """The scanner lists every folder except _embedded outputs, hidden folders and prune patterns"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for folder in ['shot', 'shot_matte', 'shot_embedded/nested_matte', '.snapshot/shot_matte',
+                       'cache/shot_matte', 'seq/shot2']:
+            os.makedirs(os.path.join(temp_dir, folder))
+        open(os.path.join(temp_dir, 'shot', 'shot.1001.exr'), 'wb').close()
+
+        results = DirectoryScanner(max_workers=4, prune_patterns=['*_embedded', '.*', 'cache']).walk(temp_dir)
+        paths = [os.path.relpath(path, temp_dir) for path, _, _ in results]
+        assert paths == ['.', 'seq', 'seq/shot2', 'shot', 'shot_matte']
+        assert dict((os.path.relpath(path, temp_dir), files) for path, _, files in results)['shot'] == ['shot.1001.exr']
+
+
+def test_block_lines_follow_chunk_size():
+    """Streamed block sizes are rounded up to the largest chunk group"""
+    processor = EXRProcessor()
+    header_piz = {'compression': processor.get_compression('piz')}
+    header_zips = {'compression': processor.get_compression('zips')}
+    assert processor.get_block_lines(header_zips, header_zips, 10) == 10
+    assert processor.get_block_lines(header_zips, header_piz, 10) == 32
+    assert processor.get_block_lines(header_piz, header_zips, 40) == 64
+
+
+def test_frame_policy_intersection():
+    """Missing matte frames drop the sequence when strict, and only those frames otherwise"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_folder = make_sequence(temp_dir, frames=(1001, 1002, 1003, 1010))
+        os.remove(os.path.join(temp_dir, 'shot_matte', 'shot_matte.1002.exr'))
+        os.remove(os.path.join(temp_dir, 'shot_matteHero', 'shot_matteHero.1010.exr'))
+        processor = EXRProcessor()
+
+        pairs, warnings = processor.find_matching_pairs(temp_dir)
+        assert pairs == []
+        assert any('File count mismatch' in warning for warning in warnings)
+
+        # Frame validation reports every channel, not only the first mismatch
+        base_files = sorted(os.listdir(base_folder))
+        valid, warnings = processor.validate_frame_sequences(base_files, {
+            'base': sorted(os.listdir(os.path.join(temp_dir, 'shot_matte'))),
+            'hero': sorted(os.listdir(os.path.join(temp_dir, 'shot_matteHero')))
+        }, base_folder)
+        assert not valid
+        assert len(warnings) == 2
+
+        pairs, warnings = processor.find_matching_pairs(temp_dir, frame_policy='intersection')
+        assert [frame['frame'] for frame in pairs[0]['frames']] == ['1001', '1003']
+        assert pairs[0]['matte_files']['hero'] == ['shot_matteHero.1001.exr', 'shot_matteHero.1003.exr']
+
+        assert pairs[0]['skipped_frames'] == ['1002', '1010']
+
+        result = run_sequences(temp_dir, frame_policy='intersection')
+        assert not result['error_files']
+        assert sorted(os.listdir(base_folder + '_embedded')) == ['shot.1001.exr', 'shot.1003.exr']
+
+
+def test_batches_group_frames_by_sequence():
+    """Small frames are batched per sequence, with several batches per worker"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        make_sequence(temp_dir, frames=range(1001, 1025))
+        processor = EXRProcessor()
+        pairs, _ = processor.find_matching_pairs(temp_dir)
+        contexts = processor.create_sequence_contexts(pairs, 'piz', 'matte', processor.resolve_options(None))
+        tasks, _ = processor.create_tasks(pairs, 'piz', 'matte', contexts[0]['options'])
+
+        batches = processor.create_batches(contexts, tasks, 2)
+        assert [len(frames) for _, frames in batches] == [3] * 8
+        assert [frame[0] for _, frames in batches for frame in frames] == pairs[0]['base_files']
+
+        # Frames larger than the batch target are sent one at a time
+        processor.BATCH_TARGET_BYTES = 1
+        assert len(processor.create_batches(contexts, tasks, 2)) == 24
+
+
+def test_engines_produce_same_output():
+    """Thread and hybrid engines write the same files as the process engine"""
+    outputs = {}
+    for engine in ['process', 'thread', 'hybrid']:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base_folder = make_sequence(temp_dir, frames=range(1001, 1006))
+            result = run_sequences(temp_dir, {'engine': engine, 'threads_per_process': 2})
+            assert result['success'], engine
+            output_dir = base_folder + '_embedded'
+            outputs[engine] = {
+                frame_file: read_channels(os.path.join(output_dir, frame_file))
+                for frame_file in sorted(os.listdir(output_dir))
+            }
+
+    for engine in ['thread', 'hybrid']:
+        assert sorted(outputs[engine]) == sorted(outputs['process'])
+        for frame_file, channels in outputs['process'].items():
+            for name, pixels in channels.items():
+                assert np.array_equal(outputs[engine][frame_file][name], pixels), (engine, frame_file, name)
+
+
+def test_pooled_conversion_matches_openexr():
+    """Converted channels match OpenEXR's own conversion and reuse pooled memory"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'matte.exr')
+        rng = np.random.default_rng(3)
+        values = (rng.standard_normal((HEIGHT, WIDTH)) * 10000).astype(np.float32)
+        values[0, :4] = [np.inf, -np.inf, 1e-8, 70000.0]
+        write_exr(path, {'R': values})
+
+        processor = EXRProcessor()
+        half = Imath.PixelType(Imath.PixelType.HALF)
+        exr = OpenEXR.InputFile(path)
+        try:
+            read_plan = [(exr, [('matte', 'R', half)], 'read_mattes')]
+            first = processor.read_channels(read_plan)['matte']
+            expected = np.frombuffer(exr.channel('R', half), dtype=np.float16).reshape(HEIGHT, WIDTH)
+            assert first.dtype == np.float16
+            assert np.array_equal(first, expected)
+
+            y_range = (ORIGIN[1] + 8, ORIGIN[1] + 15)
+            block = processor.read_channels(read_plan, y_range)['matte']
+            assert np.array_equal(block, expected[8:16])
+            assert np.shares_memory(first, block)
+        finally:
+            exr.close()
+
+
+def test_run_report_stage_timings():
+    """Workers return stage timings that the run report aggregates per sequence"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_folder = make_sequence(temp_dir, frames=(1001, 1002, 1003))
+        result = run_sequences(temp_dir)
+        report = result['report']
+
+        assert report['run']['frames'] == 3
+        assert [sequence['sequence'] for sequence in report['sequences']] == [base_folder]
+        stages = report['run']['stages']
+        assert all(stages[name]['seconds'] > 0 for name in ['open', 'read_base', 'read_mattes', 'write'])
+        assert abs(sum(stage['share'] for stage in stages.values()) - 1) < 0.01
+
+        csv_path = os.path.join(temp_dir, 'report.csv')
+        write_report(report, csv_path)
+        with open(csv_path) as f:
+            rows = f.read().splitlines()
+        assert rows[0].startswith('sequence,frames,errors')
+        assert rows[-1].startswith('TOTAL,3,0')
+
+        # Cropping the mattes is timed on its own, not as part of the write
+        shutil.rmtree(base_folder + '_embedded')
+        stages = run_sequences(temp_dir, {'output_layout': 'multipart', 'crop_mattes': True})['report']['run']['stages']
+        assert stages['crop']['seconds'] > 0
+
+
+def test_profile_merges_worker_stats():
+    """Worker profiles are merged into one pstats file and collapsed stacks"""
+    for engine in ['process', 'thread']:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            make_sequence(temp_dir, frames=(1001, 1002, 1003))
+            profile_path = os.path.join(temp_dir, 'run.pstats')
+            collapsed_path = os.path.join(temp_dir, 'run.collapsed')
+            result = run_sequences(temp_dir, {'engine': engine, 'profile': profile_path,
+                                              'profile_collapsed': collapsed_path})
+            assert result['success'], engine
+
+            stats = pstats.Stats(profile_path).stats
+            calls = [nc for (_, _, name), (_, nc, _, _, _) in stats.items() if name == 'process_exr_file']
+            assert calls == [3], engine
+
+            with open(collapsed_path) as f:
+                lines = f.read().splitlines()
+            assert any('process_exr_file' in line.rsplit(' ', 1)[0] for line in lines)
+            assert all(int(line.rsplit(' ', 1)[1]) > 0 for line in lines)
+
+
+def test_pipeline_matches_direct_output():
+    """Prefetch and write-behind write the same files, and report per-frame errors"""
+    for layout in ['single', 'multipart']:
+        outputs = {}
+        for pipeline in [False, True]:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                base_folder = make_sequence(temp_dir, frames=range(1001, 1006))
+                staging_dir = os.path.join(temp_dir, 'staging')
+                os.makedirs(staging_dir)
+                result = run_sequences(temp_dir, {'output_layout': layout, 'pipeline': pipeline,
+                                                  'prefetch_depth': 1, 'staging_dir': staging_dir})
+                assert result['success'], (layout, pipeline)
+                assert os.listdir(staging_dir) == []
+                output_dir = base_folder + '_embedded'
+                outputs[pipeline] = {
+                    frame_file: read_channels(os.path.join(output_dir, frame_file))
+                    for frame_file in sorted(os.listdir(output_dir))
+                }
+                if pipeline:
+                    stages = result['report']['run']['stages']
+                    assert stages['fetch']['seconds'] > 0 and stages['store']['seconds'] > 0
+
+        assert sorted(outputs[True]) == sorted(outputs[False])
+        for frame_file, channels in outputs[False].items():
+            for name, pixels in channels.items():
+                assert np.array_equal(outputs[True][frame_file][name], pixels), (layout, frame_file, name)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_folder = make_sequence(temp_dir, frames=range(1001, 1006))
+        processor = EXRProcessor()
+        pair = processor.find_matching_pairs(temp_dir)[0][0]
+        # A matte that disappears after the scan fails its own frame only
+        os.remove(os.path.join(temp_dir, 'shot_matte', 'shot_matte.1003.exr'))
+        context = processor.create_sequence_contexts([pair], 'piz', 'matte',
+                                                     processor.resolve_options({'pipeline': True}))[0]
+        os.makedirs(context['output_folder'])
+        frames = [(frame['base_file'], frame['matte_files']) for frame in processor.get_pair_frames(pair)]
+        results = processor.process_frames(context, frames)
+        assert [base_file for base_file, _, _ in results] == [base_file for base_file, _ in frames]
+        assert [base_file for base_file, error, _ in results if error] == ['shot.1003.exr']
+        assert sorted(os.listdir(base_folder + '_embedded')) == [
+            'shot.1001.exr', 'shot.1002.exr', 'shot.1004.exr', 'shot.1005.exr'
+        ]
+
+
+class FailingWriteProcessor(EXRProcessor):
+    """Processor whose frame writes stop halfway through"""
+
+    def write_full_frame(self, read_plan, output_path, header_out, timer=None, checksums=None):
+        with open(output_path, 'wb') as f:
+            f.write(b'truncated')
+        raise Exception("Error writing output file: No space left on device")
+
+
+def test_output_root_and_atomic_writes():
+    """Outputs mirror the scanned tree under the output root and only appear once complete"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        scan_root = os.path.join(temp_dir, 'renders')
+        output_root = os.path.join(temp_dir, 'out')
+        base_folder = make_sequence(os.path.join(scan_root, 'sq010'))
+        for pipeline in [False, True]:
+            result = run_sequences(scan_root, {'output_root': output_root, 'pipeline': pipeline})
+            assert result['success'], pipeline
+            assert not os.path.exists(base_folder + '_embedded')
+            output_dir = os.path.join(output_root, 'sq010', 'shot_embedded')
+            assert sorted(os.listdir(output_dir)) == ['shot.1001.exr', 'shot.1002.exr']
+            shutil.rmtree(output_root)
+
+        # A single frame processed on its own lands where a scanned run puts it
+        processor = EXRProcessor()
+        pair = processor.find_matching_pairs(scan_root)[0][0]
+        processor.process_exr_file(base_folder, pair['matte_folders'], 'shot.1001.exr',
+                                   {channel: files[0] for channel, files in pair['matte_files'].items()},
+                                   'piz', 'matte', {'output_root': output_root}, scan_root=pair['scan_root'])
+        assert os.listdir(os.path.join(output_root, 'sq010', 'shot_embedded')) == ['shot.1001.exr']
+        shutil.rmtree(output_root)
+
+        processor = FailingWriteProcessor()
+        pair = processor.find_matching_pairs(scan_root)[0][0]
+        output_dir = processor.get_pair_output_folder(pair, {'output_root': output_root})
+        os.makedirs(output_dir)
+        output_path = os.path.join(output_dir, 'shot.1001.exr')
+        try:
+            processor.process_exr_file(base_folder, pair['matte_folders'], 'shot.1001.exr',
+                                       {channel: files[0] for channel, files in pair['matte_files'].items()},
+                                       'piz', 'matte', output_path=output_path)
+            assert False, "write should have failed"
+        except Exception as e:
+            assert 'No space left' in str(e)
+        assert os.listdir(output_dir) == []
+
+        # Writers on other threads, or other hosts with the same pid, never share a temporary name
+        names = [processor.get_temp_path(output_path)]
+        thread = threading.Thread(target=lambda: names.append(processor.get_temp_path(output_path)))
+        thread.start()
+        thread.join()
+        assert names[0] != names[1] and socket.gethostname() in names[0]
+
+        # Temporary files of killed workers are removed once stale, and never end up among the originals
+        output_dir = base_folder + '_embedded'
+        os.makedirs(output_dir)
+        stale, recent = [os.path.join(output_dir, f'shot.{frame}.exr.node.1.1.tmp') for frame in (1001, 1002)]
+        for path in [stale, recent]:
+            with open(path, 'wb') as f:
+                f.write(b'truncated')
+        os.utime(stale, (time.time() - 2 * 3600, time.time() - 2 * 3600))
+        assert run_sequences(scan_root)['success']
+        assert not os.path.exists(stale) and os.path.exists(recent)
+        assert run_sequences(scan_root, {'resume': True}, replace_originals=True)['success']
+        assert sorted(os.listdir(base_folder)) == ['.exr_matte_embed_manifest.json', 'shot.1001.exr', 'shot.1002.exr']
+
+
+def test_autoscaler_follows_throughput():
+    """Workers are added while files/s improves and the last step is undone at the plateau"""
+    autoscaler = WorkerAutoscaler(4, cpu_count=8)
+    assert autoscaler.active == 1
+    for rate, expected in [(10, 2), (19, 3), (19.5, 2), (19, 2)]:
+        autoscaler.adjust(rate, 0.5)
+        assert autoscaler.active == expected, rate
+    assert autoscaler.settled
+
+    # A drop with busy CPUs searches downwards, stopping at one worker
+    autoscaler.adjust(10, 0.95)
+    assert autoscaler.active == 1 and not autoscaler.settled
+    autoscaler.adjust(12, 0.95)
+    assert autoscaler.active == 1 and autoscaler.settled
+
+    # Workers beyond the core count are not added once the CPUs are saturated
+    autoscaler = WorkerAutoscaler(8, cpu_count=2)
+    autoscaler.adjust(10, 0.5)
+    autoscaler.adjust(20, 0.95)
+    assert autoscaler.active == 2 and autoscaler.settled
+
+    for engine in ['process', 'hybrid']:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            make_sequence(temp_dir, frames=range(1001, 1009))
+            result = run_sequences(temp_dir, {'engine': engine, 'autoscale': True})
+            assert result['success'], engine
+            assert result['report']['run']['frames'] == 8
+            assert result['report']['run']['workers'] == 1
+
+
+def test_memory_budget_limits_concurrent_frames():
+    """Frame memory is estimated from the headers and running batches stay within the budget"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        make_sequence(temp_dir, base_channels={'R': np.float16, 'Z': np.float32})
+        processor = EXRProcessor()
+        pair = processor.find_matching_pairs(temp_dir)[0][0]
+        frame = (pair['base_files'][0], {channel: files[0] for channel, files in pair['matte_files'].items()})
+        for options, bytes_per_pixel in [
+            ({}, 2 + 4 + 2 * 2),                                           # R, Z and two HALF mattes
+            ({'matte_pixel_type': 'float'}, 2 + 4 + 2 * (2 + 4)),          # mattes converted to FLOAT
+            ({'output_layout': 'multipart'}, 2 * 2),                       # base chunks are copied
+        ]:
+            context = processor.create_sequence_contexts([pair], 'piz', 'matte',
+                                                         processor.resolve_options(options))[0]
+            assert processor.estimate_frame_memory(context, *frame) == WIDTH * HEIGHT * bytes_per_pixel, options
+
+        # The pipeline holds the queued inputs, the frame being encoded and one waiting to be queued
+        context = processor.create_sequence_contexts([pair], 'piz', 'matte', processor.resolve_options(
+            {'pipeline': True, 'prefetch_depth': 1, 'max_memory': 1000}))[0]
+        input_bytes = sum(os.path.getsize(path) for path in processor.get_input_paths(
+            pair['base_folder'], pair['matte_folders'], *frame).values())
+        assert processor.estimate_frame_memory(context, *frame) == WIDTH * HEIGHT * (2 + 4 + 2 * 2) + 3 * input_bytes
+
+        # Each sequence is estimated once, from the first batch
+        estimates = []
+        processor.estimate_frame_memory = lambda *args: estimates.append(args) or 100
+        costs = processor.estimate_batch_memory([context], [(0, [frame])] * 3, [], frame_costs := {})
+        assert list(costs) == [100] * 3 and len(estimates) == 1 and frame_costs == {0: 100}
+
+        result = run_sequences(temp_dir, {'max_memory': 1000})
+        assert not result.get('error_files')
+        assert any('memory budget' in warning for warning in result['warnings'])
+        assert result['report']['run']['memory']['budget'] == 1000
+
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def run(item):
+        with lock:
+            running.append(item)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(item)
+        return item
+
+    items = list(range(8))
+    costs = [60, 60, 30, 30, 30, 30, 200, 30]
+    with PoolExecutor('thread', 4) as executor:
+        assert sorted(executor.imap_limited(run, items, costs=costs, budget=100)) == items
+        # The 200 cost item exceeds the budget on its own and runs alone
+        assert executor.peak_cost == 200
+    assert max(peak) == 3
+
+
+def test_shards_split_frames_by_bytes():
+    """Shards cover every frame once with about equal bytes, and a saved plan shards the same way"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        frames = range(1001, 1007)
+        make_sequence(os.path.join(temp_dir, 'a'), frames, {c: np.float32 for c in 'RGBA'})
+        make_sequence(os.path.join(temp_dir, 'b'), frames)
+        processor = EXRProcessor()
+        pairs, warnings = processor.find_matching_pairs(temp_dir)
+        assert len(pairs) == 2
+
+        all_files = {(pair['base_folder'], f) for pair in pairs for f in pair['base_files']}
+        frame_bytes = {pair['base_folder']: processor.estimate_frame_bytes(pair) for pair in pairs}
+        shards = [processor.select_frames(pairs, shard=(i, 3)) for i in range(1, 4)]
+        files = [{(pair['base_folder'], f) for pair in shard for f in pair['base_files']} for shard in shards]
+        assert set.union(*files) == all_files
+        assert sum(len(f) for f in files) == len(all_files)
+        shard_bytes = [sum(frame_bytes[folder] for folder, _ in f) for f in files]
+        assert max(shard_bytes) - min(shard_bytes) <= 2 * max(frame_bytes.values())
+        for shard in shards:
+            for pair in shard:
+                assert len(pair['skipped_frames']) == len(frames) - len(pair['base_files'])
+
+        assert parse_frame_ranges('1002-1003,1006') == [(1002, 1003), (1006, 1006)]
+        assert parse_shard('3/16') == (3, 16)
+        for spec in ['0/4', '5/4', '4']:
+            try:
+                parse_shard(spec)
+                assert False, spec
+            except ValueError:
+                pass
+        selected = processor.select_frames(pairs, frame_ranges=parse_frame_ranges('1002-1003,1006'))
+        for pair in selected:
+            assert [frame['frame'] for frame in pair['frames']] == ['1002', '1003', '1006']
+            assert pair['skipped_frames'] == ['1001', '1004', '1005']
+            assert pair['base_files'] == [frame['base_file'] for frame in pair['frames']]
+        assert processor.select_frames(pairs, frame_ranges=[(2000, 2001)]) == []
+
+        plan_path = os.path.join(temp_dir, 'shot.plan')
+        save_plan(plan_path, {'pairs': pairs, 'warnings': warnings, 'total_sequences': 2,
+                              'total_files': len(all_files)}, temp_dir, 'strict')
+        plan = load_plan(plan_path)
+        assert [processor.select_frames(plan['pairs'], shard=(i, 3)) for i in range(1, 4)] == shards
+
+
+def test_work_queue_shared_by_nodes():
+    """Node processes sharing a work queue embed every frame once and take over expired leases"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        frames = range(1001, 1009)
+        base_folder = make_sequence(temp_dir, frames)
+        queue_dir = os.path.join(temp_dir, 'queue')
+        output_folder = base_folder + '_embedded'
+
+        # A node that died while holding frame 1001
+        dead_node = WorkQueue(queue_dir, {(0, 'shot.1001.exr'): os.path.join(output_folder, 'shot.1001.exr')},
+                              node_id='dead', lease_ttl=2)
+        os.makedirs(queue_dir)
+        assert dead_node.claim(0, 'shot.1001.exr')
+        assert not WorkQueue(queue_dir, dead_node.output_paths, lease_ttl=2).claim(0, 'shot.1001.exr')
+        expired = time.time() - 10
+        os.utime(dead_node.lease_file(dead_node.frame_key(0, 'shot.1001.exr')), (expired, expired))
+
+        nodes = [
+            subprocess.Popen([sys.executable, '-m', 'src.cli.cli_processor', temp_dir, '--quiet',
+                              '--processes', '1', '--engine', 'thread', '--work-queue', queue_dir,
+                              '--node-id', f'node{i}', '--lease-ttl', '2',
+                              '--report', os.path.join(temp_dir, f'node{i}.json')],
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+            for i in range(3)
+        ]
+        assert [node.wait(timeout=120) for node in nodes] == [0, 0, 0]
+
+        reports = []
+        for i in range(3):
+            with open(os.path.join(temp_dir, f'node{i}.json')) as f:
+                reports.append(json.load(f)['run'])
+        assert sum(report['frames'] for report in reports) == len(frames)
+        assert sum(report['work_queue']['reclaimed'] for report in reports) == 1
+        assert sorted(os.listdir(output_folder)) == [f'shot.{frame}.exr' for frame in frames]
+        queue_files = os.listdir(queue_dir)
+        assert len([f for f in queue_files if f.endswith('.done')]) == len(frames)
+        assert not [f for f in queue_files if f.endswith('.lease')]
+
+        # Running the same queue again only redoes frames whose inputs changed
+        write_exr(os.path.join(temp_dir, 'shot_matte', 'shot_matte.1003.exr'),
+                  {'R': np.ones((HEIGHT, WIDTH), dtype=np.float16)})
+        sink = ListSink()
+        result = run_sequences(temp_dir, {'work_queue': queue_dir, 'lease_ttl': 2}, events=EventStream(sink, 0))
+        assert result['success'] and result['report']['run']['frames'] == 1
+        assert np.all(read_channels(os.path.join(output_folder, 'shot.1003.exr'))['matte'] == 1)
+        # The frames done by other nodes still complete the sequence
+        assert result['report']['sequences'][0]['done_elsewhere'] == len(frames) - 1
+        assert sum(delivery.count('sequence_done') for delivery in sink.deliveries) == 1
+
+        # A frame that failed while its inputs kept their size and time is tried again by the next run
+        matte_path = os.path.join(temp_dir, 'shot_matte', 'shot_matte.1004.exr')
+        with open(matte_path, 'rb') as f:
+            matte_data = f.read()
+        rendered = time.time_ns() + 60 * 10 ** 9
+        for data in [bytes(len(matte_data)), matte_data]:
+            with open(matte_path, 'wb') as f:
+                f.write(data)
+            os.utime(matte_path, ns=(rendered, rendered))
+            result = run_sequences(temp_dir, {'work_queue': queue_dir, 'lease_ttl': 2})
+            assert result['report']['run']['frames'] == 1
+            assert bool(result.get('success')) == (data == matte_data)
+
+        # A node whose expired lease was taken over leaves the new lease alone
+        slow_node, new_node = [WorkQueue(queue_dir, dead_node.output_paths, node_id=node_id, lease_ttl=2)
+                               for node_id in ['slow', 'new']]
+        assert slow_node.claim(0, 'shot.1001.exr')
+        lease_file = slow_node.lease_file(slow_node.frame_key(0, 'shot.1001.exr'))
+        os.utime(lease_file, (expired, expired))
+        assert new_node.claim(0, 'shot.1001.exr')
+        slow_node.complete(0, 'shot.1001.exr')
+        with open(lease_file) as f:
+            assert json.load(f)['node'] == 'new'
+
+
+def test_watch_embeds_frames_as_they_land():
+    """Watch mode embeds new frames once every channel has landed and stopped changing"""
+    for polling in [False, True]:
+        with tempfile.TemporaryDirectory() as temp_dir, tempfile.TemporaryDirectory() as render_dir:
+            make_sequence(temp_dir, (1001,))
+            make_sequence(render_dir, (1002,))
+            processor = EXRProcessor()
+            progress_queue = queue.Queue()
+            stop_event = threading.Event()
+            watch = threading.Thread(target=processor.watch_folder, args=(
+                temp_dir, 'piz', 'matte', 1, progress_queue, stop_event,
+                {'engine': 'thread'}, 0.2, polling
+            ))
+            watch.start()
+            try:
+                assert 'Watching' in progress_queue.get(timeout=10)['status1']
+
+                def land(folder):
+                    name = f'{folder}.1002.exr'
+                    shutil.move(os.path.join(render_dir, folder, name), os.path.join(temp_dir, folder, name))
+
+                # Frame 1002 is not embedded until its last matte lands
+                land('shot')
+                land('shot_matteHero')
+                time.sleep(0.6)
+                assert not os.path.exists(os.path.join(temp_dir, 'shot_embedded'))
+                land('shot_matte')
+
+                summary = progress_queue.get(timeout=20)['watch']
+                assert summary['processed'] == 1 and not summary['error_files']
+                assert os.listdir(os.path.join(temp_dir, 'shot_embedded')) == ['shot.1002.exr']
+            finally:
+                stop_event.set()
+                watch.join()
+
+
+def test_auto_compression_follows_objective():
+    """Auto compression encodes sample frames with each candidate and picks one per objective"""
+    assert pick_sample_frames(list(range(10)), 3) == [0, 4, 9]
+    assert pick_sample_frames([1, 2], 5) == [1, 2]
+    measurements = {
+        'rle': {'seconds': 1.0, 'bytes': 900},
+        'zip': {'seconds': 3.0, 'bytes': 500},
+        'piz': {'seconds': 2.0, 'bytes': 600}
+    }
+    assert choose_compression(measurements, 'fastest') == 'rle'
+    assert choose_compression(measurements, 'smallest') == 'zip'
+    assert choose_compression(measurements, 'balanced') == 'rle'
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_folder = make_sequence(temp_dir, (1001, 1002, 1003))
+        result = run_sequences(temp_dir, {'compression_objective': 'smallest', 'auto_candidates': ['none', 'zip'],
+                                          'auto_samples': 2}, compression='auto')
+        assert result.get('success'), result
+        choice = result['report']['run']['compression']['sequences'][base_folder]
+        assert choice['compression'] == 'zip'
+        assert choice['samples']['zip']['bytes'] < choice['samples']['none']['bytes']
+        with OpenEXR.File(os.path.join(base_folder + '_embedded', 'shot.1002.exr')) as exr:
+            assert exr.header()['compression'] == OpenEXR.ZIP_COMPRESSION
+
+        # The manifest records the compression chosen, so only a run with another one redoes the frames
+        options = {'resume': True, 'compression_objective': 'smallest', 'auto_candidates': ['none', 'zip']}
+        assert run_sequences(temp_dir, options, compression='auto')['skipped_files'] == 0
+        assert run_sequences(temp_dir, options, compression='auto')['skipped_files'] == 3
+        assert run_sequences(temp_dir, {'resume': True}, compression='zip')['skipped_files'] == 3
+        assert run_sequences(temp_dir, {'resume': True}, compression='piz')['skipped_files'] == 0
+
+
+def test_verify_detects_changed_outputs():
+    """Verification passes for every layout and catches an output that does not match its checksums"""
+    layouts = [
+        {},
+        {'streaming': True, 'block_lines': 16, 'pipeline': True},
+        {'output_layout': 'multipart', 'crop_mattes': True},
+        {'output_layout': 'multipart', 'matte_compression': 'dwaa'}
+    ]
+    for options in layouts:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            make_sequence(temp_dir)
+            result = run_sequences(temp_dir, {'verify': True, **options})
+            assert result.get('success'), result
+            assert result['report']['run']['verification'] == {'frames': 2, 'failed': 0, 'verified_sequences': 1}
+
+            # A frame replaced by another no longer matches its checksums
+            processor = EXRProcessor()
+            pairs, _ = processor.find_matching_pairs(temp_dir)
+            context = processor.create_sequence_contexts(pairs, 'piz', 'matte', processor.resolve_options(options))[0]
+            frame = processor.get_pair_frames(pairs[0])[0]
+            checksums = FrameChecksums()
+            processor.process_exr_file(context['base_folder'], context['matte_info'], frame['base_file'],
+                                       frame['matte_files'], 'piz', 'matte', context['options'], checksums=checksums)
+            frames = [('shot.1001.exr', checksums.to_dict())]
+            assert processor.verify_frames(context, frames) == [('shot.1001.exr', None)]
+            output_folder = context['output_folder']
+            shutil.copy(os.path.join(output_folder, 'shot.1002.exr'), os.path.join(output_folder, 'shot.1001.exr'))
+            (_, error), = processor.verify_frames(context, frames)
+            assert error.startswith('Verification failed'), error
+
+
+def test_fingerprints_skip_rewritten_inputs():
+    """Rewritten but unchanged inputs are skipped by fingerprint, also for frames embedded in place"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_folder = make_sequence(temp_dir)
+        matte_path = os.path.join(temp_dir, 'shot_matte', 'shot_matte.1002.exr')
+        for fingerprint in ['header', 'content']:
+            options = {'resume': True, 'fingerprint': fingerprint}
+            assert run_sequences(temp_dir, options)['skipped_files'] == 0
+            # The same render written again only changes the modification time
+            future = time.time() + 60
+            os.utime(matte_path, (future, future))
+            assert run_sequences(temp_dir, options)['skipped_files'] == 2
+            os.utime(matte_path, (future + 60, future + 60))
+            assert run_sequences(temp_dir, {'resume': True})['skipped_files'] == 1
+            shutil.rmtree(base_folder + '_embedded')
+
+        # Uncompressed chunks keep their sizes, so a matte with different pixels has the same offset table
+        uncompressed = np.zeros((HEIGHT, WIDTH), dtype=np.float16)
+        write_exr(matte_path, {'R': uncompressed}, OpenEXR.NO_COMPRESSION)
+        options = {'resume': True, 'fingerprint': 'header'}
+        assert run_sequences(temp_dir, options)['skipped_files'] == 0
+        write_exr(matte_path, {'R': uncompressed + 1}, OpenEXR.NO_COMPRESSION)
+        assert run_sequences(temp_dir, options)['skipped_files'] == 1
+        assert np.all(read_channels(os.path.join(base_folder + '_embedded', 'shot.1002.exr'))['matte'] == 1)
+        # So are chunks that zip could not shrink, as with noise
+        rng = np.random.default_rng(3)
+        for _ in range(2):
+            noise = np.frombuffer(rng.bytes(HEIGHT * WIDTH * 4), dtype=np.float32).reshape(HEIGHT, WIDTH)
+            write_exr(matte_path, {'R': noise}, OpenEXR.ZIP_COMPRESSION)
+            assert exr_chunks.read_header_block(matte_path) is None
+            assert run_sequences(temp_dir, options)['skipped_files'] == 1
+        shutil.rmtree(base_folder + '_embedded')
+
+        # Replace the originals by hand, then render the mattes again with one frame changed
+        options = {'resume': True, 'fingerprint': 'content'}
+        assert run_sequences(temp_dir, options)['success']
+        matte_folders = [os.path.join(temp_dir, name) for name in ['shot_matte', 'shot_matteHero']]
+        for folder in matte_folders:
+            shutil.copytree(folder, folder + '.render')
+            shutil.rmtree(folder)
+        shutil.rmtree(base_folder)
+        os.rename(base_folder + '_embedded', base_folder)
+        for folder in matte_folders:
+            os.makedirs(folder)
+            for name in os.listdir(folder + '.render'):
+                shutil.copyfile(os.path.join(folder + '.render', name), os.path.join(folder, name))
+            shutil.rmtree(folder + '.render')
+        write_exr(matte_path, {'R': np.full((HEIGHT, WIDTH), 0.5, dtype=np.float16)})
+
+        result = run_sequences(temp_dir, options)
+        assert result['success'] and result['skipped_files'] == 1
+        output_dir = base_folder + '_embedded'
+        assert os.path.samefile(os.path.join(base_folder, 'shot.1001.exr'), os.path.join(output_dir, 'shot.1001.exr'))
+        assert np.all(read_channels(os.path.join(output_dir, 'shot.1002.exr'))['matte'] == 0.5)
+        assert run_sequences(temp_dir, options)['skipped_files'] == 2
+
+
+class ListSink:
+    """Event sink keeping each delivery"""
+
+    def __init__(self):
+        self.deliveries = []
+
+    def send(self, events):
+        self.deliveries.append([event.type for event in events])
+
+
+def test_events_stream_as_json_lines():
+    """Frame and progress events are held between deliveries, and the CLI writes every event as JSON"""
+    sink = ListSink()
+    events = EventStream(sink, interval=3600)
+    events.last_delivery = time.monotonic()
+    for frame in range(3):
+        events.emit(FrameDone('shot', f'shot.{1001 + frame}.exr', {'write': 0.1}))
+        events.emit(Progress(frame + 1, 3, 1.0, 1.0, 0.0))
+    assert sink.deliveries == []
+    events.emit(SequenceDone('shot', 3, 0, 0.3))
+    assert sink.deliveries == [['frame_done'] * 3 + ['progress', 'sequence_done']]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_folder = make_sequence(temp_dir)
+        output = subprocess.run([sys.executable, '-m', 'src.cli.cli_processor', temp_dir, '--processes', '1',
+                                 '--events', 'jsonl', '--events-interval', '0'],
+                                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+                                timeout=120)
+        assert output.returncode == 0, output.stderr
+        # Everything else goes to standard error, so every line is an event
+        lines = [json.loads(line) for line in output.stdout.splitlines()]
+        types = [line['event'] for line in lines]
+        assert types[:3] == ['scan_started', 'scan_finished', 'run_started'] and types[-1] == 'run_summary'
+        frames = [line for line in lines if line['event'] == 'frame_done']
+        assert sorted(line['frame'] for line in frames) == ['shot.1001.exr', 'shot.1002.exr']
+        assert all(line['sequence'] == base_folder and 'write' in line['stages'] for line in frames)
+        assert types.index('sequence_done') > types.index('frame_done')
+        assert lines[-1]['success'] and lines[-1]['run']['frames'] == 2
+        assert 'Scan Results' in output.stderr
+
+
+if __name__ == '__main__':
+    test_full_frame_embed()
+    test_streaming_matches_full_frame()
+    test_native_pixel_types_preserved()
+    test_multipart_copies_base_chunks()
+    test_cropped_matte_part()
+    test_nonzero_bounds()
+    test_scan_index_relists_changed_folders()
+    test_resume_skips_up_to_date_frames()
+    test_scanner_prunes_output_and_hidden_folders()
+    test_block_lines_follow_chunk_size()
+    test_frame_policy_intersection()
+    test_batches_group_frames_by_sequence()
+    test_engines_produce_same_output()
+    test_pooled_conversion_matches_openexr()
+    test_run_report_stage_timings()
+    test_profile_merges_worker_stats()
+    test_pipeline_matches_direct_output()
+    test_output_root_and_atomic_writes()
+    test_autoscaler_follows_throughput()
+    test_memory_budget_limits_concurrent_frames()
+    test_shards_split_frames_by_bytes()
+    test_work_queue_shared_by_nodes()
+    test_watch_embeds_frames_as_they_land()
+    test_auto_compression_follows_objective()
+    test_verify_detects_changed_outputs()
+    test_fingerprints_skip_rewritten_inputs()
+    test_events_stream_as_json_lines()
+    print("✓ All processing tests passed!")